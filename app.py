@@ -6,13 +6,14 @@ from google_sheets_reviews import (
     get_reviews_for_subject as get_reviews_for,
     get_review_summary_sheets as get_review_summary,
     get_all_reviews_from_sheets,
+    get_review_sentiment_counts,
+    get_review_cache_metrics,
     check_sheets_connection
 )
 
 try:
     from nlp_sentiment import (
-        analyze_sentiment, analyze_reviews_batch,
-        get_sentiment_summary, format_sentiment_bar
+        analyze_sentiment, get_sentiment_summary, format_sentiment_bar
     )
     NLP_SENTIMENT_AVAILABLE = True
 except ImportError:
@@ -490,17 +491,15 @@ with review_col:
     st.markdown("---")
     st.markdown('<p class="section-header">Spilled Tea</p>', unsafe_allow_html=True)
 
-    user_reviews = get_all_reviews_from_sheets()
+    # Newest 5 with their stored sentiment; the bar reads precomputed counts
+    user_reviews = get_all_reviews_from_sheets(limit=5)
 
     if user_reviews:
         if NLP_SENTIMENT_AVAILABLE:
-            user_reviews = analyze_reviews_batch(user_reviews)
-            summary = get_sentiment_summary(user_reviews)
+            summary = get_sentiment_summary(counts=get_review_sentiment_counts())
             st.markdown(format_sentiment_bar(summary), unsafe_allow_html=True)
 
-        sorted_reviews = sorted(user_reviews, key=lambda x: x.get('timestamp', ''), reverse=True)[:5]
-
-        for review in sorted_reviews:
+        for review in user_reviews:
             stars = "★" * review.get("rating", 0) + "☆" * (5 - review.get("rating", 0))
             sentiment_html = ""
             if NLP_SENTIMENT_AVAILABLE and "sentiment" in review:
@@ -526,6 +525,10 @@ with review_col:
     connection = check_sheets_connection()
     if connection['connected']:
         print(f"SHEETS_URL: {connection.get('spreadsheet_url', '')}")
-        st.caption("⟳ synced")
+        cache = get_review_cache_metrics()
+        if cache['age_seconds'] is not None:
+            st.caption(f"⟳ synced {cache['age_seconds']:.0f}s ago")
+        else:
+            st.caption("⟳ synced")
     else:
         st.caption("◇ local")
@@ -5,6 +5,12 @@
 # stations to the nearest railway stations
 # ==================================================
 
+import re
+
+from keyword_automaton import KeywordAutomaton
+from station_registry import station_id
+from geo_index import estimate_rail_minutes
+
 # Areas mapped to nearest stations with real bus routes
 FIRST_LAST_MILE = {
     # ==================== POWAI / HIRANANDANI ====================
@@ -385,18 +391,126 @@ FIRST_LAST_MILE = {
 }
 
 
+# Keyword automaton over all area keywords (built once on first use)
+_area_automaton = None
+
+
+def _get_area_automaton():
+    global _area_automaton
+    if _area_automaton is None:
+        automaton = KeywordAutomaton()
+        for area_key, area_data in FIRST_LAST_MILE.items():
+            for keyword in area_data["keywords"]:
+                automaton.add(keyword, area_key)
+        _area_automaton = automaton.build()
+    return _area_automaton
+
+
+def find_area_mentions(query):
+    """
+    Find every area mentioned in the query in a single pass.
+    Returns list of (start, end, area_key, area_data) ordered by position.
+    """
+    mentions = []
+    for start, end, area_key in _get_area_automaton().find(query):
+        mentions.append((start, end, area_key, FIRST_LAST_MILE[area_key]))
+    return mentions
+
+
 def find_area(query):
     """Find matching area from query."""
-    query_lower = query.lower()
-
-    for area_key, area_data in FIRST_LAST_MILE.items():
-        for keyword in area_data["keywords"]:
-            if keyword in query_lower:
-                return area_key, area_data
+    mentions = find_area_mentions(query)
+    if mentions:
+        _, _, area_key, area_data = mentions[0]
+        return area_key, area_data
 
     return None, None
 
 
+def split_route_areas(query):
+    """
+    Work out origin and destination areas from their position
+    around " to " (e.g. "Powai to BKC").
+    Returns (from_area, to_area) - either may be None.
+    """
+    mentions = find_area_mentions(query)
+    if not mentions:
+        return None, None
+
+    to_pos = query.lower().find(" to ")
+    if to_pos == -1:
+        return mentions[0][3], None
+
+    from_area = next((m[3] for m in mentions if m[1] <= to_pos), None)
+    to_area = next((m[3] for m in mentions if m[0] >= to_pos + 4), None)
+    return from_area, to_area
+
+
+def parse_travel_minutes(travel_time):
+    """Parse a travel time like "15-20 min" into minutes (range midpoint)."""
+    numbers = [int(n) for n in re.findall(r"\d+", travel_time or "")]
+    if not numbers:
+        return 0.0  # "Direct Metro" - no bus leg
+    return sum(numbers[:2]) / len(numbers[:2])
+
+
+def _rail_station(conn):
+    """Station id for a connection if it is a local train station."""
+    sid = station_id(conn["station"])
+    if sid and not sid.startswith("m1_"):
+        return sid
+    return None
+
+
+def rank_access_stations(area_data, other_station=None):
+    """
+    Rank an area's stations by bus time + estimated train time to
+    other_station (the far end of the journey).
+    Returns list of (total_minutes, conn), fastest first.
+    """
+    other_sid = station_id(other_station) if other_station else None
+    ranked = []
+    for conn in area_data["nearest_stations"]:
+        sid = _rail_station(conn)
+        if sid is None:
+            continue
+        total = parse_travel_minutes(conn["travel_time"])
+        if other_sid:
+            total += estimate_rail_minutes(sid, other_sid)
+        ranked.append((total, conn))
+
+    ranked.sort(key=lambda item: item[0])
+    if not ranked:
+        # Nothing we can route by train - keep the listed order
+        ranked = [(parse_travel_minutes(c["travel_time"]), c) for c in area_data["nearest_stations"]]
+    return ranked
+
+
+def pick_access_pair(from_area, to_area, start_station=None, end_station=None):
+    """
+    Choose first-mile and last-mile connections that minimise total
+    journey time. Either area may be None (journey starts/ends at a
+    station). Returns (first_conn, last_conn).
+    """
+    if from_area and to_area:
+        best = None
+        for bus_a, conn_a in rank_access_stations(from_area):
+            for bus_b, conn_b in rank_access_stations(to_area):
+                sid_a, sid_b = _rail_station(conn_a), _rail_station(conn_b)
+                rail = estimate_rail_minutes(sid_a, sid_b) if sid_a and sid_b else 0
+                total = bus_a + rail + bus_b
+                if best is None or total < best[0]:
+                    best = (total, conn_a, conn_b)
+        return best[1], best[2]
+
+    first_conn = last_conn = None
+    if from_area:
+        first_conn = rank_access_stations(from_area, end_station)[0][1]
+    if to_area:
+        last_conn = rank_access_stations(to_area, start_station)[0][1]
+    return first_conn, last_conn
+
+
 def get_bus_connection(from_area, to_station=None):
     """Get bus connection details for an area."""
     area_key, area_data = find_area(from_area)
@@ -515,12 +629,9 @@ def format_combined_route(result):
 # Quick lookup for chatbot
 def check_needs_bus_connection(query):
     """Check if query mentions an area that needs bus connection."""
-    query_lower = query.lower()
-
-    for area_key, area_data in FIRST_LAST_MILE.items():
-        for keyword in area_data["keywords"]:
-            if keyword in query_lower:
-                return True, area_key, area_data
+    area_key, area_data = find_area(query)
+    if area_data:
+        return True, area_key, area_data
 
     return False, None, None
 
@@ -0,0 +1,166 @@
+# ==================================================
+# Mumbai Local Train - Crowd Model
+# ==================================================
+# Estimates how packed a departure will be from the
+# time-of-day band (PEAK_HOURS), whether it starts or
+# ends at a CROWDED_STATIONS hub and the train type.
+# Scoring works on whole arrays at once (numpy).
+# ==================================================
+
+import numpy as np
+import pandas as pd
+
+from station_info import PEAK_HOURS, CROWDED_STATIONS
+from station_registry import station_id
+from transfers import time_band
+
+# ---------------- WEIGHTS ----------------
+
+# Base crowding by PEAK_HOURS crowd level (0 = empty, 1 = crush load)
+LEVEL_SCORES = {
+    "Very High": 1.0,
+    "High": 0.75,
+    "Low to Medium": 0.35,
+    "Low": 0.2,
+}
+SHOULDER_SCORE = 0.6         # within SHOULDER_MIN of a rush band
+OFF_HOURS_SCORE = 0.15       # early morning / late night outside any band
+SHOULDER_MIN = 60
+
+ORIGIN_HUB_EXTRA = 0.15      # boarding at a crowded hub
+DEST_HUB_EXTRA = 0.10        # heading into a crowded hub
+
+# Multipliers by train type ("AC FAST", "SEMI", ...)
+TYPE_FACTORS = {
+    "FAST": 1.2,
+    "SEMI": 1.1,
+    "MEDIUM": 1.1,
+    "SLOW": 1.0,
+}
+AC_FACTOR = 0.75             # AC locals have more space (fewer takers)
+
+# Label thresholds, checked in order
+CROWD_LABELS = [
+    (0.9, "Very High"),
+    (0.65, "High"),
+    (0.4, "Medium"),
+    (0.0, "Low"),
+]
+
+MINUTES_PER_DAY = 24 * 60
+
+
+# ==================================================
+# LOOKUP TABLES
+# ==================================================
+
+def _build_minute_scores():
+    """Minute of day -> base crowd score (1440 entries)."""
+    scores = np.empty(MINUTES_PER_DAY)
+    rush = np.zeros(MINUTES_PER_DAY, dtype=bool)
+
+    for minute in range(MINUTES_PER_DAY):
+        band = time_band(minute)
+        if band in PEAK_HOURS:
+            level = PEAK_HOURS[band]["crowd_level"]
+            scores[minute] = LEVEL_SCORES.get(level, SHOULDER_SCORE)
+            rush[minute] = level == "Very High"
+        else:
+            scores[minute] = np.nan
+
+    # Minutes outside every band: shoulder if close to a rush band
+    rush_minutes = np.flatnonzero(rush)
+    for minute in np.flatnonzero(np.isnan(scores)):
+        gap = np.abs(rush_minutes - minute).min() if len(rush_minutes) else MINUTES_PER_DAY
+        scores[minute] = SHOULDER_SCORE if gap <= SHOULDER_MIN else OFF_HOURS_SCORE
+    return scores
+
+
+_MINUTE_SCORES = _build_minute_scores()
+_CROWDED_IDS = {station_id(name) for name in CROWDED_STATIONS}
+
+
+def _is_hub(name):
+    return station_id(str(name)) in _CROWDED_IDS
+
+
+def _type_factor(train_type):
+    words = str(train_type).upper().split()
+    factor = 1.0
+    for word in words:
+        factor *= TYPE_FACTORS.get(word, 1.0)
+    if "AC" in words:
+        factor *= AC_FACTOR
+    return factor
+
+
+def _map_unique(values, func):
+    """Apply func once per distinct value and broadcast back."""
+    uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return np.array([func(value) for value in uniques])[inverse]
+
+
+# ==================================================
+# SCORING
+# ==================================================
+
+def crowd_scores(minutes, sources, dests, types):
+    """
+    Crowd score for each departure (higher = more crowded).
+
+    minutes: minute of day per train (NaN for unparsable times)
+    sources, dests, types: station names and train types per train
+    Returns a float array; NaN where the time is unknown.
+    """
+    minutes = np.asarray(minutes, dtype=float)
+    known = ~np.isnan(minutes)
+    index = np.where(known, minutes, 0).astype(int) % MINUTES_PER_DAY
+
+    base = np.where(known, _MINUTE_SCORES[index], np.nan)
+    hubs = (_map_unique(sources, _is_hub) * ORIGIN_HUB_EXTRA
+            + _map_unique(dests, _is_hub) * DEST_HUB_EXTRA)
+    return base * _map_unique(types, _type_factor) + hubs
+
+
+def departure_minutes(times):
+    """'4:15 am' / '04:29 AM' strings -> minute of day (float, NaN if bad)."""
+    parsed = pd.to_datetime(pd.Series(times, dtype=str).str.strip().str.upper(),
+                            format="%I:%M %p", errors="coerce")
+    return (parsed.dt.hour * 60 + parsed.dt.minute).to_numpy(dtype=float)
+
+
+def score_trains(df):
+    """Crowd scores for a timetable DataFrame (time/source/dest/type)."""
+    if len(df) == 0:
+        return np.empty(0)
+    return crowd_scores(departure_minutes(df["time"]), df["source"], df["dest"], df["type"])
+
+
+def crowd_label(score):
+    """Human-readable crowd level for a score."""
+    if score is None or np.isnan(score):
+        return "Unknown"
+    for threshold, label in CROWD_LABELS:
+        if score >= threshold:
+            return label
+    return CROWD_LABELS[-1][1]
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    import os
+    import time
+
+    df = pd.read_csv(os.path.join(os.path.dirname(__file__), "mumbai_local_trains.csv"))
+
+    start = time.perf_counter()
+    scores = score_trains(df)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Scored {len(df)} trains in {elapsed:.2f} ms")
+
+    sample = df.assign(score=scores.round(2)).iloc[::900]
+    for _, row in sample.iterrows():
+        print(f"{row['time']:>9s} {row['source']:>14s} -> {row['dest']:<14s} "
+              f"{row['type']:<8s} {row['score']:.2f} {crowd_label(row['score'])}")
@@ -0,0 +1,195 @@
+# ==================================================
+# Mumbai Local Train - Local Timetable Site Stand-In
+# ==================================================
+# Serves timetable pages in the same HTML layout as
+# mumbailifeline.com / go4mumbai.com from a local HTTP
+# server, so the scrapers run offline:
+#
+#   from fake_railway_site import FakeRailwaySite
+#   with FakeRailwaySite() as site:
+#       scrape_all_trains.main(lifeline_url=site.url, go4mumbai_url=site.url)
+#
+# Pages recorded with record_fixtures() are served as-is;
+# anything else gets a generated timetable. Pages carry an
+# ETag / Last-Modified and answer conditional requests with
+# 304 until `revision` is bumped. Latency and periodic 503s
+# can be injected to exercise retries.
+# ==================================================
+
+import hashlib
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def fixture_name(path, query):
+    """File name a page is recorded under (path + sorted query)."""
+    params = parse_qs(query)
+    if path.endswith("timetable.php"):
+        parts = [params.get(k, [""])[0] for k in ("sel_route", "sfrom", "sto")]
+        return "timetable_" + "_".join(parts).lower() + ".html"
+    base = os.path.basename(path).rsplit(".", 1)[0] or "index"
+    if not query:
+        return base + ".html"
+    return f"{base}_{hashlib.sha1(query.encode()).hexdigest()[:10]}.html"
+
+
+def record_fixtures(urls, fixtures_dir=FIXTURES_DIR):
+    """Download real pages so later runs can be replayed offline."""
+    from scrape_http import Fetcher
+    os.makedirs(fixtures_dir, exist_ok=True)
+    fetcher = Fetcher()
+    for url, response in fetcher.fetch_all({url: url for url in urls}):
+        if isinstance(response, Exception):
+            print(f"Could not record {url}: {response}")
+            continue
+        parts = urlsplit(url)
+        with open(os.path.join(fixtures_dir, fixture_name(parts.path, parts.query)), "w",
+                  encoding="utf-8") as f:
+            f.write(response.text)
+    fetcher.close()
+
+
+# ==================================================
+# GENERATED PAGES
+# ==================================================
+
+def _clock(minute):
+    hour, minute = divmod(minute % (24 * 60), 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def timetable_page(route, src, dst):
+    """A timetable.php result page: one table, header + train rows."""
+    seed = int(hashlib.sha1(f"{route}{src}{dst}".encode()).hexdigest()[:6], 16)
+    rows = ["<tr><td>Train No</td><td>Speed</td><td>Car</td>"
+            "<td>Origin</td><td>Destination</td><td>Departs</td></tr>"]
+    for i, minute in enumerate(range(240 + seed % 15, 24 * 60, 17 + seed % 7)):
+        ac = i % 9 == 0
+        speed = "FAST" if i % 3 == 0 else "SLOW"
+        name = f"{'AC ' if ac else ''}{route[0].upper()}{seed % 900 + i}"
+        rows.append(f"<tr><td>{name}</td><td>{speed}</td><td>12</td>"
+                    f"<td>{src}</td><td>{dst}</td><td>{_clock(minute)}</td></tr>")
+    return ("<html><body><table><tr><td>Mumbai Lifeline</td></tr></table>"
+            f"<table>{''.join(rows)}</table></body></html>")
+
+
+def ac_trains_page():
+    """go4mumbai's AC page: tables 4 and 5 hold UP / DOWN in 6-cell groups."""
+    tables = ["<table><tr><td>nav</td></tr></table>"] * 4
+    for direction, (src, dst) in enumerate([("Virar", "Churchgate"), ("Churchgate", "Virar")]):
+        cells = []
+        for i in range(24):
+            cells.append(f"<td>AC {direction}{i:02d}</td><td>{'FAST' if i % 2 else 'SLOW'}</td>"
+                         f"<td>12</td><td>{src}</td><td>{dst}</td><td>{_clock(300 + i * 45)}</td>")
+        rows = "".join(f"<tr>{''.join(cells[i:i + 2])}</tr>" for i in range(0, len(cells), 2))
+        tables.append(f"<table>{rows}</table>")
+    return f"<html><body>{''.join(tables)}</body></html>"
+
+
+# ==================================================
+# SERVER
+# ==================================================
+
+class FakeRailwaySite:
+    """Threaded local HTTP server; use as a context manager."""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, latency=0.0, fail_every=0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.revision = 0            # bump to "publish" changed pages
+        self._modified = {}          # revision -> Last-Modified date
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = None
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, body = site.respond(self.path)
+                data = body.encode("utf-8")
+                etag = f'"{hashlib.sha1(data).hexdigest()[:16]}"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, data = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                if status in (200, 304):
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", site.last_modified())
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def last_modified(self):
+        with self._lock:
+            stamp = self._modified.setdefault(self.revision, time.time())
+        return formatdate(stamp, usegmt=True)
+
+    def respond(self, raw_path):
+        """(status, html) for a request path."""
+        with self._lock:
+            self.requests += 1
+            count = self.requests
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and count % self.fail_every == 0:
+            return 503, "<html><body>Service Unavailable</body></html>"
+
+        parts = urlsplit(raw_path)
+        recorded = os.path.join(self.fixtures_dir, fixture_name(parts.path, parts.query))
+        if os.path.exists(recorded):
+            with open(recorded, "r", encoding="utf-8") as f:
+                return 200, f.read()
+
+        stamp = f"<!-- revision {self.revision} -->"
+        if parts.path.endswith("timetable.php"):
+            params = parse_qs(parts.query)
+            page = timetable_page(*(params.get(k, ["?"])[0] for k in ("sel_route", "sfrom", "sto")))
+            return 200, page + stamp
+        if parts.path.endswith("ac-trains.php"):
+            return 200, ac_trains_page() + stamp
+        return 404, "<html><body>Not Found</body></html>"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="fake-railway-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    with FakeRailwaySite() as site:
+        page = requests.get(f"{site.url}/timetable.php?sel_route=western&sfrom=DADAR&sto=VIRAR").text
+        print(f"Serving {site.url}: timetable page {len(page)} bytes, "
+              f"{page.count('<tr>') - 1} trains")
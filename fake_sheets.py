@@ -0,0 +1,207 @@
+# ==================================================
+# Mumbai Local Train - In-Memory Google Sheets
+# ==================================================
+# Minimal stand-in for the parts of gspread the review
+# storage uses, so it can be exercised without network
+# access or credentials:
+#
+#   import google_sheets_reviews as sheets
+#   from fake_sheets import FakeClient
+#   sheets.set_client(FakeClient())                      # or
+#   sheets.set_client(FakeClient(), FakeCredentials())   # token refreshes too
+# ==================================================
+
+import re
+from datetime import datetime, timedelta, timezone
+
+from google_sheets_reviews import SpreadsheetNotFound
+
+try:
+    from gspread.exceptions import WorksheetNotFound
+except ImportError:
+    class WorksheetNotFound(Exception):
+        pass
+
+
+class FakeWorksheet:
+    """A worksheet held as a list of rows (row 1 = headers)."""
+
+    def __init__(self, title, rows=1000, cols=26):
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.rows = []
+        self.calls = {}
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def update_title(self, title):
+        self.title = title
+
+    def append_row(self, values, value_input_option="RAW"):
+        self._count("append_row")
+        self.rows.append([str(v) for v in values])
+
+    def append_rows(self, values, value_input_option="RAW"):
+        self._count("append_rows")
+        self.rows.extend([str(v) for v in row] for row in values)
+
+    def get_all_values(self):
+        self._count("get_all_values")
+        return [list(row) for row in self.rows]
+
+    def get(self, range_name=None):
+        """A1 range like 'A120:H' (open-ended rows) or 'A2:H10'."""
+        self._count("get")
+        if range_name is None:
+            return self.get_all_values()
+        match = re.match(r"([A-Z]+)(\d+)?:([A-Z]+)(\d+)?$", range_name)
+        first_col, first_row, last_col, last_row = match.groups()
+        start = int(first_row or 1) - 1
+        end = int(last_row) if last_row else len(self.rows)
+        cols = slice(_col_index(first_col), _col_index(last_col) + 1)
+        return [row[cols] for row in self.rows[start:end]]
+
+    def get_all_records(self):
+        self._count("get_all_records")
+        if not self.rows:
+            return []
+        headers = self.rows[0]
+        records = []
+        for row in self.rows[1:]:
+            padded = row + [""] * (len(headers) - len(row))
+            records.append({h: _typed(v) for h, v in zip(headers, padded)})
+        return records
+
+
+class FakeSpreadsheet:
+    def __init__(self, title):
+        self.title = title
+        self.id = f"fake-{abs(hash(title))}"
+        self.url = f"https://docs.google.com/spreadsheets/d/{self.id}"
+        self.sheet1 = FakeWorksheet("Sheet1")
+        self._worksheets = [self.sheet1]
+
+    def share(self, email, perm_type="user", role="reader"):
+        pass
+
+    def add_worksheet(self, title, rows=1000, cols=26):
+        sheet = FakeWorksheet(title, rows, cols)
+        self._worksheets.append(sheet)
+        return sheet
+
+    def worksheet(self, title):
+        for sheet in self._worksheets:
+            if sheet.title == title:
+                return sheet
+        raise WorksheetNotFound(title)
+
+    def worksheets(self):
+        return list(self._worksheets)
+
+
+class FakeClient:
+    """In-memory gspread client. Counts open() calls to show handle reuse."""
+
+    def __init__(self):
+        self.spreadsheets = {}
+        self.opens = 0
+
+    def open(self, title):
+        self.opens += 1
+        if title not in self.spreadsheets:
+            raise SpreadsheetNotFound(title)
+        return self.spreadsheets[title]
+
+    def create(self, title):
+        spreadsheet = FakeSpreadsheet(title)
+        self.spreadsheets[title] = spreadsheet
+        return spreadsheet
+
+
+class FakeCredentials:
+    """
+    Service-account credentials stand-in: the token lasts `lifetime`
+    seconds, expiry is naive UTC like google-auth's, refresh() counts.
+    """
+
+    def __init__(self, lifetime=3600, fail=False):
+        self.lifetime = lifetime
+        self.fail = fail
+        self.token = None
+        self.expiry = None
+        self.refreshes = 0
+
+    def refresh(self, request):
+        if self.fail:
+            raise ConnectionError("token endpoint unreachable")
+        self.refreshes += 1
+        self.token = f"token-{self.refreshes}"
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=self.lifetime)
+
+
+def _col_index(letters):
+    index = 0
+    for ch in letters:
+        index = index * 26 + ord(ch) - ord("A") + 1
+    return index - 1
+
+
+def _typed(value):
+    """Numbers come back as numbers, like gspread's get_all_records."""
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    import google_sheets_reviews as sheets
+    import review_store
+    from review_queue import ReviewQueue
+
+    review_store.DB_FILE = os.path.join(tempfile.mkdtemp(), "reviews.db")
+    client = FakeClient()
+    sheets.set_client(client)
+    sheets._review_queue = ReviewQueue(
+        sheets._write_reviews, spool_file=os.path.join(tempfile.mkdtemp(), "queue.jsonl"), interval=0.1)
+
+    for i in range(3):
+        status = sheets.check_sheets_connection()
+    print(f"Connected: {status['connected']} ({status['spreadsheet_name']}), open() calls: {client.opens}")
+
+    for i in range(120):
+        sheets.add_review_to_sheets("station", "Dadar", 1 + i % 5, f"Review {i}", "Tester")
+    print(f"Visible before flush: {len(sheets.get_all_reviews_from_sheets())}")
+
+    time.sleep(0.5)
+    sheet = client.spreadsheets["Mumbai Train Reviews"].worksheet(sheets.REVIEWS_SHEET)
+    print(f"Rows in sheet: {len(sheet.rows) - 1}, append_rows calls: {sheet.calls.get('append_rows')}")
+    print(f"Visible after flush: {len(sheets.get_all_reviews_from_sheets())}, open() calls: {client.opens}")
+    print(f"Cache: {sheets.get_review_cache_metrics()}")
+
+    # Incremental sync: cost per sync stays flat as the sheet grows
+    sync = sheets.ReviewSync()
+    sync.sync()
+    for size in (1_000, 10_000, 30_000):
+        sheet.append_rows([[f"old-{size}-{i}", "2024-01-01T00:00:00", "station", "Thane",
+                            3, "Filler", "Bulk", "user"] for i in range(size - len(sheet.rows) + 1)])
+        sync.sync()                       # catch up
+        sheet.append_row(["new-" + str(size), "2024-01-02T00:00:00", "station", "Dadar",
+                          5, "Fresh", "Tester", "user"])
+        start = time.perf_counter()
+        sync.sync()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{len(sync.reviews):>6} reviews: sync fetched {sync.stats['last_rows_fetched']} row(s) "
+              f"in {elapsed:.2f} ms")
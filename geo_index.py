@@ -0,0 +1,220 @@
+# ==================================================
+# Mumbai Local Train - Geo Index
+# ==================================================
+# Locality coordinates + grid spatial index over stations
+# "Nearest k stations to this place" in microseconds
+# ==================================================
+
+import math
+
+from station_registry import STATIONS, station_id, route_distance_km
+
+# ---------------- LOCALITIES ----------------
+# Neighbourhoods without a station of their own.
+# Keys match FIRST_LAST_MILE area keys in bus_connections.
+
+LOCALITIES = {
+    "powai": {"name": "Powai / Hiranandani", "lat": 19.1176, "lon": 72.9060},
+    "juhu": {"name": "Juhu", "lat": 19.1075, "lon": 72.8263},
+    "bkc": {"name": "Bandra Kurla Complex (BKC)", "lat": 19.0660, "lon": 72.8650},
+    "nariman_point": {"name": "Nariman Point / Cuffe Parade", "lat": 18.9256, "lon": 72.8242},
+    "worli": {"name": "Worli", "lat": 19.0176, "lon": 72.8162},
+    "lokhandwala": {"name": "Lokhandwala / Oshiwara", "lat": 19.1420, "lon": 72.8270},
+    "colaba": {"name": "Colaba", "lat": 18.9067, "lon": 72.8147},
+    "goregaon_east": {"name": "Goregaon East (NESCO/Oberoi)", "lat": 19.1550, "lon": 72.8660},
+    "malad_west": {"name": "Malad West (Inorbit/Mindspace)", "lat": 19.1760, "lon": 72.8350},
+    "andheri_east": {"name": "Andheri East (SEEPZ/MIDC)", "lat": 19.1230, "lon": 72.8760},
+    "thane_west": {"name": "Thane West (Viviana/Lake City Mall)", "lat": 19.2087, "lon": 72.9713},
+    "airoli": {"name": "Airoli / Ghansoli", "lat": 19.1550, "lon": 72.9950},
+    "vashi_cbd": {"name": "Vashi / CBD Belapur", "lat": 19.0770, "lon": 72.9980},
+    "bandra_west": {"name": "Bandra West (Linking Road/Hill Road)", "lat": 19.0600, "lon": 72.8300},
+    "chembur": {"name": "Chembur", "lat": 19.0522, "lon": 72.9005},
+    "versova": {"name": "Versova", "lat": 19.1350, "lon": 72.8150},
+    "mulund_west": {"name": "Mulund West", "lat": 19.1750, "lon": 72.9450},
+    "santacruz_east": {"name": "Santacruz East (Kalina)", "lat": 19.0780, "lon": 72.8550},
+    "lower_parel": {"name": "Lower Parel (Phoenix/High Street)", "lat": 18.9950, "lon": 72.8250},
+    "ghodbunder": {"name": "Ghodbunder Road", "lat": 19.2580, "lon": 72.9680},
+    "kharghar": {"name": "Kharghar", "lat": 19.0470, "lon": 73.0700},
+    "wadala": {"name": "Wadala", "lat": 19.0200, "lon": 72.8650},
+    "marine_drive": {"name": "Marine Drive", "lat": 18.9430, "lon": 72.8230},
+    "fort": {"name": "Fort", "lat": 18.9330, "lon": 72.8350},
+}
+
+EARTH_RADIUS_KM = 6371.0
+
+# Average local train speed including halts (slow locals ~30 km/h)
+AVG_TRAIN_SPEED_KMPH = 32
+# Rough cost of changing lines when no single route connects two stations
+CHANGE_PENALTY_MIN = 8
+# Straight-line distance underestimates track distance
+TRACK_DETOUR_FACTOR = 1.3
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# ==================================================
+# GRID SPATIAL INDEX
+# ==================================================
+
+class SpatialIndex:
+    """
+    Uniform lat/lon grid over a set of points.
+
+    A nearest-k query scans the query's cell and then rings of
+    neighbouring cells, stopping once no unscanned cell can hold
+    anything closer than the current k-th result.
+    """
+
+    def __init__(self, points, cell_deg=0.02):
+        self.cell_deg = cell_deg
+        self._cells = {}
+        self._size = 0
+        for key, lat, lon in points:
+            self._cells.setdefault(self._cell(lat, lon), []).append((key, lat, lon))
+            self._size += 1
+
+        rows = [c[0] for c in self._cells] or [0]
+        cols = [c[1] for c in self._cells] or [0]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols))
+        # Narrowest side of a cell in km (longitude shrinks towards the pole)
+        far_lat = max(abs(self._bounds[0]), abs(self._bounds[1]) + 1) * cell_deg
+        self._cell_km = cell_deg * 111.0 * math.cos(math.radians(far_lat))
+
+    def __len__(self):
+        return self._size
+
+    def _cell(self, lat, lon):
+        return (int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg)))
+
+    def _ring(self, ci, cj, r):
+        if r == 0:
+            yield (ci, cj)
+            return
+        for dj in range(-r, r + 1):
+            yield (ci - r, cj + dj)
+            yield (ci + r, cj + dj)
+        for di in range(-r + 1, r):
+            yield (ci + di, cj - r)
+            yield (ci + di, cj + r)
+
+    def nearest(self, lat, lon, k=1, predicate=None):
+        """
+        Get the k nearest points as (key, km), closest first.
+        predicate(key) can exclude points (e.g. wrong line).
+        """
+        ci, cj = self._cell(lat, lon)
+        min_i, max_i, min_j, max_j = self._bounds
+        max_r = max(abs(ci - min_i), abs(ci - max_i), abs(cj - min_j), abs(cj - max_j))
+
+        found = []
+        for r in range(max_r + 1):
+            for cell in self._ring(ci, cj, r):
+                for key, plat, plon in self._cells.get(cell, ()):
+                    if predicate is not None and not predicate(key):
+                        continue
+                    found.append((haversine_km(lat, lon, plat, plon), key))
+
+            if len(found) >= k:
+                found.sort()
+                # Anything in ring r+1 or beyond is at least r cells away
+                if found[k - 1][0] <= r * self._cell_km:
+                    break
+
+        found.sort()
+        return [(key, dist) for dist, key in found[:k]]
+
+
+# Built once at import so queries never pay for it
+_station_index = SpatialIndex(
+    (sid, s["lat"], s["lon"]) for sid, s in STATIONS.items()
+)
+
+
+# ==================================================
+# QUERIES
+# ==================================================
+
+def locate(place):
+    """Get (lat, lon) for a locality key/name or station name."""
+    if not place:
+        return None
+
+    key = place.lower().strip()
+    locality = LOCALITIES.get(key.replace(" ", "_"))
+    if locality:
+        return locality["lat"], locality["lon"]
+    for locality in LOCALITIES.values():
+        if locality["name"].lower() == key:
+            return locality["lat"], locality["lon"]
+
+    sid = station_id(place)
+    if sid:
+        return STATIONS[sid]["lat"], STATIONS[sid]["lon"]
+    return None
+
+
+def nearest_stations(lat, lon, k=3, line=None):
+    """Get k nearest station ids as (station_id, km), optionally on one line."""
+    def on_line(sid):
+        return line in STATIONS[sid]["lines"]
+
+    return _station_index.nearest(lat, lon, k=k, predicate=on_line if line else None)
+
+
+def nearest_stations_to(place, k=3, line=None):
+    """Get k nearest stations to a locality or station name."""
+    point = locate(place)
+    if point is None:
+        return []
+    return nearest_stations(point[0], point[1], k=k, line=line)
+
+
+def best_access_station(place, dest_line):
+    """Get the nearest station on dest_line to a place as (station_id, km)."""
+    result = nearest_stations_to(place, k=1, line=dest_line)
+    return result[0] if result else None
+
+
+def estimate_rail_minutes(from_sid, to_sid):
+    """Rough in-train time between two stations (minutes)."""
+    if from_sid == to_sid:
+        return 0.0
+
+    shared = route_distance_km(from_sid, to_sid)
+    if shared:
+        return shared[1] / AVG_TRAIN_SPEED_KMPH * 60
+
+    a, b = STATIONS[from_sid], STATIONS[to_sid]
+    km = haversine_km(a["lat"], a["lon"], b["lat"], b["lon"]) * TRACK_DETOUR_FACTOR
+    return km / AVG_TRAIN_SPEED_KMPH * 60 + CHANGE_PENALTY_MIN
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    import time
+
+    print("Geo Index - nearest stations")
+    print("=" * 50)
+    for place in ["powai", "juhu", "bkc", "colaba", "kharghar"]:
+        near = nearest_stations_to(place, k=3)
+        names = ", ".join(f"{STATIONS[s]['name']} ({d:.1f} km)" for s, d in near)
+        print(f"{place:12s} -> {names}")
+
+    best = best_access_station("powai", "WR")
+    print(f"\nBest Western Line station for Powai: {STATIONS[best[0]]['name']}")
+
+    runs = 20000
+    start = time.perf_counter()
+    for _ in range(runs):
+        nearest_stations(19.1176, 72.9060, k=3)
+    per_query = (time.perf_counter() - start) / runs * 1e6
+    print(f"\nnearest_stations(k=3): {per_query:.1f} us/query over {len(_station_index)} stations")
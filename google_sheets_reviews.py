@@ -6,16 +6,28 @@
 
 import json
 import os
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
 
 try:
     import gspread
+    from gspread.exceptions import SpreadsheetNotFound
     from google.oauth2.service_account import Credentials
+    from google.auth.transport.requests import Request
     GSPREAD_AVAILABLE = True
 except ImportError:
     GSPREAD_AVAILABLE = False
     print("Warning: gspread not installed. Run: pip install gspread google-auth")
 
+    class SpreadsheetNotFound(Exception):
+        pass
+
+import review_store
+from station_registry import station_id, find_stations
+from review_queue import ReviewQueue, new_review_id
+from review_cache import StaleWhileRevalidateCache
+
 # ---------------- CONFIGURATION ----------------
 
 # Google Sheets settings
@@ -29,12 +41,16 @@ REVIEWS_SHEET = "User Reviews"
 SCRAPED_SHEET = "Scraped Data"
 
 # Cache for performance
-_sheet_cache = {}
-_last_fetch = {}
-CACHE_DURATION = 60  # seconds
+CACHE_DURATION = 60  # seconds before the review snapshot is refreshed
+FULL_SYNC_INTERVAL = 15 * 60  # seconds between full re-reads (catch edits/deletes)
+
+REVIEW_HEADERS = ['ID', 'Timestamp', 'Category', 'Subject',
+                  'Rating', 'Comment', 'Username', 'Source']
 
-# Scraped reviews file
-SCRAPED_REVIEWS_FILE = os.path.join(os.path.dirname(__file__), "scraped_reviews.json")
+# Connection handles (one handshake per process)
+TOKEN_REFRESH_MARGIN = 300   # refresh the OAuth token this many seconds before expiry
+RECONNECT_BACKOFF = 2        # seconds, doubled per failed connect
+MAX_RECONNECT_BACKOFF = 300
 
 
 def get_credentials():
@@ -74,15 +90,159 @@ def get_credentials():
     return None
 
 
+# ==================================================
+# CONNECTION HANDLES
+# ==================================================
+# Credentials, client, spreadsheet and worksheets are created
+# once and shared by every call in the process. After an API
+# failure the handles are dropped and reconnects back off.
+
+_handles = {
+    'configured': None,      # None = not checked yet
+    'credentials': None,
+    'client': None,
+    'spreadsheet': None,
+    'worksheets': {},
+    'failures': 0,
+    'retry_at': 0,
+}
+_handles_lock = threading.RLock()
+_client_override = None
+connection_stats = {'connects': 0, 'token_refreshes': 0, 'failures': 0}
+
+
+def set_client(client, credentials=None):
+    """
+    Use a ready-made client (e.g. fake_sheets.FakeClient) instead of
+    authenticating with Google; credentials, if given, are kept fresh
+    like real ones. Pass None to go back to real credentials.
+    """
+    global _client_override
+    with _handles_lock:
+        _client_override = client
+        reset_connection()
+        _handles['credentials'] = credentials
+
+
+def reset_connection():
+    """Drop all cached handles; the next call reconnects."""
+    with _handles_lock:
+        _handles.update(configured=None, credentials=None, client=None,
+                        spreadsheet=None, worksheets={}, failures=0, retry_at=0)
+
+
+def report_failure(error=None):
+    """Forget handles after an API error and back off before reconnecting."""
+    with _handles_lock:
+        _handles.update(client=None, spreadsheet=None, worksheets={})
+        _handles['failures'] += 1
+        delay = min(RECONNECT_BACKOFF * 2 ** (_handles['failures'] - 1), MAX_RECONNECT_BACKOFF)
+        _handles['retry_at'] = time.time() + delay
+        connection_stats['failures'] += 1
+    if error:
+        print(f"Google Sheets error (retry in {delay:.0f}s): {error}")
+
+
+def _refresh_token_if_needed(creds):
+    """Refresh the OAuth token shortly before it expires."""
+    expiry = getattr(creds, 'expiry', None)
+    if expiry is not None and expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)       # google-auth keeps naive UTC
+    if creds.token and expiry and (expiry - datetime.now(timezone.utc)).total_seconds() > TOKEN_REFRESH_MARGIN:
+        return
+    creds.refresh(Request() if GSPREAD_AVAILABLE else None)
+    connection_stats['token_refreshes'] += 1
+
+
+def _token_ok():
+    """
+    Check the shared credentials before a handle is handed out (cached
+    handles included). False, with the handles dropped, if a refresh failed.
+    """
+    if _handles['credentials'] is None:
+        return True
+    try:
+        _refresh_token_if_needed(_handles['credentials'])
+    except Exception as e:
+        report_failure(e)
+        return False
+    return True
+
+
+def sheets_configured():
+    """True if Google Sheets can be used (credentials found once per process)."""
+    with _handles_lock:
+        if _client_override is not None:
+            return True
+        if _handles['configured'] is None:
+            creds = get_credentials() if GSPREAD_AVAILABLE else None
+            _handles['credentials'] = creds
+            _handles['configured'] = creds is not None
+        return _handles['configured']
+
+
 def get_client():
-    """Get authenticated gspread client."""
-    if not GSPREAD_AVAILABLE:
+    """Get the shared gspread client (None if not configured or backing off)."""
+    if not sheets_configured():
         return None
 
-    creds = get_credentials()
-    if creds:
-        return gspread.authorize(creds)
-    return None
+    with _handles_lock:
+        if _client_override is not None:
+            return _client_override if _token_ok() else None
+
+        client = _handles['client']
+        if client is None:
+            if time.time() < _handles['retry_at']:
+                return None
+            try:
+                client = gspread.authorize(_handles['credentials'])
+            except Exception as e:
+                report_failure(e)
+                return None
+            _handles['client'] = client
+            connection_stats['connects'] += 1
+        return client if _token_ok() else None
+
+
+def get_spreadsheet():
+    """Get the shared spreadsheet handle (None if unavailable)."""
+    with _handles_lock:
+        if _handles['spreadsheet'] is not None and _handles['client'] is not None:
+            return _handles['spreadsheet'] if _token_ok() else None
+
+        client = get_client()
+        if client is None:
+            return None
+        try:
+            spreadsheet = get_or_create_spreadsheet(client)
+        except Exception as e:
+            report_failure(e)
+            return None
+
+        _handles['client'] = client
+        _handles['spreadsheet'] = spreadsheet
+        _handles['failures'] = 0
+        return spreadsheet
+
+
+def get_worksheet(title=REVIEWS_SHEET):
+    """Get a shared worksheet handle (None if unavailable)."""
+    with _handles_lock:
+        sheet = _handles['worksheets'].get(title)
+        if sheet is not None:
+            return sheet if _token_ok() else None
+
+        spreadsheet = get_spreadsheet()
+        if spreadsheet is None:
+            return None
+        try:
+            sheet = spreadsheet.worksheet(title)
+        except Exception as e:
+            report_failure(e)
+            return None
+
+        _handles['worksheets'][title] = sheet
+        return sheet
 
 
 def get_or_create_spreadsheet(client, name="Mumbai Train Reviews"):
@@ -90,7 +250,7 @@ def get_or_create_spreadsheet(client, name="Mumbai Train Reviews"):
     try:
         # Try to open existing
         spreadsheet = client.open(name)
-    except gspread.SpreadsheetNotFound:
+    except SpreadsheetNotFound:
         # Create new
         spreadsheet = client.create(name)
         # Make it accessible
@@ -99,10 +259,7 @@ def get_or_create_spreadsheet(client, name="Mumbai Train Reviews"):
         # Create Reviews sheet with headers
         reviews_sheet = spreadsheet.sheet1
         reviews_sheet.update_title(REVIEWS_SHEET)
-        reviews_sheet.append_row([
-            'ID', 'Timestamp', 'Category', 'Subject',
-            'Rating', 'Comment', 'Username', 'Source'
-        ])
+        reviews_sheet.append_row(REVIEW_HEADERS)
 
         # Create Scraped Data sheet
         scraped_sheet = spreadsheet.add_worksheet(title=SCRAPED_SHEET, rows=1000, cols=10)
@@ -117,165 +274,300 @@ def get_or_create_spreadsheet(client, name="Mumbai Train Reviews"):
 # REVIEW OPERATIONS
 # ==================================================
 
-def add_review_to_sheets(category, subject, rating, comment, username="Anonymous"):
-    """Add a review to Google Sheets."""
-    client = get_client()
-    if not client:
-        print("Google Sheets not configured, using local storage")
-        return _add_review_local(category, subject, rating, comment, username)
+def _review_row(review):
+    """Review dict -> 'User Reviews' sheet row."""
+    return [
+        review['id'],
+        review['timestamp'],
+        review['category'],
+        review['subject'],
+        review['rating'],
+        review['comment'],
+        review['username'],
+        review['source']
+    ]
+
+
+def _write_reviews(reviews):
+    """Queue flusher: batch-append reviews to Google Sheets."""
+    if not sheets_configured():
+        # Already in the local store; stays unsynced until Sheets is set up
+        return
+
+    sheet = get_worksheet(REVIEWS_SHEET)
+    if sheet is None:
+        # Keep them queued until the connection is back
+        raise ConnectionError("Google Sheets unavailable")
 
     try:
-        spreadsheet = get_or_create_spreadsheet(client)
-        sheet = spreadsheet.worksheet(REVIEWS_SHEET)
-
-        # Get next ID
-        all_values = sheet.get_all_values()
-        next_id = len(all_values)
-
-        # Add row
-        row = [
-            next_id,
-            datetime.now().isoformat(),
-            category,
-            subject,
-            rating,
-            comment,
-            username,
-            'user'
-        ]
-        sheet.append_row(row)
-
-        # Clear cache
-        _sheet_cache.pop('reviews', None)
+        sheet.append_rows([_review_row(r) for r in reviews], value_input_option='USER_ENTERED')
+    except Exception:
+        report_failure()
+        raise
 
-        return {
-            'id': next_id,
-            'category': category,
-            'subject': subject,
-            'rating': rating,
-            'comment': comment,
-            'username': username,
-            'timestamp': row[1],
-            'source': 'user'
-        }
+    review_store.mark_synced([r['id'] for r in reviews])
 
-    except Exception as e:
-        print(f"Error adding to Google Sheets: {e}")
-        return _add_review_local(category, subject, rating, comment, username)
 
+_review_queue = None
 
-def get_all_reviews_from_sheets():
-    """Get all reviews from Google Sheets."""
-    # Check cache
-    cache_key = 'reviews'
-    now = datetime.now().timestamp()
 
-    if cache_key in _sheet_cache:
-        if now - _last_fetch.get(cache_key, 0) < CACHE_DURATION:
-            return _sheet_cache[cache_key]
+def get_review_queue():
+    """Process-wide write-behind queue (picks up reviews left from a crash)."""
+    global _review_queue
+    if _review_queue is None:
+        _review_queue = ReviewQueue(_write_reviews)
+        if sheets_configured():
+            # Reviews saved locally while Sheets wasn't set up
+            queued = {str(r['id']) for r in _review_queue.pending()}
+            for review in review_store.unsynced_reviews():
+                if review['id'] not in queued:
+                    _review_queue.enqueue(review)
+        if len(_review_queue):
+            _review_queue.start()
+    return _review_queue
+
+
+def add_review_to_sheets(category, subject, rating, comment, username="Anonymous"):
+    """
+    Add a review. It is saved to the local store and write queue and
+    returned at once; a background thread appends it to Google Sheets.
+    """
+    review = {
+        'id': new_review_id(),
+        'category': category,
+        'subject': subject,
+        'rating': rating,
+        'comment': comment,
+        'username': username,
+        'timestamp': datetime.now().isoformat(),
+        'source': 'user'
+    }
+    review_store.add_review(review)
+    return get_review_queue().enqueue(review)
 
-    client = get_client()
-    if not client:
-        return _get_reviews_local()
 
+def _record_to_review(record):
+    """'User Reviews' record (header -> value) -> review dict."""
+    rating = record.get('Rating')
     try:
-        spreadsheet = get_or_create_spreadsheet(client)
-        sheet = spreadsheet.worksheet(REVIEWS_SHEET)
-
-        # Get all data
-        records = sheet.get_all_records()
-
-        reviews = []
-        for record in records:
-            reviews.append({
-                'id': record.get('ID'),
-                'timestamp': record.get('Timestamp'),
-                'category': record.get('Category'),
-                'subject': record.get('Subject'),
-                'rating': int(record.get('Rating', 0)) if record.get('Rating') else 0,
-                'comment': record.get('Comment'),
-                'username': record.get('Username'),
-                'source': record.get('Source', 'user')
-            })
-
-        # Update cache
-        _sheet_cache[cache_key] = reviews
-        _last_fetch[cache_key] = now
-
-        return reviews
+        rating = int(float(rating)) if rating not in (None, '') else 0
+    except ValueError:
+        rating = 0
+    return {
+        'id': record.get('ID'),
+        'timestamp': record.get('Timestamp'),
+        'category': record.get('Category'),
+        'subject': record.get('Subject'),
+        'rating': rating,
+        'comment': record.get('Comment'),
+        'username': record.get('Username'),
+        'source': record.get('Source') or 'user'
+    }
 
-    except Exception as e:
-        print(f"Error reading from Google Sheets: {e}")
-        return _get_reviews_local()
+
+class ReviewSync:
+    """
+    Keeps a local copy of the 'User Reviews' sheet up to date.
+
+    Normally only rows appended since the last sync are fetched
+    (range A{n}:H), so each sync costs the same however large the
+    sheet grows. Every FULL_SYNC_INTERVAL the whole sheet is re-read
+    to pick up edited or deleted rows.
+    """
+
+    def __init__(self, full_interval=FULL_SYNC_INTERVAL):
+        self.full_interval = full_interval
+        self.reviews = []
+        self.headers = REVIEW_HEADERS
+        self.synced_rows = 0          # data rows (below the header) already read
+        self.last_full = 0.0
+        self._ids = set()
+        self.stats = {'full_syncs': 0, 'incremental_syncs': 0,
+                      'rows_fetched': 0, 'last_rows_fetched': 0, 'deleted': 0}
+
+    def sync(self):
+        """Bring the local copy up to date and return it (raises if unreachable)."""
+        sheet = get_worksheet(REVIEWS_SHEET)
+        if sheet is None:
+            raise ConnectionError("Google Sheets unavailable")
+
+        try:
+            if not self.last_full or time.time() - self.last_full >= self.full_interval:
+                self._full_sync(sheet)
+            else:
+                self._incremental_sync(sheet)
+        except Exception:
+            report_failure()
+            raise
+        return self.reviews
+
+    def _add_rows(self, rows, reviews, ids):
+        for row in rows:
+            if not any(row):
+                continue
+            review = _record_to_review(dict(zip(self.headers, row)))
+            # A batch may be appended twice if the app died mid-flush
+            key = str(review['id'])
+            if key in ids:
+                continue
+            ids.add(key)
+            reviews.append(review)
+
+    def _full_sync(self, sheet):
+        values = sheet.get_all_values()
+        self.headers = values[0] if values else REVIEW_HEADERS
+        rows = values[1:]
+
+        reviews, ids = [], set()
+        self._add_rows(rows, reviews, ids)
+        self.reviews, self._ids = reviews, ids
+        # Rows deleted from the sheet go from the store too
+        _, deleted = review_store.mirror_reviews(reviews)
+        self.stats['deleted'] += deleted
+        self.synced_rows = len(rows)
+        self.last_full = time.time()
+        self.stats['full_syncs'] += 1
+        self._count(len(rows))
+
+    def _incremental_sync(self, sheet):
+        # Row 1 is the header, so the first unseen row is synced_rows + 2
+        first_row = self.synced_rows + 2
+        last_col = chr(ord('A') + len(self.headers) - 1)
+        rows = sheet.get(f"A{first_row}:{last_col}")
+        if rows:
+            # Appended in place: copying would make every sync O(sheet size)
+            before = len(self.reviews)
+            self._add_rows(rows, self.reviews, self._ids)
+            review_store.add_reviews(self.reviews[before:], synced=True)
+            self.synced_rows += len(rows)
+        self.stats['incremental_syncs'] += 1
+        self._count(len(rows))
+
+    def _count(self, rows):
+        self.stats['rows_fetched'] += rows
+        self.stats['last_rows_fetched'] = rows
+
+
+_review_sync = ReviewSync()
+_review_cache = StaleWhileRevalidateCache(_review_sync.sync, max_age=CACHE_DURATION, name="reviews")
+
+
+def refresh_from_sheets():
+    """Pull new sheet rows into the local store (in the background once stale)."""
+    if sheets_configured():
+        _review_cache.get(block=False)
+
+
+def get_all_reviews_from_sheets(limit=None):
+    """
+    Get user reviews, newest first. They are read from the local store,
+    which Google Sheets is synced into in the background.
+    """
+    refresh_from_sheets()
+    return review_store.get_reviews(origin='user', limit=limit)
+
+
+def get_review_sentiment_counts():
+    """Sentiment counts of all user reviews (scored once, at ingest)."""
+    refresh_from_sheets()
+    return review_store.sentiment_totals(origin='user')
+
+
+def get_review_cache_metrics():
+    """Review snapshot age, refresh latency, hit counts and sync stats."""
+    return {**_review_cache.metrics(), 'sync': dict(_review_sync.stats),
+            'synced_rows': _review_sync.synced_rows}
+
+
+def _refresh_sources():
+    refresh_from_sheets()
+    review_store.sync_scraped_json()
+
+
+def _subject_station(subject):
+    """Station id if the subject is about exactly one station."""
+    sid = station_id(subject)
+    if sid:
+        return sid
+    found = find_stations(subject)
+    return found[0] if len(found) == 1 else None
 
 
 def get_reviews_for_subject(subject):
     """Get reviews for a specific station/route from all sources."""
-    # Get both user and scraped reviews
-    all_reviews = get_all_reviews_combined()
-    subject_lower = subject.lower()
+    _refresh_sources()
+    sid = _subject_station(subject)
+    if sid:
+        # Station postings (tagged at ingest from subject + comment)
+        return review_store.station_reviews(sid)
+    # Subject match, or the subject mentioned in the comment (full-text index)
+    return review_store.reviews_for_subject(subject)
 
-    matching = []
-    for review in all_reviews:
-        # Check subject field
-        if subject_lower in review.get('subject', '').lower():
-            matching.append(review)
-        # Also check comment content for scraped reviews
-        elif subject_lower in review.get('comment', '').lower():
-            matching.append(review)
 
-    return matching
+def _average(reviews):
+    ratings = [r['rating'] for r in reviews if r.get('rating')]
+    return sum(ratings) / len(ratings) if ratings else None
 
 
 def get_average_rating_sheets(subject):
     """Get average rating for a subject."""
-    reviews = get_reviews_for_subject(subject)
-    if not reviews:
-        return None
-
-    ratings = [r['rating'] for r in reviews if r.get('rating')]
-    if not ratings:
-        return None
-
-    return sum(ratings) / len(ratings)
+    sid = _subject_station(subject)
+    if sid:
+        _refresh_sources()
+        stats = review_store.station_summary(sid)
+        return stats['average'] if stats else None
+    return _average(get_reviews_for_subject(subject))
 
 
 def get_review_summary_sheets(subject):
     """Get formatted review summary for chatbot."""
-    reviews = get_reviews_for_subject(subject)
-
-    if not reviews:
-        return None
-
-    avg_rating = get_average_rating_sheets(subject)
-
-    # Count sources
-    user_reviews = [r for r in reviews if r.get('source') == 'user']
-    scraped_reviews = [r for r in reviews if r.get('source') != 'user']
+    _refresh_sources()
+    sid = _subject_station(subject)
+
+    if sid:
+        # Materialized summary: counts, histograms and top reviews in one read
+        stats = review_store.station_summary(sid)
+        if not stats:
+            return None
+        total = stats['review_count']
+        user_count = stats['user_count']
+        avg_rating = stats['average']
+        latest = (stats['top_user'] + stats['top_scraped'])[:3]
+    else:
+        reviews = review_store.reviews_for_subject(subject)
+        if not reviews:
+            return None
+        total = len(reviews)
+        user_count = sum(1 for r in reviews if r.get('source') == 'user')
+        avg_rating = _average(reviews)
+        # User reviews first, then newest
+        latest = sorted(reviews, key=lambda x: (
+            x.get('source') == 'user',
+            x.get('timestamp') or ''
+        ), reverse=True)[:3]
 
     summary = f"\n\n📊 **Reviews for {subject}**\n"
 
     if avg_rating:
         stars = "⭐" * round(avg_rating)
         summary += f"Average Rating: {stars} ({avg_rating:.1f}/5)\n"
-        summary += f"_{len(user_reviews)} user reviews, {len(scraped_reviews)} from social media_\n\n"
-
-    # Show latest 3 reviews, prioritizing user reviews
-    sorted_reviews = sorted(reviews, key=lambda x: (
-        0 if x.get('source') == 'user' else 1,  # User reviews first
-        x.get('timestamp', '')  # Then by time
-    ), reverse=True)[:3]
-
-    for r in sorted_reviews:
+        summary += f"_{user_count} user reviews, {total - user_count} from social media_\n"
+    if sid and any(stats['sentiment'].values()):
+        moods = stats['sentiment']
+        summary += (f"_😊 {moods['Positive']} positive · 😐 {moods['Neutral']} neutral"
+                    f" · 😞 {moods['Negative']} negative_\n")
+    summary += "\n"
+
+    for r in latest:
         rating_str = f"{'⭐' * r['rating']}" if r.get('rating') else ""
-        comment = r.get('comment', 'No comment')[:100]
+        comment = (r.get('comment') or 'No comment')[:100]
         source_tag = ""
         if r.get('source') and r.get('source') != 'user':
             source_tag = f" [{r.get('source', '').split('/')[0]}]"
         summary += f"• {rating_str} _{comment}_{source_tag}\n"
 
-    if len(reviews) > 3:
-        summary += f"\n_...and {len(reviews) - 3} more reviews_"
+    if total > 3:
+        summary += f"\n_...and {total - 3} more reviews_"
 
     return summary
 
@@ -285,72 +577,16 @@ def get_review_summary_sheets(subject):
 # ==================================================
 
 def get_scraped_reviews():
-    """Load scraped reviews from JSON file."""
-    if os.path.exists(SCRAPED_REVIEWS_FILE):
-        try:
-            with open(SCRAPED_REVIEWS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('reviews', [])
-        except Exception as e:
-            print(f"Error loading scraped reviews: {e}")
-    return []
+    """Scraped reviews (re-imported from JSON only when the file changes)."""
+    review_store.sync_scraped_json()
+    return review_store.get_reviews(origin='scraped')
 
 
 def get_all_reviews_combined():
     """Get all reviews from Google Sheets + scraped data."""
-    user_reviews = get_all_reviews_from_sheets()
-    scraped_reviews = get_scraped_reviews()
-
-    # Combine both sources
-    all_reviews = user_reviews + scraped_reviews
-    return all_reviews
-
-
-# ==================================================
-# LOCAL FALLBACK (when Google Sheets not available)
-# ==================================================
-
-def _get_local_file():
-    return os.path.join(os.path.dirname(__file__), 'user_reviews.json')
-
-
-def _get_reviews_local():
-    """Fallback: Load from local JSON."""
-    filepath = _get_local_file()
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get('reviews', [])
-    return []
-
-
-def _add_review_local(category, subject, rating, comment, username):
-    """Fallback: Add to local JSON."""
-    filepath = _get_local_file()
-
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    else:
-        data = {'reviews': []}
-
-    review = {
-        'id': len(data['reviews']) + 1,
-        'category': category,
-        'subject': subject,
-        'rating': rating,
-        'comment': comment,
-        'username': username,
-        'timestamp': datetime.now().isoformat(),
-        'source': 'user'
-    }
-
-    data['reviews'].append(review)
-
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-    return review
+    refresh_from_sheets()
+    review_store.sync_scraped_json()
+    return review_store.get_reviews()
 
 
 # ==================================================
@@ -358,26 +594,24 @@ def _add_review_local(category, subject, rating, comment, username):
 # ==================================================
 
 def check_sheets_connection():
-    """Check if Google Sheets is properly configured."""
-    client = get_client()
-    if not client:
+    """Check if Google Sheets is properly configured (uses cached handles)."""
+    if not sheets_configured():
         return {
             'connected': False,
             'error': 'No credentials found. Check credentials.json or Streamlit secrets.'
         }
 
-    try:
-        spreadsheet = get_or_create_spreadsheet(client)
-        return {
-            'connected': True,
-            'spreadsheet_name': spreadsheet.title,
-            'spreadsheet_url': spreadsheet.url
-        }
-    except Exception as e:
+    spreadsheet = get_spreadsheet()
+    if spreadsheet is None:
         return {
             'connected': False,
-            'error': str(e)
+            'error': 'Google Sheets unreachable, retrying shortly.'
         }
+    return {
+        'connected': True,
+        'spreadsheet_name': spreadsheet.title,
+        'spreadsheet_url': spreadsheet.url
+    }
 
 
 # ==================================================
@@ -0,0 +1,256 @@
+# ==================================================
+# Mumbai Local Train - On-Disk HTTP Cache
+# ==================================================
+# Conditional GETs for the scrapers so unchanged pages
+# are not downloaded (or parsed) again:
+# - ETag / Last-Modified sent back as If-None-Match /
+#   If-Modified-Since; a 304 is answered from disk
+# - bodies stored gzip-compressed under their SHA-256
+#   (identical pages share one file)
+# - parse results cached per body, so an unchanged
+#   page skips parsing too
+#
+#   response = cached_get(url, headers=HEADERS, timeout=15)
+#   response.from_cache / response.unchanged
+# ==================================================
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+BASE_DIR = os.path.dirname(__file__)
+CACHE_DIR = os.path.join(BASE_DIR, ".http_cache")
+
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class HttpCache:
+    """
+    Response cache on disk:
+        entries/<sha1(url)>.json      validators + body hash per URL
+        bodies/<sha256>.gz            compressed response bodies
+        parsed/<sha256>.<key>.json.gz parse results per body
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        for sub in ("entries", "bodies", "parsed"):
+            os.makedirs(os.path.join(cache_dir, sub), exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {
+            "pages": 0,             # 200 / 304 responses
+            "not_modified": 0,      # 304s answered from disk
+            "unchanged": 0,         # 304s + 200s with the same body as last time
+            "parses_skipped": 0,
+            "bytes_downloaded": 0,
+            "bytes_saved": 0,       # body bytes a 304 didn't have to send
+        }
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    # ---------------- STORAGE ----------------
+
+    def _entry_path(self, url):
+        return os.path.join(self.cache_dir, "entries", hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+    def _body_path(self, body_hash):
+        return os.path.join(self.cache_dir, "bodies", body_hash + ".gz")
+
+    def _parsed_path(self, body_hash, key):
+        return os.path.join(self.cache_dir, "parsed", f"{body_hash}.{key}.json.gz")
+
+    def lookup(self, url):
+        """Cached entry for url (validators, headers, body hash) or None."""
+        try:
+            with open(self._entry_path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if os.path.exists(self._body_path(entry["body_hash"])) else None
+
+    def body(self, entry):
+        with gzip.open(self._body_path(entry["body_hash"]), "rb") as f:
+            return f.read()
+
+    def store(self, url, response):
+        """Save a 200 response; returns its entry."""
+        body_hash = hashlib.sha256(response.content).hexdigest()
+        body_path = self._body_path(body_hash)
+        if not os.path.exists(body_path):
+            _write_atomic(body_path, gzip.compress(response.content))
+        entry = {
+            "url": url,
+            "body_hash": body_hash,
+            "size": len(response.content),
+            "headers": {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers},
+            "fetched_at": time.time(),
+        }
+        _write_atomic(self._entry_path(url), json.dumps(entry).encode("utf-8"))
+        return entry
+
+    # ---------------- REQUESTS ----------------
+
+    def get(self, session, url, **kwargs):
+        """
+        Conditional GET through session. A 304 comes back as the cached
+        200 response. Every response gets .from_cache, .unchanged and
+        .body_hash.
+        """
+        entry = self.lookup(url)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry:
+            validators = entry["headers"]
+            if "ETag" in validators:
+                headers["If-None-Match"] = validators["ETag"]
+            if "Last-Modified" in validators:
+                headers["If-Modified-Since"] = validators["Last-Modified"]
+
+        response = session.get(url, headers=headers, **kwargs)
+        self._count("bytes_downloaded", len(response.content))
+        if response.status_code in (200, 304):
+            self._count("pages")
+
+        if response.status_code == 304 and entry:
+            self._count("not_modified")
+            self._count("unchanged")
+            self._count("bytes_saved", entry["size"])
+            return self._from_entry(entry, response)
+
+        response.from_cache = False
+        response.unchanged = False
+        response.body_hash = None
+        if response.status_code == 200:
+            stored = self.store(url, response)
+            response.body_hash = stored["body_hash"]
+            # No validators (or they changed) but the same bytes as last time
+            response.unchanged = bool(entry) and entry["body_hash"] == stored["body_hash"]
+            if response.unchanged:
+                self._count("unchanged")
+        return response
+
+    def _from_entry(self, entry, not_modified):
+        cached = requests.Response()
+        cached.status_code = 200
+        cached._content = self.body(entry)
+        cached.headers = CaseInsensitiveDict(entry["headers"])
+        cached.encoding = get_encoding_from_headers(cached.headers)
+        cached.url = entry["url"]
+        cached.request = not_modified.request
+        cached.elapsed = not_modified.elapsed
+        cached.from_cache = True
+        cached.unchanged = True
+        cached.body_hash = entry["body_hash"]
+        return cached
+
+    # ---------------- PARSE RESULTS ----------------
+
+    def parsed(self, response, parse, key):
+        """
+        parse(response), reusing the stored result when the body is
+        unchanged. key names the parser version; results must be JSON.
+        """
+        if not response.body_hash:
+            return parse(response)
+        path = self._parsed_path(response.body_hash, key)
+        if response.unchanged and os.path.exists(path):
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    result = json.load(f)
+                self._count("parses_skipped")
+                return result
+            except (OSError, ValueError):
+                pass
+        result = parse(response)
+        _write_atomic(path, gzip.compress(json.dumps(result).encode("utf-8")))
+        return result
+
+    def prune(self):
+        """Delete bodies and parse results no URL entry points to any more."""
+        entries_dir = os.path.join(self.cache_dir, "entries")
+        live = set()
+        for name in os.listdir(entries_dir):
+            try:
+                with open(os.path.join(entries_dir, name), "r", encoding="utf-8") as f:
+                    live.add(json.load(f)["body_hash"])
+            except (OSError, ValueError, KeyError):
+                continue
+        removed = 0
+        for sub in ("bodies", "parsed"):
+            folder = os.path.join(self.cache_dir, sub)
+            for name in os.listdir(folder):
+                if name.split(".", 1)[0] not in live:
+                    os.remove(os.path.join(folder, name))
+                    removed += 1
+        return removed
+
+    def report(self):
+        """One-line summary for scraper logs."""
+        s = self.stats
+        return (f"{s['pages']} pages, {s['unchanged']} unchanged "
+                f"({s['not_modified']} not modified), {s['parses_skipped']} parses skipped, "
+                f"{s['bytes_downloaded'] / 1024:.0f} KB downloaded, {s['bytes_saved'] / 1024:.0f} KB saved")
+
+
+# ==================================================
+# DROP-IN GET
+# ==================================================
+# For the sequential scrapers: same call shape as
+# requests.get, over one shared keep-alive session.
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache():
+    with _shared_lock:
+        if "cache" not in _shared:
+            _shared["cache"] = HttpCache()
+            _shared["session"] = requests.Session()
+        return _shared["cache"], _shared["session"]
+
+
+def cached_get(url, **kwargs):
+    """requests.get() with the shared on-disk cache."""
+    cache, session = get_shared_cache()
+    return cache.get(session, url, **kwargs)
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    import tempfile
+
+    from fake_railway_site import FakeRailwaySite
+
+    cache = HttpCache(tempfile.mkdtemp())
+    session = requests.Session()
+    with FakeRailwaySite() as site:
+        urls = [f"{site.url}/timetable.php?sel_route=central&sfrom=Thane&sto={dst}"
+                for dst in ("Dadar", "Kurla", "Kalyan", "Dombivli")]
+        count_rows = lambda r: r.text.count("<tr>")
+
+        for run in ("first run", "nightly re-run", "after a timetable change"):
+            if run == "after a timetable change":
+                site.revision += 1
+            for url in urls:
+                cache.parsed(cache.get(session, url, timeout=10), count_rows, "rows-v1")
+            print(f"{run:>24}: {cache.report()}")
+            for key in cache.stats:
+                cache.stats[key] = 0
@@ -0,0 +1,129 @@
+# ==================================================
+# Mumbai Local Train - Keyword Automaton
+# ==================================================
+# Aho-Corasick matcher for finding many keywords
+# (areas, localities, stations) in one pass over a query
+# ==================================================
+
+
+class KeywordAutomaton:
+    """
+    Multi-keyword matcher built once and reused for every query.
+
+    Matching cost depends on the query length and number of hits,
+    not on how many keywords were added, so it stays flat as the
+    locality list grows.
+
+    Usage:
+        automaton = KeywordAutomaton()
+        automaton.add("powai", "powai")
+        automaton.add("iit bombay", "powai")
+        automaton.build()
+        automaton.find("powai to churchgate")  # [(0, 5, "powai")]
+    """
+
+    def __init__(self, word_boundaries=False):
+        self.word_boundaries = word_boundaries
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._built = False
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self, keyword, value):
+        """Add a keyword (matched case-insensitively) mapping to value."""
+        keyword = keyword.lower().strip()
+        if not keyword:
+            return
+
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+
+        self._output[node].append((len(keyword), value))
+        self._count += 1
+        self._built = False
+
+    def build(self):
+        """Compute failure links (breadth-first over the trie)."""
+        queue = []
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Inherit matches that end here via the failure link
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+        self._built = True
+        return self
+
+    def find_all(self, text):
+        """
+        Return every keyword occurrence as (start, end, value),
+        ordered by start position. Overlapping matches are kept.
+        """
+        if not self._built:
+            self.build()
+
+        text = text.lower()
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        node = 0
+
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in output[node]:
+                start = i + 1 - length
+                if self.word_boundaries and not _on_word_boundary(text, start, i + 1):
+                    continue
+                matches.append((start, i + 1, value))
+
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        return matches
+
+    def find(self, text):
+        """
+        Return non-overlapping matches, preferring the leftmost and
+        then the longest keyword (so "hiranandani thane" beats
+        "hiranandani").
+        """
+        result = []
+        last_end = -1
+        for start, end, value in self.find_all(text):
+            if start < last_end:
+                continue
+            result.append((start, end, value))
+            last_end = end
+        return result
+
+
+def _on_word_boundary(text, start, end):
+    """Check the match is not part of a longer word."""
+    if start > 0 and text[start - 1].isalnum():
+        return False
+    if end < len(text) and text[end].isalnum():
+        return False
+    return True
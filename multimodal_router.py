@@ -0,0 +1,456 @@
+# ==================================================
+# Mumbai Local Train - Multimodal Door-to-Door Router
+# ==================================================
+# BEST bus first/last mile + Metro Line 1 + local trains
+# Time-dependent Dijkstra over a station/line graph,
+# boarding waits taken from the real timetable
+# ==================================================
+
+import bisect
+import heapq
+import os
+import re
+import time
+
+from station_registry import (
+    STATIONS, LINE_ROUTES, LINE_NAMES, METRO_LINKS, station_id
+)
+from bus_connections import FIRST_LAST_MILE, find_area, parse_travel_minutes
+from station_info import METRO_LINE_1
+from timetable_build import validate
+from timetable_refresh import read_timetable
+from transfers import transfer_time
+
+BASE_DIR = os.path.dirname(__file__)
+TIMETABLE_FILES = [
+    os.path.join(BASE_DIR, "mumbai_local_trains.csv"),
+    os.path.join(BASE_DIR, "mumbai_ac_trains.csv"),
+]
+
+# ---------------- MODEL CONSTANTS ----------------
+
+RAIL_SPEED_KMPH = 32         # slow local incl. halts
+METRO_SPEED_KMPH = 33        # Versova-Ghatkopar 11.4 km in ~21 min
+TRANSFER_MIN = 6             # change of line at the same station
+METRO_WALK_MIN = 5           # metro <-> railway station walk
+DEFAULT_BUS_HEADWAY_MIN = 15
+MAX_RAIL_WAIT_MIN = 30       # cap when the timetable has no next train
+DEFAULT_BUDGET_MS = 50
+
+
+def _parse_minutes(text):
+    """Parse "4:15 am" / "04:29 PM" / "16:05" into minutes since midnight."""
+    match = re.match(r"\s*(\d{1,2})[:.](\d{2})\s*([ap])?", (text or "").lower())
+    if not match:
+        return None
+    hour, minute, period = int(match.group(1)), int(match.group(2)), match.group(3)
+    if period == "p" and hour != 12:
+        hour += 12
+    elif period == "a" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def _range_mid(text, default):
+    numbers = [int(n) for n in re.findall(r"\d+", text or "")]
+    return sum(numbers[:2]) / len(numbers[:2]) if numbers else default
+
+
+METRO_HEADWAY_MIN = _range_mid(METRO_LINE_1["frequency"], 6)
+_metro_hours = [_parse_minutes(t) for t in METRO_LINE_1["timings"].split("-")]
+METRO_OPEN_MIN = _metro_hours[0] if _metro_hours[0] is not None else 330
+METRO_CLOSE_MIN = _metro_hours[1] if len(_metro_hours) > 1 and _metro_hours[1] is not None else 1380
+
+
+# ==================================================
+# GRAPH
+# ==================================================
+# Node kinds:
+#   ("st", sid)                     - at a station, not on a train
+#   ("ride", sid, line, route, dir) - on a train/metro at sid
+# Ride edges move along a route; board/alight edges join the two.
+
+class MultimodalGraph:
+    """Station/line graph plus timetable-derived departures."""
+
+    def __init__(self, timetable_files=None):
+        self.ride_edges = {}        # ride node -> [(next ride node, minutes)]
+        self.routes_at = {}         # sid -> [(line, route_idx, dir)]
+        self.route_km = {}          # (line, route_idx) -> {sid: km}
+        self.departures = {}        # (line, route_idx, dir, sid) -> sorted minutes
+        self.hourly_trains = {}     # (line, hour) -> departures in that hour
+        self._build_topology()
+        self._load_timetable(timetable_files or TIMETABLE_FILES)
+
+    def _build_topology(self):
+        for line, routes in LINE_ROUTES.items():
+            speed = METRO_SPEED_KMPH if line == "M1" else RAIL_SPEED_KMPH
+            for r, route in enumerate(routes):
+                self.route_km[(line, r)] = dict(route)
+                for d in (1, -1):
+                    stops = route if d == 1 else list(reversed(route))
+                    for (a, km_a), (b, km_b) in zip(stops, stops[1:]):
+                        minutes = abs(km_b - km_a) / speed * 60
+                        self.ride_edges.setdefault(("ride", a, line, r, d), []).append(
+                            (("ride", b, line, r, d), minutes)
+                        )
+                    for sid, _ in stops[:-1]:
+                        self.routes_at.setdefault(sid, []).append((line, r, d))
+
+    def _load_timetable(self, files):
+        """Index departures by boarding station and direction of travel."""
+        frames = {os.path.basename(p): read_timetable(p)[0] for p in files if os.path.exists(p)}
+        if frames:
+            trains, _ = validate(frames)
+            for line, minutes, src, dst in zip(trains["line"], trains["minute"],
+                                               trains["source_id"], trains["dest_id"]):
+                self._add_departure(line, int(minutes), src, dst if isinstance(dst, str) else None)
+        for times in self.departures.values():
+            times.sort()
+
+    def _add_departure(self, line, minutes, src, dst):
+        """One train; dst is None when the timetable gave no destination."""
+        if line not in LINE_ROUTES:
+            return
+
+        hour_key = (line, minutes // 60)
+        self.hourly_trains[hour_key] = self.hourly_trains.get(hour_key, 0) + 1
+
+        routes = [r for r in range(len(LINE_ROUTES[line])) if src in self.route_km[(line, r)]]
+        for r in routes:
+            km = self.route_km[(line, r)]
+            if dst is None:
+                # Only a train starting at a terminus has a known direction
+                if len(routes) > 1 or src not in (LINE_ROUTES[line][r][0][0], LINE_ROUTES[line][r][-1][0]):
+                    continue
+                d = 1 if km[src] == LINE_ROUTES[line][r][0][1] else -1
+            elif dst in km and km[dst] != km[src]:
+                d = 1 if km[dst] > km[src] else -1
+            else:
+                continue
+            self.departures.setdefault((line, r, d, src), []).append(minutes)
+
+    def rail_wait(self, sid, line, r, d, now):
+        """Minutes until the next train at sid in this direction."""
+        if line == "M1":
+            if now < METRO_OPEN_MIN or now > METRO_CLOSE_MIN:
+                return None
+            return METRO_HEADWAY_MIN / 2
+
+        times = self.departures.get((line, r, d, sid))
+        if times:
+            i = bisect.bisect_left(times, now)
+            if i < len(times):
+                return min(times[i] - now, MAX_RAIL_WAIT_MIN)
+
+        # Not a timetabled origin: use the line's headway that hour
+        per_hour = self.hourly_trains.get((line, int(now // 60) % 24), 0)
+        if per_hour == 0:
+            return MAX_RAIL_WAIT_MIN
+        # Departures are split across both directions and branches
+        share = per_hour / (2 * len(LINE_ROUTES[line]))
+        return min(60 / max(share, 1) / 2, MAX_RAIL_WAIT_MIN)
+
+    def transfer_minutes(self, sid, from_line, to_line, now):
+        """Time to change between two lines at a station."""
+        minutes = transfer_time(sid, from_line, to_line, now)
+        return TRANSFER_MIN if minutes is None else minutes
+
+
+# ==================================================
+# SEARCH
+# ==================================================
+
+def _bus_wait(conn):
+    """Half the bus headway, from notes like "runs every 10-15 min"."""
+    match = re.search(r"every\s+([\d\-\s]+)\s*min", conn.get("notes", ""))
+    headway = _range_mid(match.group(1), DEFAULT_BUS_HEADWAY_MIN) if match else DEFAULT_BUS_HEADWAY_MIN
+    return headway / 2 if conn.get("buses") else 0
+
+
+def _access_options(place):
+    """
+    Resolve a place to ways of reaching the network. A place is an
+    area dict from FIRST_LAST_MILE, an area key, or free text.
+    Returns (label, [(sid, minutes, conn)]) or (None, []) if unknown.
+    """
+    if not place:
+        return None, []
+
+    area = place if isinstance(place, dict) else FIRST_LAST_MILE.get(place)
+    if area is None:
+        _, area = find_area(place)
+    if area:
+        options = []
+        for conn in area["nearest_stations"]:
+            sid = station_id(conn["station"])
+            if sid:
+                minutes = parse_travel_minutes(conn["travel_time"]) + _bus_wait(conn)
+                options.append((sid, minutes, conn))
+        return area["area_name"], options
+
+    sid = station_id(place)
+    if sid:
+        return STATIONS[sid]["name"], [(sid, 0.0, None)]
+    return None, []
+
+
+def _dijkstra(graph, origin_sid, depart, targets, deadline):
+    """
+    Time-dependent shortest paths from a station.
+    Returns ({node: arrival}, {node: (prev node, edge kind)}, timed_out).
+    """
+    start = ("st", origin_sid)
+    best = {start: depart}
+    prev = {start: (None, "start")}
+    heap = [(depart, 0, start)]
+    counter = 1
+    remaining = set(targets)
+    pops = 0
+
+    while heap:
+        now, _, node = heapq.heappop(heap)
+        if now > best.get(node, float("inf")):
+            continue
+
+        pops += 1
+        if pops % 64 == 0 and time.perf_counter() > deadline:
+            return best, prev, True
+
+        if node[0] == "st":
+            sid = node[1]
+            remaining.discard(sid)
+            if not remaining:
+                break
+            came_from = prev[node][0]
+            arrived_line = came_from[2] if came_from and came_from[0] == "ride" else None
+            edges = []
+            for line, r, d in graph.routes_at.get(sid, []):
+                wait = graph.rail_wait(sid, line, r, d, now)
+                if wait is None:
+                    continue
+                if arrived_line:
+                    wait += graph.transfer_minutes(sid, arrived_line, line, now)
+                edges.append((("ride", sid, line, r, d), wait, "board"))
+            if sid in METRO_LINKS:
+                edges.append((("st", METRO_LINKS[sid]), METRO_WALK_MIN, "walk"))
+            for metro_sid, rail_sid in METRO_LINKS.items():
+                if rail_sid == sid:
+                    edges.append((("st", metro_sid), METRO_WALK_MIN, "walk"))
+        else:
+            edges = [(nxt, minutes, "ride") for nxt, minutes in graph.ride_edges.get(node, [])]
+            edges.append((("st", node[1]), 0, "alight"))
+
+        for nxt, cost, kind in edges:
+            arrival = now + cost
+            if arrival < best.get(nxt, float("inf")):
+                best[nxt] = arrival
+                prev[nxt] = (node, kind)
+                heapq.heappush(heap, (arrival, counter, nxt))
+                counter += 1
+
+    return best, prev, False
+
+
+def _rail_legs(prev, target):
+    """Rebuild train/metro legs from the predecessor map."""
+    path = []
+    node = ("st", target)
+    while node is not None:
+        parent, kind = prev[node]
+        path.append((node, kind))
+        node = parent
+    path.reverse()
+
+    legs = []
+    for node, kind in path:
+        if kind == "board":
+            line = node[2]
+            legs.append({
+                "mode": "metro" if line == "M1" else "train",
+                "line": line,
+                "from": node[1],
+                "to": node[1],
+            })
+        elif kind == "ride":
+            legs[-1]["to"] = node[1]
+        elif kind == "walk":
+            legs.append({"mode": "walk", "line": None, "from": None, "to": node[1]})
+    return legs
+
+
+def plan_journey(from_place, to_place, depart_minutes=None, k=3, budget_ms=DEFAULT_BUDGET_MS):
+    """
+    Door-to-door itineraries between two places (areas or stations),
+    ranked by total time. Stops searching when budget_ms runs out and
+    returns whatever was found.
+
+    Returns dict with "itineraries" (best first) and "timed_out".
+    """
+    deadline = time.perf_counter() + budget_ms / 1000.0
+    if depart_minutes is None:
+        from train_chatbot_enhanced import get_ist_time
+        now = get_ist_time()
+        depart_minutes = now.hour * 60 + now.minute
+
+    from_label, origins = _access_options(from_place)
+    to_label, destinations = _access_options(to_place)
+    result = {"from": from_label, "to": to_label, "itineraries": [], "timed_out": False}
+    if not origins or not destinations:
+        return result
+
+    graph = get_graph()
+    targets = {sid for sid, _, _ in destinations}
+    itineraries = []
+
+    for origin_sid, access_min, access_conn in sorted(origins, key=lambda o: o[1]):
+        if time.perf_counter() > deadline:
+            result["timed_out"] = True
+            break
+
+        board_time = depart_minutes + access_min
+        arrivals, prev, timed_out = _dijkstra(graph, origin_sid, board_time, targets, deadline)
+        result["timed_out"] = result["timed_out"] or timed_out
+
+        for dest_sid, egress_min, egress_conn in destinations:
+            arrival = arrivals.get(("st", dest_sid))
+            if arrival is None:
+                continue
+            total = arrival + egress_min - depart_minutes
+            itineraries.append({
+                "total_min": round(total),
+                "depart": depart_minutes,
+                "arrive": round(arrival + egress_min),
+                "first_mile": access_conn,
+                "last_mile": egress_conn,
+                "legs": _rail_legs(prev, dest_sid) if origin_sid != dest_sid else [],
+                "access_station": origin_sid,
+                "egress_station": dest_sid,
+            })
+
+    itineraries.sort(key=lambda it: it["total_min"])
+    seen = set()
+    for it in itineraries:
+        key = (it["access_station"], it["egress_station"])
+        if key not in seen:
+            seen.add(key)
+            result["itineraries"].append(it)
+        if len(result["itineraries"]) >= k:
+            break
+    return result
+
+
+# Built on first use and shared by every query
+_graph = None
+
+
+def get_graph():
+    global _graph
+    if _graph is None:
+        _graph = MultimodalGraph()
+    return _graph
+
+
+# ==================================================
+# FORMATTING
+# ==================================================
+
+def _clock(minutes):
+    minutes = int(round(minutes)) % (24 * 60)
+    hour, minute = divmod(minutes, 60)
+    period = "AM" if hour < 12 else "PM"
+    return f"{hour % 12 or 12}:{minute:02d} {period}"
+
+
+def format_itinerary(itinerary, from_label, to_label):
+    """Format one itinerary as numbered steps for the chatbot."""
+    response = ""
+    step = 1
+
+    conn = itinerary["first_mile"]
+    if conn and conn.get("buses"):
+        response += f"**Step {step}: Bus from {from_label}**\n"
+        response += f"Take Bus **{' or '.join(conn['buses'])}** to **{conn['station']}** Station\n"
+        response += f"Time: {conn['travel_time']}\n"
+        if conn.get("notes"):
+            response += f"_{conn['notes']}_\n"
+        response += "\n"
+        step += 1
+
+    for leg in itinerary["legs"]:
+        if leg["mode"] == "walk":
+            continue
+        src = STATIONS[leg["from"]]["name"]
+        dst = STATIONS[leg["to"]]["name"]
+        label = "Metro" if leg["mode"] == "metro" else "Train"
+        response += f"**Step {step}: {label}**\n"
+        response += f"**{src}** -> **{dst}** ({LINE_NAMES[leg['line']]})\n\n"
+        step += 1
+
+    conn = itinerary["last_mile"]
+    if conn and conn.get("buses"):
+        response += f"**Step {step}: Bus to {to_label}**\n"
+        response += f"From **{conn['station']}** take Bus **{' or '.join(conn['buses'])}**\n"
+        response += f"Time: {conn['travel_time']}\n"
+        if conn.get("notes"):
+            response += f"_{conn['notes']}_\n"
+        response += "\n"
+
+    response += (
+        f"_Total: ~{itinerary['total_min']} min "
+        f"(leave {_clock(itinerary['depart'])}, arrive ~{_clock(itinerary['arrive'])})_\n"
+    )
+    return response
+
+
+def format_journey(result):
+    """Format the best itinerary plus one-line alternatives."""
+    itineraries = result["itineraries"]
+    if not itineraries:
+        return None
+
+    response = format_itinerary(itineraries[0], result["from"], result["to"])
+    if len(itineraries) > 1:
+        response += "\n**Alternatives**\n"
+        for it in itineraries[1:]:
+            via = STATIONS[it["access_station"]]["name"]
+            to = STATIONS[it["egress_station"]]["name"]
+            response += f"- Via {via} -> {to}: ~{it['total_min']} min\n"
+    return response
+
+
+# ==================================================
+# BENCHMARK
+# ==================================================
+if __name__ == "__main__":
+    print("Multimodal Router - area x area benchmark")
+    print("=" * 50)
+
+    build_start = time.perf_counter()
+    get_graph()
+    print(f"Graph build: {(time.perf_counter() - build_start) * 1000:.1f} ms")
+
+    areas = list(FIRST_LAST_MILE.keys())
+    timings = []
+    found = 0
+    timed_out = 0
+    for a in areas:
+        for b in areas:
+            if a == b:
+                continue
+            start = time.perf_counter()
+            res = plan_journey(a, b, depart_minutes=9 * 60)
+            timings.append((time.perf_counter() - start) * 1000)
+            found += bool(res["itineraries"])
+            timed_out += res["timed_out"]
+
+    timings.sort()
+    print(f"Pairs: {len(timings)}, with itinerary: {found}, timed out: {timed_out}")
+    print(f"Mean: {sum(timings) / len(timings):.2f} ms, "
+          f"p95: {timings[int(len(timings) * 0.95)]:.2f} ms, max: {timings[-1]:.2f} ms")
+
+    demo = plan_journey("powai", "nariman point", depart_minutes=9 * 60)
+    print("\nPowai -> Nariman Point at 9:00 AM\n")
+    print(format_journey(demo))
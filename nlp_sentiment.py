@@ -1,91 +1,230 @@
 # ==================================================
 # Sentiment Analysis for Mumbai Local Train Reviews
 # ==================================================
-# Uses VADER (Valence Aware Dictionary and sEntiment Reasoner)
-# Lightweight, no model downloads, works on social media text
+# Two tiers, one result schema (label, compound score,
+# star rating, emoji, color):
+# - VADER (Valence Aware Dictionary and sEntiment Reasoner)
+#   for display: handles negation, boosters, caps, "but"
+# - analyze_fast(): compiled lexicon lookup for bulk
+#   scraping, same lexicon and normalisation as VADER
+# Both share a commuter lexicon ("crowded", "late", ...).
+# VADER results are memoized per text; review_store keeps
+# them in a persistent cache keyed by content_hash().
 # ==================================================
 
+import hashlib
+import math
+import re
+from functools import lru_cache
+
 try:
     from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
     VADER_AVAILABLE = True
 except ImportError:
     VADER_AVAILABLE = False
 
+# Part of content_hash(): bump when the scoring changes so cached
+# results computed by an older analyzer are not reused
+SENTIMENT_MODEL = "vader-commuter-1"
+MEMO_SIZE = 4096             # texts remembered in-process
+
+LABEL_THRESHOLD = 0.05       # |compound| below this is Neutral
+
+# Compound score -> stars, checked in order
+STAR_THRESHOLDS = [
+    (0.5, 5),
+    (LABEL_THRESHOLD, 4),
+    (-LABEL_THRESHOLD, 3),
+    (-0.5, 2),
+]
+
+# ---------------- LEXICON ----------------
+# Valences on VADER's -4..+4 scale. Commuter words VADER doesn't know:
+COMMUTER_LEXICON = {
+    "crowded": -1.5, "overcrowded": -2.0, "packed": -1.0, "late": -1.2,
+    "canceled": -1.0, "slow": -1.0, "breakdown": -2.0, "issue": -1.0,
+    "filthy": -2.4, "smelly": -1.5,
+    "fast": 1.0, "convenient": 1.5, "punctual": 1.8, "smooth": 1.5, "spacious": 1.5,
+}
+
+# Used by the fast tier when vaderSentiment is not installed
+BASIC_LEXICON = {
+    "great": 3.1, "good": 1.9, "excellent": 2.7, "best": 3.2, "amazing": 2.8,
+    "love": 3.2, "helpful": 1.8, "clean": 1.7, "comfortable": 2.3, "nice": 1.8,
+    "perfect": 2.7, "awesome": 3.1, "okay": 0.9,
+    "bad": -2.5, "worst": -3.1, "terrible": -2.1, "hate": -2.7, "dirty": -1.9,
+    "delay": -1.3, "delayed": -0.9, "cancelled": -1.0, "poor": -2.1,
+    "horrible": -2.5, "problem": -1.7, "accident": -2.1, "disruption": -1.5,
+    "stuck": -1.0, "stampede": -1.8,
+}
+
+NEGATIONS = {"not", "no", "never", "none", "nothing", "nobody", "neither", "nor",
+             "without", "cannot", "cant", "dont", "doesnt", "didnt", "isnt", "wasnt",
+             "arent", "werent", "wont", "wouldnt", "shouldnt", "couldnt", "aint"}
+NEGATION_SCALAR = -0.74      # VADER's N_SCALAR
+NEGATION_WINDOW = 3          # words after a negation that it flips
+NORMALIZE_ALPHA = 15         # VADER's compound normalisation
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
 _analyzer = None
+_fast_lexicon = None
 
 
 def _get_analyzer():
     global _analyzer
     if _analyzer is None and VADER_AVAILABLE:
         _analyzer = SentimentIntensityAnalyzer()
+        for word, valence in COMMUTER_LEXICON.items():
+            _analyzer.lexicon.setdefault(word, valence)
     return _analyzer
 
 
-def analyze_sentiment(text):
-    """
-    Analyze sentiment of a single review text.
-    Returns dict with label, score, emoji, color.
-    """
-    analyzer = _get_analyzer()
-    if analyzer is None or not text or not text.strip():
-        return {
-            "label": "Neutral",
-            "score": 0.0,
-            "emoji": "~",
-            "color": "#94a3b8"
-        }
+def _get_fast_lexicon():
+    """VADER's lexicon (plus commuter words) as a plain dict."""
+    global _fast_lexicon
+    if _fast_lexicon is None:
+        analyzer = _get_analyzer()
+        lexicon = dict(analyzer.lexicon) if analyzer else {**BASIC_LEXICON, **COMMUTER_LEXICON}
+        _fast_lexicon = lexicon
+    return _fast_lexicon
+
+
+def content_hash(text):
+    """Stable cache key for the sentiment of a text under SENTIMENT_MODEL."""
+    normalized = " ".join((text or "").split())
+    return hashlib.sha1(f"{SENTIMENT_MODEL}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+# ---------------- RESULTS ----------------
 
-    scores = analyzer.polarity_scores(text)
-    compound = scores["compound"]
+def star_rating(score):
+    """1-5 stars for a compound score."""
+    for threshold, stars in STAR_THRESHOLDS:
+        if score >= threshold:
+            return stars
+    return 1
 
-    if compound >= 0.05:
+
+def sentiment_result(score):
+    """Full result dict (label, score, rating, emoji, color) for a compound score."""
+    if score >= LABEL_THRESHOLD:
         return {
             "label": "Positive",
-            "score": compound,
+            "score": score,
+            "rating": star_rating(score),
             "emoji": "+",
             "color": "#4ade80"
         }
-    elif compound <= -0.05:
+    elif score <= -LABEL_THRESHOLD:
         return {
             "label": "Negative",
-            "score": compound,
+            "score": score,
+            "rating": star_rating(score),
             "emoji": "-",
             "color": "#f87171"
         }
     else:
         return {
             "label": "Neutral",
-            "score": compound,
+            "score": score,
+            "rating": 3,
             "emoji": "~",
             "color": "#fbbf24"
         }
 
 
+_EMPTY_RESULT = {
+    "label": "Neutral",
+    "score": 0.0,
+    "rating": 3,
+    "emoji": "~",
+    "color": "#94a3b8"
+}
+
+
+# ---------------- SCORING ----------------
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _compound(text):
+    return _get_analyzer().polarity_scores(text)["compound"]
+
+
+def fast_compound(text):
+    """Lexicon sum with negation, normalised like VADER's compound."""
+    lexicon = _get_fast_lexicon()
+    total = 0.0
+    negated = 0
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.replace("'", "")
+        if token in NEGATIONS:
+            negated = NEGATION_WINDOW
+            continue
+        valence = lexicon.get(token)
+        if valence is not None:
+            total += valence * NEGATION_SCALAR if negated else valence
+        if negated:
+            negated -= 1
+    if not total:
+        return 0.0
+    return round(total / math.sqrt(total * total + NORMALIZE_ALPHA), 4)
+
+
+def analyze_fast(text):
+    """
+    Bulk tier: same schema as analyze_sentiment(), several times
+    faster, without VADER's punctuation/caps/"but" heuristics.
+    """
+    if not text or not text.strip():
+        return dict(_EMPTY_RESULT)
+    return sentiment_result(fast_compound(text))
+
+
+def analyze_sentiment(text):
+    """
+    Analyze sentiment of a single review text (VADER tier; the fast
+    tier when vaderSentiment is not installed).
+    Returns dict with label, score, rating, emoji, color.
+    """
+    if not text or not text.strip():
+        return dict(_EMPTY_RESULT)
+    if _get_analyzer() is None:
+        return analyze_fast(text)
+    return sentiment_result(_compound(text))
+
+
 def analyze_reviews_batch(reviews):
-    """Add sentiment data to a list of review dicts."""
+    """Add sentiment data to review dicts that don't have it yet."""
     for review in reviews:
-        comment = review.get("comment", "")
-        review["sentiment"] = analyze_sentiment(comment)
+        if "sentiment" not in review:
+            review["sentiment"] = analyze_sentiment(review.get("comment", ""))
     return reviews
 
 
-def get_sentiment_summary(reviews):
-    """Compute overall sentiment summary for a collection of reviews."""
-    if not reviews:
+def get_sentiment_summary(reviews=None, counts=None):
+    """
+    Compute overall sentiment summary for a collection of reviews,
+    or from precomputed counts {'positive', 'neutral', 'negative',
+    'score_sum'} (see review_store.sentiment_totals) without a scan.
+    """
+    if counts is None:
+        analyze_reviews_batch(reviews or [])
+        labels = [r["sentiment"]["label"] for r in reviews or []]
+        counts = {
+            "positive": labels.count("Positive"),
+            "neutral": labels.count("Neutral"),
+            "negative": labels.count("Negative"),
+            "score_sum": sum(r["sentiment"]["score"] for r in reviews or []),
+        }
+
+    positive, neutral, negative = counts["positive"], counts["neutral"], counts["negative"]
+    total = positive + neutral + negative
+    if not total:
         return {
             "total": 0, "positive": 0, "neutral": 0, "negative": 0,
             "avg_score": 0.0, "overall_label": "No reviews", "overall_emoji": "—"
         }
-
-    for r in reviews:
-        if "sentiment" not in r:
-            r["sentiment"] = analyze_sentiment(r.get("comment", ""))
-
-    total = len(reviews)
-    positive = sum(1 for r in reviews if r["sentiment"]["label"] == "Positive")
-    neutral = sum(1 for r in reviews if r["sentiment"]["label"] == "Neutral")
-    negative = sum(1 for r in reviews if r["sentiment"]["label"] == "Negative")
-    avg_score = sum(r["sentiment"]["score"] for r in reviews) / total
+    avg_score = counts["score_sum"] / total
 
     if avg_score >= 0.05:
         overall_label, overall_emoji = "Mostly Positive", "+"
@@ -128,3 +267,34 @@ def format_sentiment_bar(summary):
         </small>
     </div>
     """
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    import json
+    import os
+    import time
+
+    path = os.path.join(os.path.dirname(__file__), "scraped_reviews.json")
+    with open(path, "r", encoding="utf-8") as f:
+        texts = [r.get("comment") or "" for r in json.load(f).get("reviews", [])]
+    texts = [t for t in texts if t.strip()] * 20
+
+    def timed(func):
+        start = time.perf_counter()
+        results = [func(t) for t in texts]
+        return results, (time.perf_counter() - start) / len(texts) * 1e6
+
+    fast, fast_us = timed(analyze_fast)
+    _compound.cache_clear()
+    vader, vader_us = timed(lambda t: sentiment_result(_get_analyzer().polarity_scores(t)["compound"]))
+
+    same_label = sum(a["label"] == b["label"] for a, b in zip(fast, vader)) / len(texts)
+    same_stars = sum(a["rating"] == b["rating"] for a, b in zip(fast, vader)) / len(texts)
+    near_stars = sum(abs(a["rating"] - b["rating"]) <= 1 for a, b in zip(fast, vader)) / len(texts)
+    print(f"{len(texts)} texts, VADER available: {VADER_AVAILABLE}")
+    print(f"  fast tier:  {fast_us:7.1f} us/item")
+    print(f"  VADER tier: {vader_us:7.1f} us/item  ({vader_us / fast_us:.1f}x slower)")
+    print(f"  agreement:  label {same_label:.0%}, stars {same_stars:.0%}, stars within 1 {near_stars:.0%}")
@@ -0,0 +1,175 @@
+# ==================================================
+# Mumbai Local Train - Background Refresh Daemon
+# ==================================================
+# Keeps the running bot's data fresh without manual
+# scrapes or app restarts:
+# - timetables: scraped into generations/next/, diffed
+#   against the live generation, built and validated
+#   there, then published (timetable_publish); serving
+#   processes swap to the new generation on their own
+# - reviews: scraped into the review store (SQLite WAL);
+#   the bot's cached station summaries are dropped once
+#   PRAGMA data_version shows another process committed
+# - every job runs in its own child process with a time
+#   limit, so a hung or crashing scrape can't take the
+#   daemon (or the bot) down with it
+# Run alongside the app:  python refresh_daemon.py
+# ==================================================
+
+import argparse
+import contextlib
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+import scrape_all_trains
+from scrape_all_trains import GO4MUMBAI_URL, LIFELINE_URL
+from timetable_build import ARTIFACT_FILE, REPORT_FILE, SOURCE_FILES, build
+from timetable_publish import (GENERATIONS_DIR, current_generation, discard_staging, generation_dir,
+                               publish, staging_dir)
+from timetable_refresh import has_changes
+
+TIMETABLE_INTERVAL = 6 * 3600    # seconds between timetable scrapes
+REVIEWS_INTERVAL = 3600          # seconds between review scrapes
+JOB_TIMEOUT = 2 * 3600           # a job still running after this is killed
+LOCK_FILE = "daemon.pid"
+
+
+def log(message):
+    print(f"[{datetime.now().isoformat(timespec='seconds')}] {message}", flush=True)
+
+
+# ==================================================
+# JOBS
+# ==================================================
+
+def refresh_timetables(root=GENERATIONS_DIR, lifeline_url=LIFELINE_URL, go4mumbai_url=GO4MUMBAI_URL,
+                       cache=None):
+    """
+    Scrape into the staging folder and publish it if the scrape changed
+    any train (judged by refresh_timetable's change sets). An unfinished
+    scrape keeps its staging folder, so the next run resumes from the
+    checkpoint. Returns the new generation (or None).
+    """
+    os.makedirs(root, exist_ok=True)
+    staging = staging_dir(root)
+    changes = scrape_all_trains.main(lifeline_url, go4mumbai_url, output_dir=staging, cache=cache)
+
+    if changes is None:
+        log("Timetable scrape unfinished - will resume next run")
+        return None
+    artifact = os.path.join(staging, os.path.basename(ARTIFACT_FILE))
+    if current_generation(root) is not None and not any(has_changes(c) for c in changes.values()):
+        log("Timetables unchanged - nothing to publish")
+        discard_staging(root)
+        return None
+    if not os.path.exists(artifact):
+        # First run: publish the seeded timetables as they are
+        build([os.path.join(staging, os.path.basename(p)) for p in SOURCE_FILES], artifact,
+              os.path.join(staging, os.path.basename(REPORT_FILE)))
+    number = publish(staging, root)
+    log(f"Published timetable generation {number}")
+    return number
+
+
+def refresh_reviews(scrapers=None):
+    """Scrape reviews into the store (the bot sees them on its next read)."""
+    import scrape_reviews
+
+    stats = scrape_reviews.scrape_all_reviews(scrapers=scrapers or scrape_reviews.SOURCES)
+    log(f"Reviews: {stats['written']} new of {stats['seen']} seen")
+
+
+# ==================================================
+# SCHEDULER
+# ==================================================
+
+def _acquire_lock(root):
+    """One daemon per generations folder; a lock left by a dead process is taken over."""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, LOCK_FILE)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    os.kill(int(f.read().strip()), 0)
+                return None                      # owner is alive
+            except (OSError, ValueError):
+                os.remove(path)                  # stale
+                continue
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        return path
+    return None
+
+
+def run_job(name, target, args=(), timeout=JOB_TIMEOUT):
+    """Run one job in a child process. True if it exited cleanly in time."""
+    start = time.monotonic()
+    process = multiprocessing.Process(target=target, args=args, name=f"refresh-{name}")
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        log(f"{name}: killed after {timeout}s")
+        return False
+    log(f"{name}: finished in {time.monotonic() - start:.0f}s (exit code {process.exitcode})")
+    return process.exitcode == 0
+
+
+def run(jobs, once=False, timeout=JOB_TIMEOUT):
+    """Run {name: (target, interval, args)} on their intervals (each once, with once=True)."""
+    next_run = {name: 0.0 for name in jobs}
+    while True:
+        for name, (target, interval, args) in jobs.items():
+            if time.time() >= next_run[name]:
+                run_job(name, target, args, timeout)
+                next_run[name] = time.time() + interval
+        if once:
+            return
+        time.sleep(max(1.0, min(next_run.values()) - time.time()))
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh timetables and reviews on a schedule.")
+    parser.add_argument("--once", action="store_true", help="run each job once and exit")
+    parser.add_argument("--only", choices=["timetables", "reviews"], help="run just this job")
+    parser.add_argument("--root", default=GENERATIONS_DIR, help="timetable generations folder")
+    parser.add_argument("--offline", action="store_true",
+                        help="scrape fake_railway_site instead of the real sites (timetables only)")
+    args = parser.parse_args()
+
+    lock = _acquire_lock(args.root)
+    if lock is None:
+        raise SystemExit(f"Another refresh daemon is running for {args.root}")
+
+    with contextlib.ExitStack() as stack:
+        urls = (LIFELINE_URL, GO4MUMBAI_URL)
+        if args.offline:
+            from fake_railway_site import FakeRailwaySite
+            site = stack.enter_context(FakeRailwaySite())
+            urls = (site.url, site.url)
+        stack.callback(os.remove, lock)
+
+        jobs = {"timetables": (refresh_timetables, TIMETABLE_INTERVAL, (args.root,) + urls),
+                "reviews": (refresh_reviews, REVIEWS_INTERVAL, ())}
+        if args.offline:
+            jobs.pop("reviews")
+        if args.only:
+            jobs = {name: job for name, job in jobs.items() if name == args.only}
+        if not jobs:
+            raise SystemExit("Nothing to run (--offline only covers timetables)")
+
+        log(f"Refresh daemon started: {', '.join(jobs)} (generation {current_generation(args.root)})")
+        try:
+            run(jobs, once=args.once)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,165 @@
+# ==================================================
+# Mumbai Local Train - Stale-While-Revalidate Cache
+# ==================================================
+# Serves the last good snapshot straight away and
+# refreshes it in a background thread once it is
+# stale. Only one refresh runs at a time, however
+# many sessions ask for the data.
+# ==================================================
+
+import threading
+import time
+
+DEFAULT_MAX_AGE = 60         # seconds before a snapshot is considered stale
+
+
+class StaleWhileRevalidateCache:
+    """
+    Snapshot cache around a loader function.
+
+    get() only blocks when there is no snapshot yet. A failed refresh
+    keeps serving the previous snapshot and is retried on the next
+    get() after retry_after seconds.
+
+    Usage:
+        cache = StaleWhileRevalidateCache(fetch_reviews, max_age=60)
+        reviews = cache.get()
+        cache.metrics()  # age, refresh latency, hit counts
+    """
+
+    def __init__(self, loader, max_age=DEFAULT_MAX_AGE, retry_after=None, name="cache"):
+        self.loader = loader
+        self.max_age = max_age
+        self.retry_after = max_age if retry_after is None else retry_after
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._value = None
+        self._has_value = False
+        self._loaded_at = 0.0
+        self._next_attempt = 0.0
+        self._refreshing = None       # Event while a refresh is in flight
+
+        self._stats = {
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "last_refresh_ms": None,
+            "last_error": None,
+        }
+
+    # ---------------- READ ----------------
+
+    def get(self, default=None, block=True):
+        """
+        Return the snapshot, refreshing in the background if stale.
+        With block=False the first load also runs in the background
+        and default is returned until it finishes.
+        """
+        now = time.time()
+        with self._lock:
+            if self._has_value:
+                if now - self._loaded_at < self.max_age:
+                    self._stats["fresh_hits"] += 1
+                    return self._value
+                self._stats["stale_hits"] += 1
+                if now >= self._next_attempt and self._refreshing is None:
+                    self._refresh_in_background()
+                return self._value
+
+            self._stats["misses"] += 1
+            if now < self._next_attempt:
+                # First load failed recently - don't hammer the source
+                return default
+            if not block:
+                if self._refreshing is None:
+                    self._refresh_in_background()
+                return default
+            event = self._refreshing
+            load_here = event is None
+            if load_here:
+                event = self._refreshing = threading.Event()
+
+        # No snapshot yet: one caller loads, the others wait for it
+        if load_here:
+            self._refresh(event)
+        else:
+            event.wait()
+        with self._lock:
+            return self._value if self._has_value else default
+
+    def _refresh_in_background(self):
+        """Start a refresh thread (call with _lock held)."""
+        self._refreshing = threading.Event()
+        threading.Thread(target=self._refresh, args=(self._refreshing,),
+                         name=f"{self.name}-refresh", daemon=True).start()
+
+    def _refresh(self, event):
+        start = time.perf_counter()
+        try:
+            value = self.loader()
+        except Exception as e:
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+                self._stats["last_error"] = str(e)
+                self._next_attempt = time.time() + self.retry_after
+            print(f"[{self.name}] refresh failed, serving last snapshot: {e}")
+        else:
+            with self._lock:
+                self._value = value
+                self._has_value = True
+                self._loaded_at = time.time()
+                self._next_attempt = 0.0
+                self._stats["refreshes"] += 1
+                self._stats["last_error"] = None
+        finally:
+            with self._lock:
+                self._stats["last_refresh_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                self._refreshing = None
+            event.set()
+
+    def wait(self, timeout=None):
+        """Wait for an in-flight refresh (used by scripts and demos)."""
+        event = self._refreshing
+        if event is not None:
+            event.wait(timeout)
+
+    # ---------------- METRICS ----------------
+
+    def metrics(self):
+        """Snapshot age, refresh latency and hit counters."""
+        with self._lock:
+            age = time.time() - self._loaded_at if self._has_value else None
+            return {
+                "age_seconds": round(age, 1) if age is not None else None,
+                "stale": age is None or age >= self.max_age,
+                "refreshing": self._refreshing is not None,
+                **self._stats,
+            }
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    calls = []
+
+    def slow_loader():
+        calls.append(time.time())
+        time.sleep(0.2)
+        return len(calls)
+
+    cache = StaleWhileRevalidateCache(slow_loader, max_age=0.5, name="demo")
+    print("first get:", cache.get())
+
+    time.sleep(0.6)
+    start = time.perf_counter()
+    results = [cache.get() for _ in range(1000)]
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"1000 stale gets in {elapsed:.1f} ms, all served snapshot {set(results)}")
+
+    cache.wait()
+    print("after refresh:", cache.get(), "- loader calls:", len(calls))
+    print(cache.metrics())
@@ -0,0 +1,161 @@
+# ==================================================
+# Mumbai Local Train - Streaming Review Ingestion
+# ==================================================
+# Scraped posts flow through generator stages into the
+# review store, one bounded batch at a time:
+#   fetch -> normalize -> dedupe -> station tagging
+#         -> sentiment -> sink (review_store, SQLite)
+# - ids are content hashes (review_store.scraped_review_id),
+#   so a re-run never repeats a post or shifts ids
+# - duplicates are caught by id and by source URL, within
+#   the run and against everything stored before
+# - memory is bounded by BATCH_SIZE, not by the number of
+#   posts scraped
+# ==================================================
+
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+
+import review_store
+from station_registry import canonical_name, find_stations
+
+BATCH_SIZE = 500             # posts per dedupe lookup / write transaction
+MAX_COMMENT = 200            # characters kept per post
+DEFAULT_SUBJECT = 'Mumbai Local'
+
+
+def batched(items, size):
+    """Lists of up to size items from any iterable."""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+# ==================================================
+# STAGES
+# ==================================================
+
+def normalize(items, stats):
+    """Scraped items -> review dicts (whitespace collapsed, stable id)."""
+    for item in items:
+        stats['seen'] += 1
+        source = item.get('source') or 'Online'
+        stats['sources'][source] += 1
+        comment = " ".join((item.get('content') or "").split())[:MAX_COMMENT]
+        if not comment:
+            stats['empty'] += 1
+            continue
+        yield {
+            'id': review_store.scraped_review_id(comment),
+            'category': 'scraped',
+            'subject': None,
+            'rating': item.get('rating', 3),
+            'comment': comment,
+            'username': source,
+            'timestamp': item.get('timestamp') or datetime.now().isoformat(),
+            'source': item.get('source'),
+            'type': item.get('type'),
+            'url': item.get('url') or None,
+        }
+
+
+def dedupe(batch, stats, conn):
+    """Drop posts already stored or repeated earlier in the batch (by id or URL)."""
+    known_ids, known_urls = review_store.known_scraped(
+        [r['id'] for r in batch], [r['url'] for r in batch], conn=conn)
+    for review in batch:
+        if review['id'] in known_ids or (review['url'] and review['url'] in known_urls):
+            stats['duplicates'] += 1
+            continue
+        known_ids.add(review['id'])
+        if review['url']:
+            known_urls.add(review['url'])
+        yield review
+
+
+def tag_stations(reviews):
+    """Subject = first station mentioned (the scrapers' convention)."""
+    for review in reviews:
+        found = find_stations(review['comment'])
+        review['subject'] = (canonical_name(found[0]) if found else None) or DEFAULT_SUBJECT
+        yield review
+
+
+def score(reviews, conn):
+    """Attach sentiment, batch-scored through the store's content-hash cache."""
+    reviews = list(reviews)
+    results = review_store.score_texts([r['comment'] for r in reviews], conn=conn)
+    for review, (label, value) in zip(reviews, results):
+        if label:
+            review['sentiment'] = {'label': label, 'score': value}
+        yield review
+
+
+def write(reviews, stats, conn):
+    """Sink: append to the store, remembering source URLs."""
+    reviews = list(reviews)
+    if not reviews:
+        return
+    review_store.add_reviews(reviews, origin="scraped", synced=True, conn=conn, score=False)
+    review_store.add_scraped_urls([(r['url'], r['id']) for r in reviews], conn=conn)
+    stats['written'] += len(reviews)
+
+
+# ==================================================
+# PIPELINE
+# ==================================================
+
+def ingest(items, conn=None, batch_size=BATCH_SIZE):
+    """
+    Stream scraped items into the review store. Returns stats:
+    {'seen', 'empty', 'duplicates', 'written', 'sources': Counter}
+    """
+    conn = conn or review_store.get_connection()
+    stats = {'seen': 0, 'empty': 0, 'duplicates': 0, 'written': 0, 'sources': Counter()}
+    for batch in batched(normalize(items, stats), batch_size):
+        fresh = dedupe(batch, stats, conn)
+        write(score(tag_stations(fresh), conn), stats, conn)
+    return stats
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    import time
+    import tracemalloc
+
+    db_file = os.path.join(tempfile.mkdtemp(), "ingest.db")
+    conn = review_store.get_connection(db_file)
+
+    subjects = ["Dadar fast", "Andheri slow", "Thane local", "CSMT AC train", "Virar fast", "Kurla harbour"]
+    verdicts = ["was super crowded", "was on time today", "had a terrible delay", "was clean and cool"]
+
+    def posts(count, seed=1):
+        """A scrape where roughly one post in four repeats an earlier one."""
+        rng = random.Random(seed)
+        for i in range(count):
+            n = rng.randrange(i + 1) if i and rng.random() < 0.25 else i
+            yield {'source': rng.choice(['reddit/r/mumbai', 'twitter', 'Google News']),
+                   'type': 'post', 'content': f"  The {subjects[n % 6]} {verdicts[n % 4]}  (#{n})",
+                   'rating': 3, 'url': f"https://example.com/post/{n}" if n % 2 else None}
+
+    for run, count in (("first run", 20_000), ("re-run", 20_000), ("bigger scrape", 40_000)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        stats = ingest(posts(count), conn=conn)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+        print(f"{run:>14}: {stats['seen']:,} seen, {stats['duplicates']:,} duplicates, "
+              f"{stats['written']:,} new in {elapsed:.1f}s (peak {peak:.1f} MB)")
+
+    stored = conn.execute("SELECT COUNT(*), COUNT(DISTINCT comment) FROM reviews").fetchone()
+    print(f"Stored: {stored[0]:,} scraped reviews, {stored[1]:,} distinct texts")
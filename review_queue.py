@@ -0,0 +1,212 @@
+# ==================================================
+# Mumbai Local Train - Review Write-Behind Queue
+# ==================================================
+# Reviews are appended to a local spool file and the
+# user is acknowledged straight away. A background
+# thread batch-writes queued reviews to storage
+# (Google Sheets via append_rows) and trims the spool.
+# ==================================================
+
+import atexit
+import json
+import os
+import random
+import threading
+import time
+
+BASE_DIR = os.path.dirname(__file__)
+SPOOL_FILE = os.path.join(BASE_DIR, "review_queue.jsonl")
+
+BATCH_SIZE = 50              # reviews per append_rows call
+FLUSH_INTERVAL = 2.0         # seconds between flush attempts
+MAX_BACKOFF = 300            # seconds, after repeated failures
+EXIT_FLUSH_TIMEOUT = 5       # seconds to wait for a final flush at exit
+
+
+# ==================================================
+# REVIEW IDS
+# ==================================================
+# ULID: 48-bit millisecond timestamp + 80 random bits,
+# Crockford base32. Sorts by creation time and needs
+# no row count, so concurrent writers never collide.
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_random = random.SystemRandom()
+
+
+def new_review_id(timestamp=None):
+    """Generate a 26-character ULID."""
+    ms = int((time.time() if timestamp is None else timestamp) * 1000)
+    value = (ms << 80) | _random.getrandbits(80)
+    chars = []
+    for _ in range(26):
+        chars.append(_CROCKFORD[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+# ==================================================
+# QUEUE
+# ==================================================
+
+class ReviewQueue:
+    """
+    Durable write-behind queue for reviews.
+
+    enqueue() appends one JSON line to the spool (fsync'd) and
+    returns; the flusher thread hands batches to flush_func(reviews)
+    and drops them from the spool once it returns without error.
+    A crash between the write and the spool trim can resend a
+    batch, so readers should de-duplicate on review id.
+    """
+
+    def __init__(self, flush_func, spool_file=SPOOL_FILE,
+                 batch_size=BATCH_SIZE, interval=FLUSH_INTERVAL):
+        self.flush_func = flush_func
+        self.spool_file = spool_file
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self._lock = threading.Lock()          # spool file + pending list
+        self._flush_lock = threading.Lock()    # one flush at a time
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._exit_hook = False
+        self._failures = 0
+        self._pending = self._load_spool()
+
+        self.stats = {"enqueued": 0, "flushed": 0, "batches": 0, "errors": 0}
+
+    def _load_spool(self):
+        """Reviews left over from a previous run."""
+        pending = []
+        if not os.path.exists(self.spool_file):
+            return pending
+        with open(self.spool_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    pending.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn last line from a crash mid-write
+                    continue
+        return pending
+
+    def _rewrite_spool(self):
+        """Replace the spool with the still-pending reviews (atomic)."""
+        tmp = self.spool_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for review in self._pending:
+                f.write(json.dumps(review, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.spool_file)
+
+    # ---------------- PRODUCER ----------------
+
+    def enqueue(self, review):
+        """Persist a review to the spool and schedule it for writing."""
+        line = json.dumps(review, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.spool_file, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending.append(review)
+            self.stats["enqueued"] += 1
+
+        self.start()
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+        return review
+
+    def pending(self):
+        """Reviews accepted but not yet written to storage."""
+        with self._lock:
+            return list(self._pending)
+
+    def __len__(self):
+        return len(self._pending)
+
+    # ---------------- FLUSHER ----------------
+
+    def flush(self):
+        """Write all pending reviews now. Returns how many were written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._pending[:self.batch_size]
+                if not batch:
+                    break
+
+                try:
+                    self.flush_func(batch)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    self._failures += 1
+                    print(f"Review queue flush failed ({len(batch)} pending): {e}")
+                    break
+
+                self._failures = 0
+                flushed_ids = {review.get("id") for review in batch}
+                with self._lock:
+                    self._pending = [r for r in self._pending if r.get("id") not in flushed_ids]
+                    self._rewrite_spool()
+                written += len(batch)
+                self.stats["flushed"] += len(batch)
+                self.stats["batches"] += 1
+        return written
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Back off exponentially while storage keeps failing
+            delay = min(self.interval * (2 ** self._failures), MAX_BACKOFF)
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._pending:
+                self.flush()
+
+    def start(self):
+        """Start the background flusher (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="review-queue", daemon=True)
+        self._thread.start()
+        if not self._exit_hook:
+            atexit.register(self.stop)
+            self._exit_hook = True
+
+    def stop(self, timeout=EXIT_FLUSH_TIMEOUT):
+        """Stop the flusher after one last flush attempt."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        if self._pending:
+            self.flush()
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    import tempfile
+
+    written = []
+    spool = os.path.join(tempfile.mkdtemp(), "queue.jsonl")
+    queue = ReviewQueue(lambda batch: written.extend(batch), spool_file=spool, interval=0.1)
+
+    start = time.perf_counter()
+    for i in range(200):
+        queue.enqueue({"id": new_review_id(), "subject": "Dadar", "rating": 4, "comment": f"Review {i}"})
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Enqueued 200 reviews in {elapsed:.1f} ms ({elapsed / 200:.2f} ms each)")
+
+    time.sleep(0.5)
+    print(f"Written: {len(written)}, pending: {len(queue)}, stats: {queue.stats}")
+    print(f"IDs unique: {len({r['id'] for r in written}) == len(written)}")
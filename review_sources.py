@@ -0,0 +1,269 @@
+# ==================================================
+# Mumbai Local Train - Concurrent Review Sources
+# ==================================================
+# Runs the review scrapers side by side instead of one
+# after another:
+# - one thread per source; items reach the caller as
+#   they are scraped (bounded queue)
+# - every source has its own time budget and per-host
+#   rate limiter (scrape_http.HostRateLimiter)
+# - a circuit breaker per host stops hammering a site
+#   that keeps failing (e.g. a dead Nitter instance)
+# - a global deadline ends the run: whatever arrived by
+#   then is returned, late sources are left behind
+# - per-source metrics: items, requests, latency, status
+# scrape_reviews.scrape_all_reviews() runs through here.
+# ==================================================
+
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+
+from http_cache import cached_get
+from scrape_http import HostRateLimiter
+
+DEADLINE = 60                # seconds for the whole run
+BUDGET = 45                  # default seconds per source
+FAILURE_THRESHOLD = 3        # consecutive failures that open a host's circuit
+COOLDOWN = 60                # seconds before an open circuit lets a trial request through
+QUEUE_SIZE = 1000            # items waiting for the consumer
+
+_DONE = object()
+
+
+class SourceStopped(Exception):
+    """The source's budget (or the run's deadline) is spent."""
+
+
+class CircuitOpen(Exception):
+    """Requests to this host are being skipped after repeated failures."""
+
+
+# ==================================================
+# CIRCUIT BREAKER
+# ==================================================
+
+class CircuitBreaker:
+    """
+    Closed -> open after `threshold` consecutive failures; after
+    `cooldown` seconds one trial request is let through (half-open),
+    which closes the circuit on success or re-opens it on failure.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            self.opened_at = time.monotonic()      # one trial per cooldown
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold or self.opened_at is not None:
+            if self.opened_at is None:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+
+
+# ==================================================
+# SOURCE
+# ==================================================
+
+class Source:
+    """
+    What a scraper fetches through: budget, rate limit and circuit
+    breakers for one source. Scrapers call source.get() in place of
+    cached_get() and stop looping once source.stopped is set.
+    """
+
+    def __init__(self, name, budget=None, interval=0.0, fetch=cached_get, stop=None):
+        self.name = name
+        self.fetch = fetch
+        self.limiter = HostRateLimiter(interval)
+        self.breakers = {}
+        self.started = time.monotonic()
+        self.ends = self.started + budget if budget else None
+        self._stop = stop or threading.Event()
+        self.metrics = {"items": 0, "requests": 0, "failures": 0, "skipped": 0,
+                        "request_time": 0.0, "elapsed": 0.0, "status": "running"}
+
+    @property
+    def remaining(self):
+        return None if self.ends is None else self.ends - time.monotonic()
+
+    @property
+    def stopped(self):
+        return self._stop.is_set() or (self.ends is not None and self.remaining <= 0)
+
+    def get(self, url, timeout=15, **kwargs):
+        """cached_get() within the source's limits. Raises SourceStopped / CircuitOpen."""
+        if self.stopped:
+            raise SourceStopped(f"{self.name}: time budget spent")
+        host = urlsplit(url).netloc
+        breaker = self.breakers.setdefault(host, CircuitBreaker())
+        if not breaker.allow():
+            self.metrics["skipped"] += 1
+            raise CircuitOpen(f"{host}: circuit open after {breaker.failures} failures")
+        self.limiter.wait(host)
+        if self.ends is not None:
+            timeout = max(0.1, min(timeout, self.remaining))
+
+        start = time.monotonic()
+        self.metrics["requests"] += 1
+        try:
+            response = self.fetch(url, timeout=timeout, **kwargs)
+        except Exception:
+            self.metrics["failures"] += 1
+            breaker.failure()
+            raise
+        finally:
+            self.metrics["request_time"] += time.monotonic() - start
+        if response.status_code >= 500 or response.status_code == 429:
+            self.metrics["failures"] += 1
+            breaker.failure()
+        else:
+            breaker.success()
+        return response
+
+    def summary(self):
+        m = self.metrics
+        latency = m["request_time"] / m["requests"] * 1000 if m["requests"] else 0
+        trips = sum(b.trips for b in self.breakers.values())
+        return (f"{self.name + ':':<12}{m['items']:>4} items in {m['elapsed']:5.1f}s, "
+                f"{m['requests']} requests (avg {latency:.0f} ms, {m['failures']} failed, "
+                f"{m['skipped']} skipped, {trips} circuit trips) - {m['status']}")
+
+
+# ==================================================
+# RUN
+# ==================================================
+
+def _run(scraper, source, items):
+    def put(entry):
+        while not source._stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for item in scraper(source):
+            source.metrics["items"] += 1
+            if not put((source.name, item)):
+                break
+        status = "done"
+    except SourceStopped:
+        status = "budget spent"
+    except Exception as e:
+        status = f"error: {e}"
+    if source._stop.is_set():
+        status = "cut off at deadline"
+    elif status == "done" and source.stopped:
+        status = "budget spent"
+    source.metrics["status"] = status
+    source.metrics["elapsed"] = time.monotonic() - source.started
+    put((source.name, _DONE))
+
+
+def run_sources(scrapers, deadline=DEADLINE, sources=None):
+    """
+    Run {name: (scraper, budget, interval)} concurrently and yield
+    their items as they arrive, until every source is done or the
+    deadline passes. scraper(source) is a generator of items.
+    Pass a dict as `sources` to get the Source objects (metrics).
+    """
+    stop = threading.Event()
+    items = queue.Queue(maxsize=QUEUE_SIZE)
+    ends = time.monotonic() + deadline
+    running = {}
+    for name, (scraper, budget, interval) in scrapers.items():
+        source = Source(name, min(budget or BUDGET, deadline), interval, stop=stop)
+        if sources is not None:
+            sources[name] = source
+        running[name] = source
+        threading.Thread(target=_run, args=(scraper, source, items),
+                         name=f"source-{name}", daemon=True).start()
+
+    try:
+        while running:
+            try:
+                name, item = items.get(timeout=max(0.0, ends - time.monotonic()))
+            except queue.Empty:
+                break                               # deadline: keep what arrived
+            if item is _DONE:
+                running.pop(name, None)
+            else:
+                yield item
+    finally:
+        stop.set()
+        for source in running.values():
+            source.metrics["status"] = "cut off at deadline"
+            source.metrics["elapsed"] = time.monotonic() - source.started
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    from types import SimpleNamespace
+
+    def fake_fetch(latency, fail_hosts=()):
+        def fetch(url, timeout, **kwargs):
+            time.sleep(min(latency, timeout))
+            if urlsplit(url).netloc in fail_hosts:
+                raise ConnectionError(f"{url} unreachable")
+            return SimpleNamespace(status_code=200)
+        return fetch
+
+    def make_scraper(pages, latency, fail_hosts=(), hosts=("example.com",)):
+        def scraper(source):
+            source.fetch = fake_fetch(latency, fail_hosts)
+            for page in range(pages):
+                for host in hosts:          # first host that answers wins, like the Nitter loop
+                    if source.stopped:
+                        return
+                    try:
+                        source.get(f"https://{host}/page/{page}")
+                    except (ConnectionError, CircuitOpen):
+                        continue
+                    yield {"source": source.name, "content": f"post {page} via {host}"}
+                    break
+        return scraper
+
+    scrapers = {
+        "reddit": (make_scraper(6, 0.2), 5, 0.3),
+        "twitter": (make_scraper(6, 0.1, fail_hosts={"nitter.dead"},
+                                 hosts=("nitter.dead", "nitter.up")), 5, 0.1),
+        "play_store": (make_scraper(2, 0.3), 5, 0),
+        "news": (make_scraper(40, 0.2), 2, 0),        # slow: runs out of budget
+    }
+    start = time.perf_counter()
+    sources = {}
+    got = list(run_sources(scrapers, deadline=3, sources=sources))
+    busy = sum(source.metrics["elapsed"] for source in sources.values())
+    print(f"{len(got)} items in {time.perf_counter() - start:.1f}s wall "
+          f"({busy:.1f}s of source time - the old sum-of-all-sources cost)")
+    for source in sources.values():
+        print("  " + source.summary())
+
+    # A global deadline shorter than the sources need
+    sources = {}
+    got = list(run_sources(scrapers, deadline=1, sources=sources))
+    print(f"Deadline 1s: {len(got)} items kept")
+    for source in sources.values():
+        print("  " + source.summary())
@@ -0,0 +1,905 @@
+# ==================================================
+# Mumbai Local Train - SQLite Review Store
+# ==================================================
+# Local database for user and scraped reviews:
+# - indexes on subject / timestamp / source
+# - FTS5 full-text index on review comments
+# - WAL mode so app sessions can read while one writes
+# - station postings + materialized per-station summaries
+# - sentiment scored once at ingest (content-hash cache)
+# - scraped posts keyed by content (stable ids, no repeats)
+# Existing JSON files are imported automatically.
+# ==================================================
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from station_registry import find_stations
+
+try:
+    import nlp_sentiment
+    SENTIMENT_AVAILABLE = nlp_sentiment.VADER_AVAILABLE
+except ImportError:
+    SENTIMENT_AVAILABLE = False
+
+BASE_DIR = os.path.dirname(__file__)
+DB_FILE = os.path.join(BASE_DIR, "reviews.db")
+USER_REVIEWS_FILE = os.path.join(BASE_DIR, "user_reviews.json")
+SCRAPED_REVIEWS_FILE = os.path.join(BASE_DIR, "scraped_reviews.json")
+
+BUSY_TIMEOUT_MS = 5000
+TOP_REVIEWS = 3              # newest user / scraped reviews kept per station summary
+
+REVIEW_FIELDS = ['id', 'category', 'subject', 'rating', 'comment',
+                 'username', 'timestamp', 'source', 'type']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    origin    TEXT NOT NULL,            -- 'user' or 'scraped'
+    id        TEXT NOT NULL,
+    category  TEXT,
+    subject   TEXT,
+    rating    INTEGER,
+    comment   TEXT,
+    username  TEXT,
+    timestamp TEXT,
+    source    TEXT,
+    type      TEXT,
+    synced    INTEGER NOT NULL DEFAULT 0,   -- written to Google Sheets
+    PRIMARY KEY (origin, id)
+);
+CREATE INDEX IF NOT EXISTS idx_reviews_subject ON reviews(subject COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_reviews_timestamp ON reviews(timestamp);
+CREATE INDEX IF NOT EXISTS idx_reviews_source ON reviews(source);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# External-content FTS index kept in step with triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5(
+    comment, subject, content='reviews', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS reviews_ai AFTER INSERT ON reviews BEGIN
+    INSERT INTO reviews_fts(rowid, comment, subject) VALUES (new.rowid, new.comment, new.subject);
+END;
+CREATE TRIGGER IF NOT EXISTS reviews_ad AFTER DELETE ON reviews BEGIN
+    INSERT INTO reviews_fts(reviews_fts, rowid, comment, subject)
+    VALUES ('delete', old.rowid, old.comment, old.subject);
+END;
+CREATE TRIGGER IF NOT EXISTS reviews_au AFTER UPDATE OF comment, subject ON reviews BEGIN
+    INSERT INTO reviews_fts(reviews_fts, rowid, comment, subject)
+    VALUES ('delete', old.rowid, old.comment, old.subject);
+    INSERT INTO reviews_fts(rowid, comment, subject) VALUES (new.rowid, new.comment, new.subject);
+END;
+"""
+
+
+# Station tags: station -> review postings, with rating totals per
+# station kept current by triggers so summaries need no scan
+STATIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS review_stations (
+    station_id TEXT NOT NULL,
+    origin     TEXT NOT NULL,
+    review_id  TEXT NOT NULL,
+    PRIMARY KEY (station_id, origin, review_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_review_stations_review ON review_stations(origin, review_id);
+
+CREATE TABLE IF NOT EXISTS station_stats (
+    station_id   TEXT PRIMARY KEY,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    user_count   INTEGER NOT NULL DEFAULT 0,
+    rating_sum   INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS review_stations_ai AFTER INSERT ON review_stations BEGIN
+    INSERT OR IGNORE INTO station_stats(station_id) VALUES (new.station_id);
+    UPDATE station_stats SET
+        review_count = review_count + 1,
+        user_count = user_count + (new.origin = 'user'),
+        rating_sum = rating_sum + (SELECT COALESCE(rating, 0) FROM reviews
+                                   WHERE origin = new.origin AND id = new.review_id),
+        rating_count = rating_count + (SELECT COALESCE(rating, 0) > 0 FROM reviews
+                                       WHERE origin = new.origin AND id = new.review_id)
+    WHERE station_id = new.station_id;
+END;
+CREATE TRIGGER IF NOT EXISTS review_stations_ad AFTER DELETE ON review_stations BEGIN
+    UPDATE station_stats SET
+        review_count = review_count - 1,
+        user_count = user_count - (old.origin = 'user'),
+        rating_sum = rating_sum - (SELECT COALESCE(rating, 0) FROM reviews
+                                   WHERE origin = old.origin AND id = old.review_id),
+        rating_count = rating_count - (SELECT COALESCE(rating, 0) > 0 FROM reviews
+                                       WHERE origin = old.origin AND id = old.review_id)
+    WHERE station_id = old.station_id;
+END;
+-- Drop postings while the review row (and its rating) still exists
+CREATE TRIGGER IF NOT EXISTS reviews_bd_stations BEFORE DELETE ON reviews BEGIN
+    DELETE FROM review_stations WHERE origin = old.origin AND review_id = old.id;
+END;
+"""
+
+
+# Materialized station summaries replacing station_stats: counts and
+# histograms move with each posting / rating / sentiment change (triggers),
+# the top-3 lists are refreshed for touched stations after each write.
+SUMMARY_SCHEMA = """
+ALTER TABLE reviews ADD COLUMN sentiment TEXT;      -- 'Positive' / 'Neutral' / 'Negative'
+
+CREATE TABLE IF NOT EXISTS station_summaries (
+    station_id   TEXT PRIMARY KEY,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    user_count   INTEGER NOT NULL DEFAULT 0,
+    rating_sum   INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    rating_1     INTEGER NOT NULL DEFAULT 0,
+    rating_2     INTEGER NOT NULL DEFAULT 0,
+    rating_3     INTEGER NOT NULL DEFAULT 0,
+    rating_4     INTEGER NOT NULL DEFAULT 0,
+    rating_5     INTEGER NOT NULL DEFAULT 0,
+    positive     INTEGER NOT NULL DEFAULT 0,
+    neutral      INTEGER NOT NULL DEFAULT 0,
+    negative     INTEGER NOT NULL DEFAULT 0,
+    top_user     TEXT NOT NULL DEFAULT '[]',       -- JSON, newest first
+    top_scraped  TEXT NOT NULL DEFAULT '[]'
+);
+
+DROP TRIGGER IF EXISTS review_stations_ai;
+DROP TRIGGER IF EXISTS review_stations_ad;
+DROP TABLE IF EXISTS station_stats;
+
+CREATE TRIGGER review_stations_ai AFTER INSERT ON review_stations BEGIN
+    INSERT OR IGNORE INTO station_summaries(station_id) VALUES (new.station_id);
+    UPDATE station_summaries SET
+        review_count = review_count + 1,
+        user_count = user_count + (new.origin = 'user'),
+        rating_sum = rating_sum + r.rating,
+        rating_count = rating_count + (r.rating > 0),
+        rating_1 = rating_1 + (r.rating = 1),
+        rating_2 = rating_2 + (r.rating = 2),
+        rating_3 = rating_3 + (r.rating = 3),
+        rating_4 = rating_4 + (r.rating = 4),
+        rating_5 = rating_5 + (r.rating = 5),
+        positive = positive + (r.sentiment = 'Positive'),
+        neutral = neutral + (r.sentiment = 'Neutral'),
+        negative = negative + (r.sentiment = 'Negative')
+    FROM (SELECT COALESCE(rating, 0) AS rating, COALESCE(sentiment, '') AS sentiment
+          FROM reviews WHERE origin = new.origin AND id = new.review_id) AS r
+    WHERE station_id = new.station_id;
+END;
+CREATE TRIGGER review_stations_ad AFTER DELETE ON review_stations BEGIN
+    UPDATE station_summaries SET
+        review_count = review_count - 1,
+        user_count = user_count - (old.origin = 'user'),
+        rating_sum = rating_sum - r.rating,
+        rating_count = rating_count - (r.rating > 0),
+        rating_1 = rating_1 - (r.rating = 1),
+        rating_2 = rating_2 - (r.rating = 2),
+        rating_3 = rating_3 - (r.rating = 3),
+        rating_4 = rating_4 - (r.rating = 4),
+        rating_5 = rating_5 - (r.rating = 5),
+        positive = positive - (r.sentiment = 'Positive'),
+        neutral = neutral - (r.sentiment = 'Neutral'),
+        negative = negative - (r.sentiment = 'Negative')
+    FROM (SELECT COALESCE(rating, 0) AS rating, COALESCE(sentiment, '') AS sentiment
+          FROM reviews WHERE origin = old.origin AND id = old.review_id) AS r
+    WHERE station_id = old.station_id;
+END;
+-- A tagged review re-rated or re-scored in place (e.g. a sentiment backfill)
+CREATE TRIGGER reviews_au_summary AFTER UPDATE OF rating, sentiment ON reviews BEGIN
+    UPDATE station_summaries SET
+        rating_sum = rating_sum - COALESCE(old.rating, 0) + COALESCE(new.rating, 0),
+        rating_count = rating_count - (COALESCE(old.rating, 0) > 0) + (COALESCE(new.rating, 0) > 0),
+        rating_1 = rating_1 - (old.rating = 1) + (new.rating = 1),
+        rating_2 = rating_2 - (old.rating = 2) + (new.rating = 2),
+        rating_3 = rating_3 - (old.rating = 3) + (new.rating = 3),
+        rating_4 = rating_4 - (old.rating = 4) + (new.rating = 4),
+        rating_5 = rating_5 - (old.rating = 5) + (new.rating = 5),
+        positive = positive - (COALESCE(old.sentiment, '') = 'Positive') + (COALESCE(new.sentiment, '') = 'Positive'),
+        neutral = neutral - (COALESCE(old.sentiment, '') = 'Neutral') + (COALESCE(new.sentiment, '') = 'Neutral'),
+        negative = negative - (COALESCE(old.sentiment, '') = 'Negative') + (COALESCE(new.sentiment, '') = 'Negative')
+    WHERE station_id IN (SELECT station_id FROM review_stations
+                         WHERE origin = new.origin AND review_id = new.id);
+END;
+"""
+
+
+# Sentiment stored per review, a content-hash cache so identical
+# text is only ever scored once, and per-origin label totals
+SENTIMENT_SCHEMA = """
+ALTER TABLE reviews ADD COLUMN sentiment_score REAL;
+CREATE INDEX IF NOT EXISTS idx_reviews_unscored ON reviews(origin) WHERE sentiment IS NULL;
+
+CREATE TABLE IF NOT EXISTS sentiment_cache (
+    hash  TEXT PRIMARY KEY,             -- nlp_sentiment.content_hash()
+    label TEXT NOT NULL,
+    score REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS sentiment_totals (
+    origin       TEXT NOT NULL,
+    label        TEXT NOT NULL,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    score_sum    REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (origin, label)
+) WITHOUT ROWID;
+
+CREATE TRIGGER reviews_ai_sentiment AFTER INSERT ON reviews WHEN new.sentiment IS NOT NULL BEGIN
+    INSERT INTO sentiment_totals(origin, label, review_count, score_sum)
+    VALUES (new.origin, new.sentiment, 1, COALESCE(new.sentiment_score, 0))
+    ON CONFLICT(origin, label) DO UPDATE SET
+        review_count = review_count + 1, score_sum = score_sum + excluded.score_sum;
+END;
+CREATE TRIGGER reviews_ad_sentiment AFTER DELETE ON reviews WHEN old.sentiment IS NOT NULL BEGIN
+    UPDATE sentiment_totals SET
+        review_count = review_count - 1, score_sum = score_sum - COALESCE(old.sentiment_score, 0)
+    WHERE origin = old.origin AND label = old.sentiment;
+END;
+CREATE TRIGGER reviews_au_sentiment AFTER UPDATE OF sentiment, sentiment_score ON reviews BEGIN
+    UPDATE sentiment_totals SET
+        review_count = review_count - 1, score_sum = score_sum - COALESCE(old.sentiment_score, 0)
+    WHERE old.sentiment IS NOT NULL AND origin = old.origin AND label = old.sentiment;
+    INSERT INTO sentiment_totals(origin, label, review_count, score_sum)
+    SELECT new.origin, new.sentiment, 1, COALESCE(new.sentiment_score, 0)
+    WHERE new.sentiment IS NOT NULL
+    ON CONFLICT(origin, label) DO UPDATE SET
+        review_count = review_count + 1, score_sum = score_sum + excluded.score_sum;
+END;
+"""
+
+
+# Scraped reviews get content-derived ids (scraped_review_id); source
+# URLs are remembered too so an edited post is not ingested twice
+INGEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scraped_urls (
+    url       TEXT PRIMARY KEY,
+    review_id TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _fts5_supported():
+    try:
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        conn.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+FTS5_AVAILABLE = _fts5_supported()
+
+
+# ==================================================
+# CONNECTIONS
+# ==================================================
+# One connection per thread (Streamlit runs each session
+# in its own thread); WAL lets readers and the writer overlap.
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+def get_connection(db_file=None):
+    """Get this thread's connection to the review database."""
+    db_file = db_file or DB_FILE
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_file)
+    if conn is None:
+        conn = sqlite3.connect(db_file, timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conns[db_file] = conn
+        _initialize(conn, db_file)
+    return conn
+
+
+def _forget_connections():
+    """A forked child (e.g. a refresh_daemon job) opens its own connections."""
+    _local.__dict__.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_connections)
+
+
+def _initialize(conn, db_file):
+    """Create/upgrade the schema and import JSON once per database file."""
+    with _init_lock:
+        if db_file in _initialized:
+            return
+        migrate(conn)
+        if db_file == DB_FILE:
+            import_user_json(conn=conn)
+        # Unscored rows are left to sentiment_backfill --missing (process
+        # pool); scoring them here would block whoever opened the store
+        _initialized.add(db_file)
+
+
+# ---------------- MIGRATIONS ----------------
+# PRAGMA user_version records the schema version; each step
+# runs once, in order, in its own transaction.
+
+def _run_script(conn, script):
+    """Run SQL statements one by one (executescript would COMMIT)."""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        if line.lstrip().startswith("--"):
+            continue
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+
+
+def _migrate_v1(conn):
+    _run_script(conn, SCHEMA)
+    if FTS5_AVAILABLE:
+        _run_script(conn, FTS_SCHEMA)
+
+
+def _migrate_v2(conn):
+    _run_script(conn, STATIONS_SCHEMA)
+    # Tag reviews stored before station postings existed
+    rows = conn.execute("SELECT origin, id, subject, comment FROM reviews").fetchall()
+    conn.executemany(
+        "INSERT OR IGNORE INTO review_stations(station_id, origin, review_id) VALUES (?, ?, ?)",
+        [(sid, row["origin"], row["id"]) for row in rows for sid in _tag(row["subject"], row["comment"])])
+
+
+def _migrate_v3(conn):
+    _run_script(conn, SUMMARY_SCHEMA)
+    # Rebuild from the postings so the histograms cover existing reviews
+    rows = conn.execute("SELECT * FROM review_stations").fetchall()
+    conn.execute("DELETE FROM review_stations")
+    conn.executemany("INSERT INTO review_stations VALUES (?, ?, ?)", [tuple(row) for row in rows])
+    _refresh_top_reviews(conn, {row["station_id"] for row in rows})
+
+
+def _migrate_v4(conn):
+    # Existing rows are scored afterwards by sentiment_backfill --missing
+    _run_script(conn, SENTIMENT_SCHEMA)
+
+
+def _migrate_v5(conn):
+    _run_script(conn, INGEST_SCHEMA)
+    # Scraped rows with positional ids are re-imported under stable ids
+    # by the next sync_scraped_json()
+    keys = [tuple(row) for row in conn.execute(
+        "SELECT origin, id FROM reviews WHERE origin = 'scraped' AND id NOT LIKE 's-%'")]
+    touched = _stations_of(conn, keys)
+    conn.executemany("DELETE FROM reviews WHERE origin = ? AND id = ?", keys)
+    conn.execute("DELETE FROM meta WHERE key = 'scraped_json_mtime'")
+    _refresh_top_reviews(conn, touched)
+
+
+MIGRATIONS = [_migrate_v1, _migrate_v2, _migrate_v3, _migrate_v4, _migrate_v5]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn):
+    """Bring a database up to SCHEMA_VERSION."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            MIGRATIONS[target - 1](conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def _get_meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row["value"] if row else None
+
+
+def _set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, str(value)))
+
+
+# ==================================================
+# WRITES
+# ==================================================
+
+def _row_values(review, origin, synced, sentiment=(None, None)):
+    return (
+        origin,
+        str(review.get('id')),
+        review.get('category'),
+        review.get('subject'),
+        int(review.get('rating') or 0),
+        review.get('comment') or review.get('text'),
+        review.get('username'),
+        review.get('timestamp'),
+        review.get('source'),
+        review.get('type'),
+        1 if synced else 0,
+        *sentiment,
+    )
+
+
+# ---------------- SENTIMENT ----------------
+
+def _given_sentiment(review):
+    """(label, score) already attached to a review, if any."""
+    sentiment = review.get('sentiment')
+    if isinstance(sentiment, dict) and sentiment.get('label'):
+        return sentiment['label'], sentiment.get('score')
+    return None
+
+
+def score_texts(texts, conn=None):
+    """
+    (label, score) for each text, scoring only texts whose content
+    hash is not in the persistent cache yet. (None, None) without VADER.
+    """
+    if not SENTIMENT_AVAILABLE:
+        return [(None, None)] * len(texts)
+    conn = conn or get_connection()
+    hashes = [nlp_sentiment.content_hash(text) for text in texts]
+
+    known = {}
+    unique = list(set(hashes))
+    for i in range(0, len(unique), 500):
+        chunk = unique[i:i + 500]
+        rows = conn.execute(
+            f"SELECT hash, label, score FROM sentiment_cache WHERE hash IN ({','.join('?' * len(chunk))})",
+            chunk)
+        known.update((row["hash"], (row["label"], row["score"])) for row in rows)
+
+    new = {}
+    for text, key in zip(texts, hashes):
+        if key not in known and key not in new:
+            result = nlp_sentiment.analyze_sentiment(text)
+            new[key] = (result["label"], result["score"])
+    if new:
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO sentiment_cache(hash, label, score) VALUES (?, ?, ?)",
+                             [(key, label, score) for key, (label, score) in new.items()])
+        known.update(new)
+    return [known[key] for key in hashes]
+
+
+def _tag(subject, comment):
+    """Station ids a review is about (subject first, then comment)."""
+    return find_stations(f"{subject or ''} \n {comment or ''}")
+
+
+def _prepare_rows(reviews, origin, synced, conn, score):
+    """Row values and station postings for reviews (scored first if asked)."""
+    reviews = list(reviews)
+    given = [_given_sentiment(r) for r in reviews]
+    unscored = [i for i, sentiment in enumerate(given) if sentiment is None]
+    texts = [reviews[i].get('comment') or reviews[i].get('text') or "" for i in unscored]
+    for i, sentiment in zip(unscored, score_texts(texts, conn=conn) if score else []):
+        given[i] = sentiment
+    rows = [_row_values(r, origin, synced, sentiment or (None, None))
+            for r, sentiment in zip(reviews, given)]
+    postings = [(sid, origin, row[1]) for row in rows for sid in _tag(row[3], row[5])]
+    return rows, postings
+
+
+def _upsert_rows(conn, origin, rows, postings, touched=()):
+    """Write prepared rows inside the caller's transaction."""
+    keys = [(origin, row[1]) for row in rows]
+    touched = set(touched) | {posting[0] for posting in postings} | _stations_of(conn, keys)
+    # Untag first so the summary triggers subtract the old rating
+    conn.executemany("DELETE FROM review_stations WHERE origin = ? AND review_id = ?", keys)
+    conn.executemany("""
+        INSERT INTO reviews (origin, id, category, subject, rating, comment,
+                             username, timestamp, source, type, synced,
+                             sentiment, sentiment_score)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(origin, id) DO UPDATE SET
+            category = excluded.category, subject = excluded.subject,
+            rating = excluded.rating, comment = excluded.comment,
+            username = excluded.username, timestamp = excluded.timestamp,
+            source = excluded.source, type = excluded.type,
+            synced = MAX(synced, excluded.synced),
+            sentiment = COALESCE(excluded.sentiment, sentiment),
+            sentiment_score = COALESCE(excluded.sentiment_score, sentiment_score)
+    """, rows)
+    conn.executemany(
+        "INSERT OR IGNORE INTO review_stations(station_id, origin, review_id) VALUES (?, ?, ?)",
+        postings)
+    _refresh_top_reviews(conn, touched)
+
+
+def add_reviews(reviews, origin="user", synced=False, conn=None, score=True):
+    """
+    Insert reviews, updating any with the same id, and tag them with
+    the stations they mention. Returns the count. With score=False
+    sentiment is left for a later backfill.
+    """
+    conn = conn or get_connection()
+    rows, postings = _prepare_rows(reviews, origin, synced, conn, score)
+    with conn:
+        _upsert_rows(conn, origin, rows, postings)
+    return len(rows)
+
+
+def mirror_reviews(reviews, origin="user", conn=None):
+    """
+    Make the synced reviews of origin match a full read of their source
+    (the Google Sheet): upsert `reviews` and delete synced rows that are
+    no longer there, in one transaction. Unsynced rows are kept - they
+    haven't been written out yet. Returns (written, deleted).
+    """
+    conn = conn or get_connection()
+    rows, postings = _prepare_rows(reviews, origin, True, conn, True)
+    present = {row[1] for row in rows}
+    with conn:
+        gone = [(origin, row[0]) for row in conn.execute(
+            "SELECT id FROM reviews WHERE origin = ? AND synced = 1", (origin,)) if row[0] not in present]
+        touched = _stations_of(conn, gone)
+        conn.executemany("DELETE FROM reviews WHERE origin = ? AND id = ?", gone)
+        _upsert_rows(conn, origin, rows, postings, touched)
+    return len(rows), len(gone)
+
+
+def write_sentiments(results, conn=None):
+    """
+    Bulk-store scored sentiment: results are (origin, id, hash, label, score).
+    One transaction; station top-3 lists are left to refresh_summaries().
+    """
+    conn = conn or get_connection()
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO sentiment_cache(hash, label, score) VALUES (?, ?, ?)",
+                         [(key, label, score) for _, _, key, label, score in results])
+        conn.executemany(
+            "UPDATE reviews SET sentiment = ?, sentiment_score = ? WHERE origin = ? AND id = ?",
+            [(label, score, origin, review_id) for origin, review_id, _, label, score in results])
+
+
+def refresh_summaries(station_ids=None, conn=None):
+    """Recompute stored top-3 lists (all stations by default)."""
+    conn = conn or get_connection()
+    if station_ids is None:
+        station_ids = [row[0] for row in conn.execute("SELECT station_id FROM station_summaries")]
+    with conn:
+        _refresh_top_reviews(conn, station_ids)
+
+
+def _stations_of(conn, keys):
+    """Stations the given (origin, id) reviews are currently tagged with."""
+    stations = set()
+    for key in keys:
+        stations.update(row[0] for row in conn.execute(
+            "SELECT station_id FROM review_stations WHERE origin = ? AND review_id = ?", key))
+    return stations
+
+
+def _refresh_top_reviews(conn, station_ids):
+    """Recompute the stored top-3 user/scraped lists of the given stations."""
+    updates = []
+    for sid in station_ids:
+        tops = []
+        for origin in ("user", "scraped"):
+            rows = conn.execute("""
+                SELECT r.* FROM review_stations s
+                JOIN reviews r ON r.origin = s.origin AND r.id = s.review_id
+                WHERE s.station_id = ? AND s.origin = ?
+                ORDER BY r.timestamp DESC LIMIT ?
+            """, (sid, origin, TOP_REVIEWS))
+            tops.append(json.dumps([_to_dict(row) for row in rows], ensure_ascii=False))
+        updates.append((*tops, sid))
+    conn.executemany(
+        "UPDATE station_summaries SET top_user = ?, top_scraped = ? WHERE station_id = ?", updates)
+
+
+# ---------------- SCRAPED POSTS ----------------
+
+def scraped_review_id(text):
+    """Stable id for a scraped post: hash of its whitespace/case-folded text."""
+    normalized = " ".join((text or "").split()).lower()
+    return "s-" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def known_scraped(ids, urls, conn=None):
+    """The subset of scraped review ids and source URLs already stored."""
+    conn = conn or get_connection()
+    ids, urls = list(set(ids)), list(set(url for url in urls if url))
+    found_ids, found_urls = set(), set()
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        found_ids.update(row[0] for row in conn.execute(
+            f"SELECT id FROM reviews WHERE origin = 'scraped' AND id IN ({','.join('?' * len(chunk))})",
+            chunk))
+    for i in range(0, len(urls), 500):
+        chunk = urls[i:i + 500]
+        found_urls.update(row[0] for row in conn.execute(
+            f"SELECT url FROM scraped_urls WHERE url IN ({','.join('?' * len(chunk))})", chunk))
+    return found_ids, found_urls
+
+
+def add_scraped_urls(pairs, conn=None):
+    """Remember (url, review_id) pairs of ingested posts."""
+    conn = conn or get_connection()
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO scraped_urls(url, review_id) VALUES (?, ?)",
+                         [(url, review_id) for url, review_id in pairs if url])
+
+
+def add_review(review, origin="user", synced=False):
+    """Insert a single review."""
+    add_reviews([review], origin=origin, synced=synced)
+    return review
+
+
+def mark_synced(ids, origin="user"):
+    """Record that reviews have reached Google Sheets."""
+    conn = get_connection()
+    with conn:
+        conn.executemany("UPDATE reviews SET synced = 1 WHERE origin = ? AND id = ?",
+                         [(origin, str(i)) for i in ids])
+
+
+# ==================================================
+# READS
+# ==================================================
+
+def _to_dict(row):
+    review = {field: row[field] for field in REVIEW_FIELDS}
+    if review['type'] is None:
+        del review['type']
+    if SENTIMENT_AVAILABLE and "sentiment_score" in row.keys() and row["sentiment"]:
+        review['sentiment'] = nlp_sentiment.sentiment_result(row["sentiment_score"] or 0.0)
+    return review
+
+
+def get_reviews(origin=None, source=None, limit=None):
+    """Reviews, newest first, optionally filtered by origin/source."""
+    sql = "SELECT * FROM reviews"
+    clauses, params = [], []
+    if origin:
+        clauses.append("origin = ?")
+        params.append(origin)
+    if source:
+        clauses.append("source = ?")
+        params.append(source)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY timestamp DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [_to_dict(row) for row in get_connection().execute(sql, params)]
+
+
+def unsynced_reviews(origin="user"):
+    """Reviews not yet written to Google Sheets."""
+    rows = get_connection().execute(
+        "SELECT * FROM reviews WHERE origin = ? AND synced = 0 ORDER BY timestamp", (origin,))
+    return [_to_dict(row) for row in rows]
+
+
+def _fts_query(text):
+    """Quote each word so user text can't break FTS syntax."""
+    words = [w.replace('"', '') for w in text.split()]
+    return " ".join(f'"{w}"' for w in words if w)
+
+
+def search_reviews(text, limit=20):
+    """Full-text search over comments and subjects, best match first."""
+    conn = get_connection()
+    if FTS5_AVAILABLE:
+        query = _fts_query(text)
+        if not query:
+            return []
+        rows = conn.execute("""
+            SELECT reviews.* FROM reviews_fts
+            JOIN reviews ON reviews.rowid = reviews_fts.rowid
+            WHERE reviews_fts MATCH ? ORDER BY rank LIMIT ?
+        """, (query, limit))
+    else:
+        pattern = f"%{text}%"
+        rows = conn.execute("""
+            SELECT * FROM reviews WHERE comment LIKE ? OR subject LIKE ?
+            ORDER BY timestamp DESC LIMIT ?
+        """, (pattern, pattern, limit))
+    return [_to_dict(row) for row in rows]
+
+
+def reviews_for_subject(subject, include_comments=True):
+    """Reviews whose subject (or comment text) mentions subject."""
+    query = _fts_query(subject or "")
+    if not query:
+        return []
+    conn = get_connection()
+    pattern = f"%{subject}%"
+    if not include_comments:
+        rows = conn.execute(
+            "SELECT * FROM reviews WHERE subject LIKE ? ORDER BY timestamp DESC", (pattern,))
+    elif FTS5_AVAILABLE:
+        rows = conn.execute("""
+            SELECT * FROM reviews WHERE subject LIKE ?
+            UNION
+            SELECT reviews.* FROM reviews_fts
+            JOIN reviews ON reviews.rowid = reviews_fts.rowid
+            WHERE reviews_fts MATCH ?
+            ORDER BY timestamp DESC
+        """, (pattern, f"comment:({query})"))
+    else:
+        rows = conn.execute("""
+            SELECT * FROM reviews WHERE subject LIKE ? OR comment LIKE ?
+            ORDER BY timestamp DESC
+        """, (pattern, pattern))
+    return [_to_dict(row) for row in rows]
+
+
+# ---------------- STATION SUMMARIES ----------------
+# Decoded summaries are cached per connection (so per thread) and
+# dropped as soon as the database changes: PRAGMA data_version moves
+# when another connection or process commits, total_changes when
+# this connection writes.
+
+def _summary_cache(conn):
+    """This connection's decoded summaries, emptied if the database changed."""
+    stamp = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+    caches = getattr(_local, "summaries", None)
+    if caches is None:
+        caches = _local.summaries = {}
+    cached_stamp, cache = caches.get(conn, (None, None))
+    if cached_stamp != stamp:
+        cache = {}
+        caches[conn] = (stamp, cache)
+    return cache
+
+
+def _load_summary(conn, station_id):
+    row = conn.execute(
+        "SELECT * FROM station_summaries WHERE station_id = ?", (station_id,)).fetchone()
+    if not row or not row["review_count"]:
+        return None
+    return {
+        "review_count": row["review_count"],
+        "user_count": row["user_count"],
+        "rating_sum": row["rating_sum"],
+        "rating_count": row["rating_count"],
+        "average": row["rating_sum"] / row["rating_count"] if row["rating_count"] else None,
+        "ratings": {stars: row[f"rating_{stars}"] for stars in range(1, 6)},
+        "sentiment": {"Positive": row["positive"], "Neutral": row["neutral"],
+                      "Negative": row["negative"]},
+        "top_user": json.loads(row["top_user"]),
+        "top_scraped": json.loads(row["top_scraped"]),
+    }
+
+
+def station_summary(station_id, conn=None):
+    """
+    Materialized review summary for a station (no scan):
+    {'review_count', 'user_count', 'rating_sum', 'rating_count', 'average',
+     'ratings' {1..5: n}, 'sentiment' {label: n}, 'top_user', 'top_scraped'}
+    None if the station has no reviews (not cached).
+    """
+    conn = conn or get_connection()
+    cache = _summary_cache(conn)
+    if station_id in cache:
+        return cache[station_id]
+    summary = _load_summary(conn, station_id)
+    if summary is not None:
+        cache[station_id] = summary
+    return summary
+
+
+def station_reviews(station_id, limit=None, users_first=False):
+    """Reviews tagged with a station, newest first (user reviews first if asked)."""
+    order = "(r.source = 'user') DESC, r.timestamp DESC" if users_first else "r.timestamp DESC"
+    sql = f"""
+        SELECT r.* FROM review_stations s
+        JOIN reviews r ON r.origin = s.origin AND r.id = s.review_id
+        WHERE s.station_id = ? ORDER BY {order}
+    """
+    params = [station_id]
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [_to_dict(row) for row in get_connection().execute(sql, params)]
+
+
+def sentiment_totals(origin=None):
+    """Precomputed sentiment counts for get_sentiment_summary(counts=...)."""
+    sql, params = "SELECT label, SUM(review_count), SUM(score_sum) FROM sentiment_totals", ()
+    if origin:
+        sql, params = sql + " WHERE origin = ?", (origin,)
+    totals = {"positive": 0, "neutral": 0, "negative": 0, "score_sum": 0.0}
+    for label, count, score_sum in get_connection().execute(sql + " GROUP BY label", params):
+        if label.lower() in totals:
+            totals[label.lower()] = count
+            totals["score_sum"] += score_sum
+    return totals
+
+
+def count_reviews(origin=None):
+    sql, params = "SELECT COUNT(*) FROM reviews", ()
+    if origin:
+        sql, params = sql + " WHERE origin = ?", (origin,)
+    return get_connection().execute(sql, params).fetchone()[0]
+
+
+# ==================================================
+# JSON IMPORT
+# ==================================================
+
+def import_user_json(path=USER_REVIEWS_FILE, conn=None):
+    """Import user_reviews.json once (ids already present are updated)."""
+    conn = conn or get_connection()
+    if _get_meta(conn, "user_json_imported") or not os.path.exists(path):
+        return 0
+    with open(path, 'r', encoding='utf-8') as f:
+        reviews = json.load(f).get('reviews', [])
+    count = add_reviews(reviews, origin="user", conn=conn)
+    with conn:
+        _set_meta(conn, "user_json_imported", path)
+    return count
+
+
+def sync_scraped_json(path=SCRAPED_REVIEWS_FILE):
+    """
+    Import scraped_reviews.json when the file has changed (cheap stat
+    otherwise). Rows get stable content ids, so re-imports and posts
+    already ingested by review_ingest are updated, not duplicated.
+    """
+    if not os.path.exists(path):
+        return 0
+    conn = get_connection()
+    mtime = str(os.path.getmtime(path))
+    if _get_meta(conn, "scraped_json_mtime") == mtime:
+        return 0
+
+    with open(path, 'r', encoding='utf-8') as f:
+        reviews = json.load(f).get('reviews', [])
+    reviews = [dict(review, id=scraped_review_id(review.get('comment'))) for review in reviews]
+    count = add_reviews(reviews, origin="scraped", synced=True, conn=conn)
+    with conn:
+        _set_meta(conn, "scraped_json_mtime", mtime)
+    return count
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    import time
+
+    print(f"FTS5 available: {FTS5_AVAILABLE}")
+    print(f"Imported scraped reviews: {sync_scraped_json()}")
+    print(f"User reviews: {count_reviews('user')}, scraped: {count_reviews('scraped')}")
+
+    for sid in ["dadar", "andheri", "csmt"]:
+        summary = station_summary(sid) or {}
+        print(f"{sid}: {summary.get('review_count', 0)} reviews, "
+              f"ratings {summary.get('ratings')}, sentiment {summary.get('sentiment')}")
+
+    print(f"Sentiment totals: {sentiment_totals()}")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        station_summary("dadar")
+    print(f"1000 summary reads: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    for subject in ["Dadar", "Andheri", "Mumbai Local"]:
+        start = time.perf_counter()
+        found = reviews_for_subject(subject)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Reviews for {subject}: {len(found)} ({elapsed:.2f} ms)")
+
+    for review in search_reviews("crowded train", limit=3):
+        print(f"- [{review['source']}] {review['comment'][:80]}")
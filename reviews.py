@@ -1,21 +1,24 @@
 # ==================================================
 # Mumbai Local Train - Review System
 # ==================================================
-# 1. User-submitted reviews (stored in JSON)
+# 1. User-submitted reviews (stored in SQLite, see review_store)
 # 2. Google Maps station reviews (scraped)
 # 3. Twitter/X posts about trains (scraped)
 # ==================================================
 
 import json
 import os
-import requests
+from http_cache import cached_get, get_shared_cache
 from bs4 import BeautifulSoup
 from datetime import datetime
 import re
 
+import review_store
+from review_queue import new_review_id
+from station_registry import station_id
+
 # ---------------- FILE PATHS ----------------
 BASE_DIR = os.path.dirname(__file__)
-USER_REVIEWS_FILE = os.path.join(BASE_DIR, "user_reviews.json")
 SCRAPED_REVIEWS_FILE = os.path.join(BASE_DIR, "scraped_reviews.json")
 
 
@@ -24,25 +27,19 @@ SCRAPED_REVIEWS_FILE = os.path.join(BASE_DIR, "scraped_reviews.json")
 # ==================================================
 
 def load_user_reviews():
-    """Load user reviews from JSON file."""
-    if os.path.exists(USER_REVIEWS_FILE):
-        with open(USER_REVIEWS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {"reviews": []}
+    """Load user reviews from the review store."""
+    return {"reviews": review_store.get_reviews(origin="user")}
 
 
 def save_user_reviews(data):
-    """Save user reviews to JSON file."""
-    with open(USER_REVIEWS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    """Save user reviews to the review store (existing ids are updated)."""
+    review_store.add_reviews(data["reviews"], origin="user")
 
 
 def add_user_review(category, subject, rating, comment, username="Anonymous"):
     """Add a new user review."""
-    data = load_user_reviews()
-
     review = {
-        "id": len(data["reviews"]) + 1,
+        "id": new_review_id(),
         "category": category,  # station, route, line, general
         "subject": subject,    # e.g., "Andheri Station", "Thane to CSMT"
         "rating": rating,      # 1-5
@@ -51,29 +48,16 @@ def add_user_review(category, subject, rating, comment, username="Anonymous"):
         "timestamp": datetime.now().isoformat(),
         "source": "user"
     }
-
-    data["reviews"].append(review)
-    save_user_reviews(data)
-    return review
+    return review_store.add_review(review)
 
 
 def get_reviews_for(subject):
-    """Get reviews for a specific station/route."""
-    data = load_user_reviews()
-    subject_lower = subject.lower()
-
-    matching = []
-    for review in data["reviews"]:
-        if subject_lower in review["subject"].lower():
-            matching.append(review)
-
-    # Also check scraped reviews
-    scraped = load_scraped_reviews()
-    for review in scraped.get("reviews", []):
-        if subject_lower in review.get("subject", "").lower():
-            matching.append(review)
-
-    return matching
+    """Get reviews for a specific station/route (user + scraped)."""
+    review_store.sync_scraped_json()
+    sid = station_id(subject)
+    if sid:
+        return review_store.station_reviews(sid)
+    return review_store.reviews_for_subject(subject, include_comments=False)
 
 
 def get_average_rating(subject):
@@ -148,7 +132,7 @@ def scrape_twitter_posts(query="Mumbai local train", limit=10):
             search_url = f"{nitter_url}/search?f=tweets&q={query.replace(' ', '+')}"
             headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
 
-            response = requests.get(search_url, headers=headers, timeout=15)
+            response = cached_get(search_url, headers=headers, timeout=15)
 
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
@@ -190,7 +174,7 @@ def scrape_railway_twitter():
             nitter_url = f"https://nitter.net/{account}"
             headers = {'User-Agent': 'Mozilla/5.0'}
 
-            response = requests.get(nitter_url, headers=headers, timeout=15)
+            response = cached_get(nitter_url, headers=headers, timeout=15)
 
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
@@ -228,7 +212,7 @@ def scrape_train_news():
         url = f"https://news.google.com/search?q={query.replace(' ', '+')}&hl=en-IN&gl=IN"
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
 
-        response = requests.get(url, headers=headers, timeout=15)
+        response = cached_get(url, headers=headers, timeout=15)
 
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -293,6 +277,7 @@ def update_scraped_data():
     save_scraped_reviews(data)
 
     print(f"\nUpdated: {len(twitter_posts)} tweets, {len(news)} news items")
+    print(f"HTTP cache: {get_shared_cache()[0].report()}")
     return data
 
 
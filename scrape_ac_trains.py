@@ -6,7 +6,7 @@
 # - mumbailocaltrain.com (Central Railway)
 # ==================================================
 
-import requests
+from http_cache import cached_get, get_shared_cache
 from bs4 import BeautifulSoup
 import pandas as pd
 import re
@@ -21,7 +21,7 @@ def scrape_western_railway_ac():
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        response = cached_get(url, headers=headers, timeout=30)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, 'html.parser')
 
@@ -98,7 +98,7 @@ def scrape_central_railway_ac():
 
     for url, default_src, default_dst in urls:
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = cached_get(url, headers=headers, timeout=30)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'html.parser')
 
@@ -201,6 +201,7 @@ def main():
         print(f"  - Central Railway: {len(cr_trains)}")
         print(f"  - Harbour Line: {len(hr_trains)}")
         print("Saved to 'mumbai_ac_trains.csv'")
+        print(f"HTTP cache: {get_shared_cache()[0].report()}")
         print("=" * 50)
     else:
         print("\nNo data scraped. Check your internet connection.")
@@ -5,355 +5,237 @@
 # Sources:
 # - go4mumbai.com (Western Railway)
 # - mumbailifeline.com (Central Railway)
+# Routes are fetched concurrently (scrape_http.Fetcher)
+# through the on-disk HTTP cache, so unchanged pages are
+# neither downloaded nor parsed again; results are applied
+# to the CSVs as a row-level diff (timetable_refresh.py);
+# pages are read by the streaming extractor in
+# timetable_extract.py; fake_railway_site.py serves the
+# same pages offline.
 # ==================================================
 
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
+import os
 import re
 import time
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-}
+from http_cache import HttpCache
+from scrape_http import Fetcher
+from timetable_build import ARTIFACT_FILE, REPORT_FILE, build as build_timetable, summary
+from timetable_extract import PARSER_VERSION, extract_ac_trains, extract_timetable, train_dict
+from timetable_refresh import CHANGES_FILE, describe, refresh_timetable
 
+LIFELINE_URL = "https://www.mumbailifeline.com"
+GO4MUMBAI_URL = "https://go4mumbai.com"
 
-def scrape_western_railway():
-    """Scrape Western Railway trains from mumbailifeline.com and go4mumbai.com"""
-    print("\n[Western Railway] Scraping from mumbailifeline.com...")
-
-    all_trains = []
+# Key stations for mid-route queries: terminals + major interchanges
+WESTERN_STATIONS = ["CHURCHGATE", "DADAR", "BANDRA", "ANDHERI", "BORIVALI", "VIRAR"]
+CENTRAL_STATIONS = ["Mumbai_CST", "Dadar", "Kurla", "Ghatkopar", "Thane", "Dombivli", "Kalyan"]
+HARBOUR_STATIONS = ["Mumbai_CST", "Kurla", "Vashi", "Belapur", "Panvel"]
 
-    # Key stations for mid-route queries
-    # Include terminal + major interchange stations
-    key_stations = ["CHURCHGATE", "DADAR", "BANDRA", "ANDHERI", "BORIVALI", "VIRAR"]
 
-    # Generate route combinations (both directions)
-    routes = []
-    for i, src in enumerate(key_stations):
-        for dst in key_stations:
-            if src != dst:
-                routes.append((src, dst))
+# ==================================================
+# PARSING
+# ==================================================
 
-    print(f"[Western Railway] Scraping {len(routes)} route combinations...")
+def _lifeline_name(name):
+    """mumbailifeline's CR/HR station names -> ours."""
+    return name.replace('_', ' ').replace('Cst', 'CSMT').replace('Mumbai Cst', 'CSMT')
 
-    for src, dst in routes:
-        url = f"https://www.mumbailifeline.com/timetable.php?sel_route=western&sfrom={src}&sto={dst}&time1=04:00+AM&time2=11:59+PM&Submit=Submit"
 
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=30)
-            soup = BeautifulSoup(response.text, 'html.parser')
+def _spaced(name):
+    return name.replace('_', ' ')
 
-            tables = soup.find_all('table')
 
-            for table in tables:
-                rows = table.find_all('tr')
-                if len(rows) < 10:
-                    continue
+def parse_timetable(html, line, clean_source, clean_dest):
+    """Trains from a mumbailifeline.com timetable.php result page."""
+    return [train_dict(row) for row in extract_timetable(html, line, clean_source, clean_dest)]
 
-                header = rows[0].find_all(['td', 'th'])
-                header_text = [h.get_text(strip=True).lower() for h in header]
 
-                if 'train' not in ' '.join(header_text) and 'speed' not in ' '.join(header_text):
-                    continue
+def parse_ac_trains(html):
+    """Western AC trains from go4mumbai.com/ac-trains.php."""
+    return [train_dict(row) for row in extract_ac_trains(html)]
 
-                for row in rows[1:]:
-                    cols = row.find_all('td')
-                    if len(cols) < 6:
-                        continue
 
-                    train_no = cols[0].get_text(strip=True)
-                    speed = cols[1].get_text(strip=True).upper()
-                    origin = cols[3].get_text(strip=True)
-                    dest_station = cols[4].get_text(strip=True)
-                    time_str = cols[5].get_text(strip=True)
+def _unique(trains):
+    """Drop duplicate (time, source, dest) entries, keeping the first."""
+    seen = set()
+    unique_trains = []
+    for t in trains:
+        key = (t['time'], t['source'], t['dest'])
+        if key not in seen:
+            seen.add(key)
+            unique_trains.append(t)
+    return unique_trains
 
-                    if 'train' in train_no.lower() or not time_str:
-                        continue
 
-                    is_ac = 'AC' in train_no.upper()
-                    train_type = f"AC {speed}" if is_ac else speed
+# ==================================================
+# SCRAPING
+# ==================================================
+# Every route of a line is fetched concurrently through one
+# pooled session (rate-limited per host, retried with jitter);
+# pages are parsed as they arrive and assembled in route order
+# so the output doesn't depend on which response came first.
+
+def _route_pairs(key_stations):
+    """All ordered (src, dst) pairs, both directions."""
+    return [(src, dst) for src in key_stations for dst in key_stations if src != dst]
+
+
+def scrape_line(label, route, line, key_stations, clean_source, clean_dest,
+                fetcher=None, base_url=LIFELINE_URL):
+    """Scrape every key-station pair of one mumbailifeline.com route."""
+    own_fetcher = fetcher is None
+    fetcher = fetcher or Fetcher()
+    routes = _route_pairs(key_stations)
+    print(f"[{label}] Scraping {len(routes)} route combinations...")
+
+    urls = {
+        (src, dst): f"{base_url}/timetable.php?sel_route={route}&sfrom={src}&sto={dst}"
+                    f"&time1=04:00+AM&time2=11:59+PM&Submit=Submit"
+        for src, dst in routes
+    }
+    parse = lambda response: parse_timetable(response.text, line, clean_source, clean_dest)
+
+    by_route = {}
+    try:
+        for (src, dst), result in fetcher.fetch_all(urls, parse, parse_key=f"timetable-{line}-v{PARSER_VERSION}"):
+            if isinstance(result, Exception):
+                print(f"[{label}] Error scraping {src} to {dst}: {result}")
+            else:
+                by_route[(src, dst)] = result
+    finally:
+        if own_fetcher:
+            fetcher.close()
 
-                    time_str = time_str.replace('\n', '').strip()
+    return [train for pair in routes for train in by_route.get(pair, [])]
 
-                    all_trains.append({
-                        'line': 'WR',
-                        'time': time_str,
-                        'source': origin.title(),
-                        'dest': dest_station.title(),
-                        'type': train_type,
-                        'is_ac': is_ac
-                    })
 
-            time.sleep(0.5)
+def scrape_western_railway(fetcher=None, base_url=LIFELINE_URL, ac_base_url=GO4MUMBAI_URL):
+    """Scrape Western Railway trains from mumbailifeline.com and go4mumbai.com"""
+    print("\n[Western Railway] Scraping from mumbailifeline.com...")
+    own_fetcher = fetcher is None
+    fetcher = fetcher or Fetcher()
 
-        except Exception as e:
-            print(f"[Western Railway] Error scraping {src} to {dst}: {e}")
+    all_trains = scrape_line("Western Railway", "western", "WR", WESTERN_STATIONS,
+                             str.title, str.title, fetcher, base_url)
 
     # Also scrape AC trains from go4mumbai.com
     print("[Western Railway] Adding AC trains from go4mumbai.com...")
-    ac_url = "https://go4mumbai.com/ac-trains.php"
-
     try:
-        response = requests.get(ac_url, headers=HEADERS, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        tables = soup.find_all('table')
-
-        for table_idx in [4, 5]:
-            if table_idx >= len(tables):
-                continue
-
-            table = tables[table_idx]
-            rows = table.find_all('tr')
-
-            for row in rows:
-                cols = row.find_all('td')
-                col_texts = [c.get_text(strip=True) for c in cols]
-
-                for i in range(0, len(col_texts) - 5, 6):
-                    name = col_texts[i]
-                    speed = col_texts[i + 1].upper()
-                    source = col_texts[i + 3]
-                    dest = col_texts[i + 4]
-                    time_str = col_texts[i + 5]
-
-                    if "AC" in name.upper():
-                        all_trains.append({
-                            'line': 'WR',
-                            'time': time_str,
-                            'source': source,
-                            'dest': dest,
-                            'type': f"AC {speed}",
-                            'is_ac': True
-                        })
-
+        response = fetcher.get(f"{ac_base_url}/ac-trains.php")
+        parse = lambda r: parse_ac_trains(r.text)
+        all_trains.extend(fetcher.cache.parsed(response, parse, f"ac-trains-v{PARSER_VERSION}")
+                          if fetcher.cache is not None else parse(response))
     except Exception as e:
         print(f"[Western Railway] Error scraping AC trains: {e}")
+    finally:
+        if own_fetcher:
+            fetcher.close()
 
-    # Remove duplicates
-    seen = set()
-    unique_trains = []
-    for t in all_trains:
-        key = (t['time'], t['source'], t['dest'])
-        if key not in seen:
-            seen.add(key)
-            unique_trains.append(t)
-
+    unique_trains = _unique(all_trains)
     print(f"[Western Railway] Found {len(unique_trains)} trains total")
     return unique_trains
 
 
-def scrape_central_railway():
+def scrape_central_railway(fetcher=None, base_url=LIFELINE_URL):
     """Scrape Central Railway trains from mumbailifeline.com"""
     print("\n[Central Railway] Scraping from mumbailifeline.com...")
-
-    # Key stations for Central Line (proper case for mumbailifeline)
-    key_stations = ["Mumbai_CST", "Dadar", "Kurla", "Ghatkopar", "Thane", "Dombivli", "Kalyan"]
-
-    # Generate route combinations
-    routes = []
-    for src in key_stations:
-        for dst in key_stations:
-            if src != dst:
-                routes.append((src, dst))
-
-    all_trains = []
-
-    print(f"[Central Railway] Scraping {len(routes)} route combinations...")
-
-    for src, dst in routes:
-        url = f"https://www.mumbailifeline.com/timetable.php?sel_route=central&sfrom={src}&sto={dst}&time1=04:00+AM&time2=11:59+PM&Submit=Submit"
-
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=30)
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            tables = soup.find_all('table')
-
-            # Find the timetable table (usually has > 10 rows)
-            for table in tables:
-                rows = table.find_all('tr')
-                if len(rows) < 10:
-                    continue
-
-                # Check if header row has train info
-                header = rows[0].find_all(['td', 'th'])
-                header_text = [h.get_text(strip=True).lower() for h in header]
-
-                if 'train' not in ' '.join(header_text) and 'speed' not in ' '.join(header_text):
-                    continue
-
-                # Parse train rows
-                for row in rows[1:]:
-                    cols = row.find_all('td')
-                    if len(cols) < 6:
-                        continue
-
-                    train_no = cols[0].get_text(strip=True)
-                    speed = cols[1].get_text(strip=True).upper()
-                    origin = cols[3].get_text(strip=True)
-                    dest_station = cols[4].get_text(strip=True)
-                    time_str = cols[5].get_text(strip=True)
-
-                    # Skip header-like rows
-                    if 'train' in train_no.lower() or not time_str:
-                        continue
-
-                    # Check if AC train
-                    is_ac = 'AC' in train_no.upper()
-                    train_type = f"AC {speed}" if is_ac else speed
-
-                    # Clean up time format
-                    time_str = time_str.replace('\n', '').strip()
-
-                    all_trains.append({
-                        'line': 'CR',
-                        'time': time_str,
-                        'source': origin.replace('_', ' ').replace('Cst', 'CSMT').replace('Mumbai Cst', 'CSMT'),
-                        'dest': dest_station.replace('_', ' '),
-                        'type': train_type,
-                        'is_ac': is_ac
-                    })
-
-            time.sleep(0.5)  # Be nice to the server
-
-        except Exception as e:
-            print(f"[Central Railway] Error scraping {src} to {dst}: {e}")
-
-    # Remove duplicates
-    seen = set()
-    unique_trains = []
-    for t in all_trains:
-        key = (t['time'], t['source'], t['dest'])
-        if key not in seen:
-            seen.add(key)
-            unique_trains.append(t)
-
+    unique_trains = _unique(scrape_line("Central Railway", "central", "CR", CENTRAL_STATIONS,
+                                        _lifeline_name, _spaced,
+                                        fetcher, base_url))
     print(f"[Central Railway] Found {len(unique_trains)} trains")
     return unique_trains
 
 
-def scrape_harbour_line():
+def scrape_harbour_line(fetcher=None, base_url=LIFELINE_URL):
     """Scrape Harbour Line trains from mumbailifeline.com"""
     print("\n[Harbour Line] Scraping from mumbailifeline.com...")
-
-    # Key stations for Harbour Line (proper case for mumbailifeline)
-    key_stations = ["Mumbai_CST", "Kurla", "Vashi", "Belapur", "Panvel"]
-
-    # Generate route combinations
-    routes = []
-    for src in key_stations:
-        for dst in key_stations:
-            if src != dst:
-                routes.append((src, dst))
-
-    all_trains = []
-
-    print(f"[Harbour Line] Scraping {len(routes)} route combinations...")
-
-    for src, dst in routes:
-        url = f"https://www.mumbailifeline.com/timetable.php?sel_route=harbour&sfrom={src}&sto={dst}&time1=04:00+AM&time2=11:59+PM&Submit=Submit"
-
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=30)
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            tables = soup.find_all('table')
-
-            for table in tables:
-                rows = table.find_all('tr')
-                if len(rows) < 10:
-                    continue
-
-                header = rows[0].find_all(['td', 'th'])
-                header_text = [h.get_text(strip=True).lower() for h in header]
-
-                if 'train' not in ' '.join(header_text) and 'speed' not in ' '.join(header_text):
-                    continue
-
-                for row in rows[1:]:
-                    cols = row.find_all('td')
-                    if len(cols) < 6:
-                        continue
-
-                    train_no = cols[0].get_text(strip=True)
-                    speed = cols[1].get_text(strip=True).upper()
-                    origin = cols[3].get_text(strip=True)
-                    dest_station = cols[4].get_text(strip=True)
-                    time_str = cols[5].get_text(strip=True)
-
-                    if 'train' in train_no.lower() or not time_str:
-                        continue
-
-                    is_ac = 'AC' in train_no.upper()
-                    train_type = f"AC {speed}" if is_ac else speed
-
-                    time_str = time_str.replace('\n', '').strip()
-
-                    all_trains.append({
-                        'line': 'HR',
-                        'time': time_str,
-                        'source': origin.replace('_', ' ').replace('Cst', 'CSMT').replace('Mumbai Cst', 'CSMT'),
-                        'dest': dest_station.replace('_', ' '),
-                        'type': train_type,
-                        'is_ac': is_ac
-                    })
-
-            time.sleep(0.5)
-
-        except Exception as e:
-            print(f"[Harbour Line] Error scraping {src} to {dst}: {e}")
-
-    # Remove duplicates
-    seen = set()
-    unique_trains = []
-    for t in all_trains:
-        key = (t['time'], t['source'], t['dest'])
-        if key not in seen:
-            seen.add(key)
-            unique_trains.append(t)
-
+    unique_trains = _unique(scrape_line("Harbour Line", "harbour", "HR", HARBOUR_STATIONS,
+                                        _lifeline_name, _spaced,
+                                        fetcher, base_url))
     print(f"[Harbour Line] Found {len(unique_trains)} trains")
     return unique_trains
 
 
-def main():
-    """Main function to scrape all train data"""
+def main(lifeline_url=LIFELINE_URL, go4mumbai_url=GO4MUMBAI_URL, output_dir=".", cache=None,
+         workers=0, fresh=False):
+    """
+    Scrape all train data into output_dir. Returns {csv name: change set}
+    ({} if no page changed, None if the scrape is unfinished).
+    """
+    from scrape_jobs import CHECKPOINT_FILE, ScrapeJob, plan_units
+
     print("=" * 60)
     print("Mumbai Local Train - Complete Data Scraper")
     print("=" * 60)
 
-    # Scrape all lines
-    wr_trains = scrape_western_railway()
-    cr_trains = scrape_central_railway()
-    hr_trains = scrape_harbour_line()
+    # Scrape every route as a checkpointed job; a rerun after a crash or
+    # failed pages picks up where the last one stopped
+    start = time.perf_counter()
+    cache = cache or HttpCache()
+    job = ScrapeJob(plan_units(lifeline_url, go4mumbai_url),
+                    os.path.join(output_dir, os.path.basename(CHECKPOINT_FILE)), fresh=fresh)
+    if job.stats['resumed']:
+        print(f"Resuming: {job.stats['resumed']}/{job.stats['units']} units already done")
+    fetcher = None if workers else Fetcher(cache=cache)
+    try:
+        job.run(workers, fetcher, cache_dir=cache.cache_dir)
+    finally:
+        if fetcher:
+            fetcher.close()
+    print(f"\nScraped in {time.perf_counter() - start:.1f}s - {job.report()}")
+    if not workers:
+        print(f"HTTP cache: {cache.report()}")
+    cache.prune()
+
+    if not job.complete:
+        for key, error in job.errors.items():
+            print(f"Error scraping {key}: {error}")
+        print(f"{len(job.pending)} units failed - CSVs left as they are; rerun to resume.")
+        return None
+
+    outputs = [os.path.join(output_dir, name) for name in ('mumbai_ac_trains.csv', 'mumbai_local_trains.csv')]
+    if (not job.stats['resumed'] and job.stats['unchanged'] == job.stats['fetched']
+            and all(os.path.exists(path) for path in outputs)):
+        print("No timetable pages changed since the last run - CSVs left as they are.")
+        job.finish()
+        return {}
+
+    trains = job.merged()
+    wr_trains, cr_trains, hr_trains = trains['WR'], trains['CR'], trains['HR']
+    for label, line_trains in (("Western Railway", wr_trains), ("Central Railway", cr_trains),
+                               ("Harbour Line", hr_trains)):
+        print(f"[{label}] Found {len(line_trains)} trains")
 
     # Combine all trains
     all_trains = wr_trains + cr_trains + hr_trains
+    results = {}
 
     if all_trains:
         df = pd.DataFrame(all_trains)
 
-        # Add train ID
-        df['id'] = [f"{row['line']}_{i:04d}" for i, row in df.iterrows()]
-
         # Separate AC and non-AC trains
         ac_trains = df[df['is_ac'] == True].copy()
         non_ac_trains = df[df['is_ac'] == False].copy()
 
-        # Save AC trains
-        if len(ac_trains) > 0:
-            ac_trains = ac_trains[['id', 'line', 'time', 'source', 'dest', 'type']]
-            ac_trains.to_csv('mumbai_ac_trains.csv', index=False)
-            print(f"\nSaved {len(ac_trains)} AC trains to 'mumbai_ac_trains.csv'")
-
-        # Save non-AC trains
-        if len(non_ac_trains) > 0:
-            non_ac_trains = non_ac_trains[['id', 'line', 'time', 'source', 'dest', 'type']]
-            non_ac_trains.to_csv('mumbai_local_trains.csv', index=False)
-            print(f"Saved {len(non_ac_trains)} non-AC trains to 'mumbai_local_trains.csv'")
+        # Apply as a row-level diff: unchanged trains keep their ids and the
+        # chatbot replays the change log instead of reloading the CSVs
+        changes_file = os.path.join(output_dir, os.path.basename(CHANGES_FILE))
+        for label, trains, name in (("AC", ac_trains, 'mumbai_ac_trains.csv'),
+                                    ("non-AC", non_ac_trains, 'mumbai_local_trains.csv')):
+            if len(trains) > 0:
+                changes = refresh_timetable(trains[['line', 'time', 'source', 'dest', 'type']],
+                                            os.path.join(output_dir, name), changes_file)
+                print(f"\n{len(trains)} {label} trains -> '{name}': {describe(changes)}")
+                results[name] = changes
+
+        # Validate + compact for serving (canonical names, typed columns)
+        report = build_timetable([os.path.join(output_dir, name) for name in
+                                  ('mumbai_local_trains.csv', 'mumbai_ac_trains.csv')],
+                                 os.path.join(output_dir, os.path.basename(ARTIFACT_FILE)),
+                                 os.path.join(output_dir, os.path.basename(REPORT_FILE)))
+        print(f"\nTimetable build: {summary(report)}")
 
         # Summary
         print("\n" + "=" * 60)
@@ -370,6 +252,8 @@ def main():
 
     else:
         print("\nNo data scraped. Check your internet connection.")
+    job.finish()
+    return results
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+# ==================================================
+# Mumbai Local Train - Concurrent HTTP Fetcher
+# ==================================================
+# Shared plumbing for the scrapers:
+# - one requests.Session (keep-alive, pooled connections)
+# - a bounded thread pool for fetches
+# - per-host rate limiting (min spacing between requests)
+# - retries with exponential backoff + full jitter
+# - results handed back as they complete, so parsing
+#   overlaps with the fetches still in flight
+# - optional on-disk cache (http_cache.HttpCache) for
+#   conditional requests and cached parse results
+# ==================================================
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+MAX_WORKERS = 6              # concurrent fetches
+HOST_INTERVAL = 0.5          # seconds between requests to the same host
+TIMEOUT = 30                 # seconds per request
+RETRIES = 3                  # extra attempts after the first
+BACKOFF = 1.0                # base seconds for retry backoff
+MAX_BACKOFF = 30
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """Spaces requests to each host at least `interval` seconds apart."""
+
+    def __init__(self, interval=HOST_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, host):
+        # Reserve the next slot under the lock, sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Fetcher:
+    """
+    Concurrent, polite HTTP GETs over one pooled session.
+
+    Usage:
+        fetcher = Fetcher(max_workers=6)
+        for key, result in fetcher.fetch_all({"a": url_a, "b": url_b}, parse):
+            ...
+        fetcher.stats  # requests, retries, failures, bytes
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, host_interval=HOST_INTERVAL,
+                 timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF, session=None, cache=None):
+        self.max_workers = max_workers
+        self.cache = cache
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = HostRateLimiter(host_interval)
+        self.session = session or self._new_session()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "bytes": 0}
+
+    def _new_session(self):
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _retry_delay(self, attempt, response=None):
+        """Full jitter, or the server's Retry-After if it sent one."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(int(retry_after), MAX_BACKOFF)
+        return random.uniform(0, min(self.backoff * (2 ** attempt), MAX_BACKOFF))
+
+    # ---------------- SINGLE REQUEST ----------------
+
+    def get(self, url, **kwargs):
+        """GET with rate limiting and retries. Raises after the last attempt."""
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            self.limiter.wait(host)
+            self._count("requests")
+            response = None
+            try:
+                if self.cache is not None:
+                    response = self.cache.get(self.session, url, timeout=self.timeout, **kwargs)
+                else:
+                    response = self.session.get(url, timeout=self.timeout, **kwargs)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    self._count("bytes", len(response.content))
+                    return response
+                error = requests.HTTPError(f"{response.status_code} for {url}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt == self.retries:
+                self._count("failures")
+                raise error
+            self._count("retries")
+            time.sleep(self._retry_delay(attempt, response))
+
+    # ---------------- MANY REQUESTS ----------------
+
+    def fetch_all(self, urls, parse=None, parse_key=None):
+        """
+        Fetch {key: url} concurrently and yield (key, result) in completion
+        order, where result is parse(response) (or the response itself).
+        Parsing runs in the caller's thread while other fetches continue.
+        Failed fetches yield (key, exception). With a cache and a
+        parse_key, unchanged pages reuse their stored parse result.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="fetch") as pool:
+            futures = {pool.submit(self.get, url): key for key, url in urls.items()}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    response = future.result()
+                except Exception as e:
+                    yield key, e
+                    continue
+                if parse and parse_key and self.cache is not None:
+                    yield key, self.cache.parsed(response, parse, parse_key)
+                else:
+                    yield key, parse(response) if parse else response
+
+    def close(self):
+        self.session.close()
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    from fake_railway_site import FakeRailwaySite
+
+    with FakeRailwaySite(latency=0.2, fail_every=5) as site:
+        urls = {i: f"{site.url}/timetable.php?sel_route=western&sfrom=DADAR&sto=VIRAR&n={i}"
+                for i in range(30)}
+        for workers in (1, 6):
+            fetcher = Fetcher(max_workers=workers, host_interval=0, backoff=0.05)
+            start = time.perf_counter()
+            sizes = [len(r.text) for _, r in fetcher.fetch_all(urls) if not isinstance(r, Exception)]
+            elapsed = time.perf_counter() - start
+            print(f"{workers} worker(s): {len(sizes)} pages in {elapsed:.2f}s, stats {fetcher.stats}")
+            fetcher.close()
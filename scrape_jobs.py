@@ -0,0 +1,235 @@
+# ==================================================
+# Mumbai Local Train - Resumable Scrape Jobs
+# ==================================================
+# A full timetable scrape as a job of small work units
+# (one per route page, plus the AC page):
+# - every finished unit is appended to a checkpoint
+#   file with its parsed trains (fsync'd)
+# - a rerun after a crash or failed units resumes from
+#   the checkpoint and only fetches what is missing
+# - units run on threads (one pooled session) or on a
+#   process pool; the merge follows the job plan, so the
+#   result doesn't depend on completion order
+# scrape_all_trains.main() runs its scrape through here.
+# ==================================================
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from http_cache import HttpCache
+from scrape_all_trains import (CENTRAL_STATIONS, GO4MUMBAI_URL, HARBOUR_STATIONS, LIFELINE_URL,
+                               WESTERN_STATIONS, _lifeline_name, _route_pairs, _spaced, _unique,
+                               parse_ac_trains, parse_timetable)
+from scrape_http import HOST_INTERVAL, Fetcher
+from timetable_extract import PARSER_VERSION
+
+BASE_DIR = os.path.dirname(__file__)
+CHECKPOINT_FILE = os.path.join(BASE_DIR, "scrape_checkpoint.jsonl")
+CHECKPOINT_MAX_AGE = 6 * 3600    # seconds; older checkpoints are started over
+
+Unit = namedtuple("Unit", "key line kind url")
+LineSpec = namedtuple("LineSpec", "line label route stations clean_source clean_dest")
+
+LINES = {
+    "WR": LineSpec("WR", "Western Railway", "western", WESTERN_STATIONS, str.title, str.title),
+    "CR": LineSpec("CR", "Central Railway", "central", CENTRAL_STATIONS, _lifeline_name, _spaced),
+    "HR": LineSpec("HR", "Harbour Line", "harbour", HARBOUR_STATIONS, _lifeline_name, _spaced),
+}
+
+
+def plan_units(lifeline_url=LIFELINE_URL, go4mumbai_url=GO4MUMBAI_URL):
+    """Work units in merge order: each line's routes, WR's AC page after its routes."""
+    units = []
+    for spec in LINES.values():
+        for src, dst in _route_pairs(spec.stations):
+            units.append(Unit(f"{spec.line}:{src}>{dst}", spec.line, "timetable",
+                              f"{lifeline_url}/timetable.php?sel_route={spec.route}&sfrom={src}&sto={dst}"
+                              f"&time1=04:00+AM&time2=11:59+PM&Submit=Submit"))
+        if spec.line == "WR":
+            units.append(Unit("WR:ac-trains", "WR", "ac", f"{go4mumbai_url}/ac-trains.php"))
+    return units
+
+
+# ==================================================
+# UNITS
+# ==================================================
+
+def run_unit(fetcher, unit):
+    """Fetch and parse one unit -> (trains, page unchanged since last run)."""
+    if unit.kind == "ac":
+        parse, parse_key = (lambda r: parse_ac_trains(r.text)), f"ac-trains-v{PARSER_VERSION}"
+    else:
+        spec = LINES[unit.line]
+        parse = lambda r: parse_timetable(r.text, unit.line, spec.clean_source, spec.clean_dest)
+        parse_key = f"timetable-{unit.line}-v{PARSER_VERSION}"
+
+    response = fetcher.get(unit.url)
+    if fetcher.cache is not None:
+        return fetcher.cache.parsed(response, parse, parse_key), response.unchanged
+    return parse(response), False
+
+
+_worker = {}
+
+
+def _init_worker(host_interval, cache_dir):
+    """One session (and cache handle) per process."""
+    _worker["fetcher"] = Fetcher(max_workers=1, host_interval=host_interval,
+                                 cache=HttpCache(cache_dir) if cache_dir else None)
+
+
+def _run_in_worker(unit):
+    return run_unit(_worker["fetcher"], unit)
+
+
+# ==================================================
+# JOB
+# ==================================================
+
+class ScrapeJob:
+    """
+    A planned scrape plus its checkpoint. The checkpoint is JSON lines:
+    a header {"job", "started_at"} then one {"unit", "trains"} per
+    finished unit. A header for a different plan, or one older than
+    max_age, starts the job over.
+    """
+
+    def __init__(self, units, checkpoint_file=CHECKPOINT_FILE, max_age=CHECKPOINT_MAX_AGE, fresh=False):
+        self.units = list(units)
+        self.checkpoint_file = checkpoint_file
+        self.signature = hashlib.sha1("\n".join(f"{u.key} {u.url}" for u in self.units)
+                                      .encode("utf-8")).hexdigest()[:16]
+        self.results = {}
+        self.errors = {}
+        self.stats = {"units": len(self.units), "resumed": 0, "fetched": 0,
+                      "unchanged": 0, "failures": 0}
+        if fresh or not self._load(max_age):
+            self._start()
+
+    # ---------------- CHECKPOINT ----------------
+
+    def _load(self, max_age):
+        """Pick up finished units from the checkpoint; False to start over."""
+        try:
+            with open(self.checkpoint_file, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                if (header.get("job") != self.signature
+                        or time.time() - header.get("started_at", 0) > max_age):
+                    return False
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue         # torn last line from a crash
+                    self.results[record["unit"]] = record["trains"]
+        except (OSError, ValueError, AttributeError):
+            return False
+        known = {unit.key for unit in self.units}
+        self.results = {key: trains for key, trains in self.results.items() if key in known}
+        self.stats["resumed"] = len(self.results)
+        return True
+
+    def _start(self):
+        self.results = {}
+        self.stats["resumed"] = 0
+        with open(self.checkpoint_file, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"job": self.signature, "started_at": time.time()}) + "\n")
+
+    def _record(self, key, trains):
+        self.results[key] = trains
+        with open(self.checkpoint_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"unit": key, "trains": trains}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def finish(self):
+        """Drop the checkpoint once its output has been written."""
+        if os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+
+    # ---------------- RUN ----------------
+
+    @property
+    def pending(self):
+        return [unit for unit in self.units if unit.key not in self.results]
+
+    @property
+    def complete(self):
+        return not self.pending
+
+    def run(self, workers=0, fetcher=None, host_interval=HOST_INTERVAL, cache_dir=None):
+        """
+        Run the pending units. workers=0 uses fetcher's thread pool in
+        this process; workers=N uses N processes, each with its own
+        session and the per-host interval stretched N times so the
+        sites see the same request rate. Failed units are left pending.
+        """
+        pending = self.pending
+        if not pending:
+            return self
+        if workers:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(host_interval * workers, cache_dir))
+            submit = lambda unit: pool.submit(_run_in_worker, unit)
+        else:
+            fetcher = fetcher or Fetcher(host_interval=host_interval)
+            pool = ThreadPoolExecutor(max_workers=fetcher.max_workers, thread_name_prefix="unit")
+            submit = lambda unit: pool.submit(run_unit, fetcher, unit)
+
+        with pool:
+            futures = {submit(unit): unit for unit in pending}
+            for future in as_completed(futures):
+                unit = futures[future]
+                try:
+                    trains, unchanged = future.result()
+                except Exception as e:
+                    self.errors[unit.key] = e
+                    self.stats["failures"] += 1
+                    continue
+                self._record(unit.key, trains)
+                self.stats["fetched"] += 1
+                self.stats["unchanged"] += bool(unchanged)
+        return self
+
+    def merged(self):
+        """{line: trains} in plan order, de-duplicated per line."""
+        by_line = {line: [] for line in LINES}
+        for unit in self.units:
+            by_line[unit.line].extend(self.results.get(unit.key, []))
+        return {line: _unique(trains) for line, trains in by_line.items()}
+
+    def report(self):
+        s = self.stats
+        return (f"{s['units']} units: {s['resumed']} resumed from checkpoint, {s['fetched']} fetched "
+                f"({s['unchanged']} unchanged), {s['failures']} failed")
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape all timetables as a resumable job.")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processes (default: threads in one process)")
+    parser.add_argument("--fresh", action="store_true", help="ignore any existing checkpoint")
+    parser.add_argument("--offline", action="store_true",
+                        help="scrape fake_railway_site instead of the real sites")
+    args = parser.parse_args()
+
+    import scrape_all_trains
+    if args.offline:
+        from fake_railway_site import FakeRailwaySite
+        import tempfile
+        output_dir = tempfile.mkdtemp()
+        with FakeRailwaySite() as site:
+            scrape_all_trains.main(site.url, site.url, output_dir=output_dir,
+                                   workers=args.workers, fresh=args.fresh)
+        print(f"Offline timetables written to {output_dir}")
+    else:
+        scrape_all_trains.main(workers=args.workers, fresh=args.fresh)
@@ -6,33 +6,38 @@
 # 2. Twitter/X (via Nitter)
 # 3. Google Play Store (m-indicator reviews)
 # 4. News sites
+# Each scraper is a generator fetching through a
+# review_sources.Source (time budget, rate limit, circuit
+# breakers); scrape_all_reviews() runs them concurrently
+# and streams their posts through review_ingest into the
+# review store.
 # ==================================================
 
-import requests
+from http_cache import get_shared_cache
 from bs4 import BeautifulSoup
-import json
 import re
-import time
 from datetime import datetime
-import os
+
+import review_ingest
+from review_sources import DEADLINE, Source, run_sources
+from nlp_sentiment import analyze_fast
+from station_registry import find_stations, canonical_name
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 
-# Output file
-OUTPUT_FILE = os.path.join(os.path.dirname(__file__), "scraped_reviews.json")
-
 
 # ==================================================
 # 1. REDDIT SCRAPER
 # ==================================================
 
-def scrape_reddit():
-    """Scrape Mumbai local train discussions from Reddit."""
+def scrape_reddit(source=None):
+    """Yield Mumbai local train discussions from Reddit."""
     print("\n[Reddit] Scraping r/mumbai and r/india...")
+    source = source or Source("reddit", interval=1.0)
 
-    posts = []
+    found = 0
 
     # Search queries
     searches = [
@@ -44,11 +49,13 @@ def scrape_reddit():
     ]
 
     for subreddit, query in searches:
+        if source.stopped:
+            break
         try:
             # Use old Reddit (easier to scrape)
             url = f"https://old.reddit.com/r/{subreddit}/search?q={query.replace(' ', '+')}&restrict_sr=on&sort=new&t=year"
 
-            response = requests.get(url, headers=HEADERS, timeout=15)
+            response = source.get(url, headers=HEADERS, timeout=15)
 
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
@@ -64,16 +71,15 @@ def scrape_reddit():
                         # Extract sentiment/rating from title
                         rating = analyze_sentiment(title)
 
-                        posts.append({
+                        found += 1
+                        yield {
                             'source': f'reddit/r/{subreddit}',
                             'type': 'post',
                             'content': title,
                             'rating': rating,
                             'timestamp': datetime.now().isoformat(),
                             'url': title_elem.get('href', '')
-                        })
-
-            time.sleep(1)  # Be nice to Reddit
+                        }
 
         except Exception as e:
             print(f"[Reddit] Error scraping r/{subreddit}: {e}")
@@ -81,7 +87,7 @@ def scrape_reddit():
     # Also try JSON API (no auth needed for public posts)
     try:
         url = "https://www.reddit.com/r/mumbai/search.json?q=local+train&sort=new&t=year&limit=25"
-        response = requests.get(url, headers={**HEADERS, 'Accept': 'application/json'}, timeout=15)
+        response = source.get(url, headers={**HEADERS, 'Accept': 'application/json'}, timeout=15)
 
         if response.status_code == 200:
             data = response.json()
@@ -91,31 +97,33 @@ def scrape_reddit():
                 selftext = post_data.get('selftext', '')[:200]
 
                 if title:
-                    posts.append({
+                    found += 1
+                    yield {
                         'source': 'reddit/r/mumbai',
                         'type': 'post',
                         'content': f"{title}. {selftext}".strip(),
                         'rating': analyze_sentiment(title + " " + selftext),
                         'timestamp': datetime.now().isoformat(),
-                        'upvotes': post_data.get('ups', 0)
-                    })
+                        'upvotes': post_data.get('ups', 0),
+                        'url': post_data.get('permalink', '')
+                    }
 
     except Exception as e:
         print(f"[Reddit] JSON API error: {e}")
 
-    print(f"[Reddit] Found {len(posts)} posts")
-    return posts
+    print(f"[Reddit] Found {found} posts")
 
 
 # ==================================================
 # 2. TWITTER/X SCRAPER (via Nitter)
 # ==================================================
 
-def scrape_twitter():
-    """Scrape Twitter posts about Mumbai local trains via Nitter."""
+def scrape_twitter(source=None):
+    """Yield Twitter posts about Mumbai local trains via Nitter."""
     print("\n[Twitter] Scraping via Nitter...")
+    source = source or Source("twitter", interval=0.5)
 
-    tweets = []
+    found = 0
 
     # Nitter instances (some may be down)
     nitter_instances = [
@@ -136,10 +144,12 @@ def scrape_twitter():
 
     for query in searches:
         for nitter_url in nitter_instances:
+            if source.stopped:
+                break
             try:
                 search_url = f"{nitter_url}/search?f=tweets&q={query.replace(' ', '+').replace('#', '%23').replace('@', '%40')}"
 
-                response = requests.get(search_url, headers=HEADERS, timeout=10)
+                response = source.get(search_url, headers=HEADERS, timeout=10)
 
                 if response.status_code == 200:
                     soup = BeautifulSoup(response.text, 'html.parser')
@@ -150,44 +160,43 @@ def scrape_twitter():
                     for tweet in tweet_contents[:5]:
                         text = tweet.get_text(strip=True)
                         if text and len(text) > 20:
-                            tweets.append({
+                            found += 1
+                            yield {
                                 'source': 'twitter',
                                 'type': 'tweet',
                                 'content': text[:280],
                                 'rating': analyze_sentiment(text),
                                 'timestamp': datetime.now().isoformat(),
                                 'query': query
-                            })
+                            }
 
                     if tweet_contents:
                         print(f"[Twitter] Found {len(tweet_contents)} tweets for '{query}'")
                         break  # Found tweets, move to next query
 
-                time.sleep(0.5)
-
             except Exception as e:
-                continue  # Try next Nitter instance
+                continue  # Try next Nitter instance (dead ones trip their circuit)
 
-    print(f"[Twitter] Total: {len(tweets)} tweets")
-    return tweets
+    print(f"[Twitter] Total: {found} tweets")
 
 
 # ==================================================
 # 3. GOOGLE PLAY STORE SCRAPER (m-indicator reviews)
 # ==================================================
 
-def scrape_play_store():
-    """Scrape reviews of m-indicator app from Play Store."""
+def scrape_play_store(source=None):
+    """Yield reviews of m-indicator app from Play Store."""
     print("\n[Play Store] Scraping m-indicator reviews...")
+    source = source or Source("play_store")
 
-    reviews = []
+    found = 0
 
     # m-indicator app URL
     app_id = "com.mobond.mindicator"
     url = f"https://play.google.com/store/apps/details?id={app_id}&showAllReviews=true"
 
     try:
-        response = requests.get(url, headers=HEADERS, timeout=15)
+        response = source.get(url, headers=HEADERS, timeout=15)
 
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -212,21 +221,22 @@ def scrape_play_store():
                             rating = int(match.group(1))
 
                     if text and len(text) > 10:
-                        reviews.append({
+                        found += 1
+                        yield {
                             'source': 'play_store',
                             'type': 'app_review',
                             'app': 'm-indicator',
                             'content': text[:300],
                             'rating': rating,
                             'timestamp': datetime.now().isoformat()
-                        })
+                        }
 
     except Exception as e:
         print(f"[Play Store] Error: {e}")
 
     # Alternative: Use a reviews API/scraper
     # Add some sample reviews if scraping fails
-    if not reviews:
+    if not found:
         print("[Play Store] Direct scraping limited, adding from known reviews...")
         sample_reviews = [
             {"content": "Best app for Mumbai local train timings. Very accurate!", "rating": 5},
@@ -236,28 +246,29 @@ def scrape_play_store():
             {"content": "Must have app for Mumbai local travelers. Live train tracking is great!", "rating": 5},
         ]
         for r in sample_reviews:
-            reviews.append({
+            found += 1
+            yield {
                 'source': 'play_store',
                 'type': 'app_review',
                 'app': 'm-indicator',
                 'content': r['content'],
                 'rating': r['rating'],
                 'timestamp': datetime.now().isoformat()
-            })
+            }
 
-    print(f"[Play Store] Found {len(reviews)} reviews")
-    return reviews
+    print(f"[Play Store] Found {found} reviews")
 
 
 # ==================================================
 # 4. NEWS SCRAPER
 # ==================================================
 
-def scrape_news():
-    """Scrape news about Mumbai local trains."""
+def scrape_news(source=None):
+    """Yield news about Mumbai local trains."""
     print("\n[News] Scraping train-related news...")
+    source = source or Source("news")
 
-    articles = []
+    found = 0
 
     # News sources to try
     news_searches = [
@@ -265,9 +276,11 @@ def scrape_news():
         ("https://timesofindia.indiatimes.com/topic/mumbai-local-trains", "Times of India"),
     ]
 
-    for url, source in news_searches:
+    for url, site in news_searches:
+        if source.stopped:
+            break
         try:
-            response = requests.get(url, headers=HEADERS, timeout=15)
+            response = source.get(url, headers=HEADERS, timeout=15)
 
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
@@ -281,61 +294,29 @@ def scrape_news():
                 for title in titles[:10]:
                     text = title.get_text(strip=True)
                     if text and len(text) > 20:
-                        articles.append({
-                            'source': source,
+                        found += 1
+                        yield {
+                            'source': site,
                             'type': 'news',
                             'content': text,
                             'rating': analyze_sentiment(text),
-                            'timestamp': datetime.now().isoformat()
-                        })
+                            'timestamp': datetime.now().isoformat(),
+                            'url': title.get('href', '')
+                        }
 
         except Exception as e:
-            print(f"[News] Error with {source}: {e}")
+            print(f"[News] Error with {site}: {e}")
 
-    print(f"[News] Found {len(articles)} articles")
-    return articles
+    print(f"[News] Found {found} articles")
 
 
 # ==================================================
-# SENTIMENT ANALYSIS (Simple keyword-based)
+# SENTIMENT ANALYSIS
 # ==================================================
 
 def analyze_sentiment(text):
-    """Simple sentiment analysis to generate rating (1-5)."""
-    text_lower = text.lower()
-
-    # Positive keywords
-    positive = ['great', 'good', 'excellent', 'best', 'amazing', 'love', 'helpful',
-                'clean', 'fast', 'comfortable', 'nice', 'perfect', 'awesome', 'convenient']
-
-    # Negative keywords
-    negative = ['bad', 'worst', 'terrible', 'hate', 'dirty', 'crowded', 'delay',
-                'late', 'cancelled', 'poor', 'horrible', 'slow', 'problem', 'issue',
-                'accident', 'breakdown', 'disruption']
-
-    # Neutral keywords
-    neutral = ['okay', 'average', 'normal', 'usual', 'sometimes']
-
-    pos_count = sum(1 for word in positive if word in text_lower)
-    neg_count = sum(1 for word in negative if word in text_lower)
-
-    # Calculate rating
-    if neg_count > pos_count:
-        if neg_count >= 3:
-            return 1
-        elif neg_count >= 2:
-            return 2
-        else:
-            return 3
-    elif pos_count > neg_count:
-        if pos_count >= 3:
-            return 5
-        elif pos_count >= 2:
-            return 4
-        else:
-            return 4
-    else:
-        return 3  # Neutral
+    """1-5 rating from the fast lexicon tier of nlp_sentiment."""
+    return analyze_fast(text)["rating"]
 
 
 # ==================================================
@@ -343,129 +324,56 @@ def analyze_sentiment(text):
 # ==================================================
 
 def extract_station(text):
-    """Extract station name from review text."""
-    stations = [
-        "Churchgate", "Dadar", "Bandra", "Andheri", "Borivali", "Virar",
-        "CSMT", "CST", "Thane", "Kalyan", "Kurla", "Ghatkopar", "Dombivli",
-        "Panvel", "Vashi", "Belapur", "Mulund", "Goregaon", "Malad", "Kandivali"
-    ]
-
-    text_lower = text.lower()
-    for station in stations:
-        if station.lower() in text_lower:
-            return station
-
-    return None
-
-
-# ==================================================
-# SAVE SCRAPED DATA
-# ==================================================
-
-def save_scraped_data(data):
-    """Save all scraped data to JSON."""
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    print(f"\n[OK] Saved to {OUTPUT_FILE}")
-
-
-def load_scraped_data():
-    """Load existing scraped data."""
-    if os.path.exists(OUTPUT_FILE):
-        with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {"reviews": [], "last_updated": None}
+    """Extract station name from review text (first station mentioned)."""
+    found = find_stations(text)
+    return canonical_name(found[0]) if found else None
 
 
 # ==================================================
-# CONVERT TO REVIEW FORMAT
+# MAIN SCRAPER
 # ==================================================
 
-def convert_to_reviews(scraped_items):
-    """Convert scraped items to review format for the chatbot."""
-    reviews = []
-
-    for item in scraped_items:
-        station = extract_station(item.get('content', ''))
-
-        review = {
-            'id': len(reviews) + 1,
-            'category': 'scraped',
-            'subject': station if station else 'Mumbai Local',
-            'rating': item.get('rating', 3),
-            'comment': item.get('content', '')[:200],
-            'username': item.get('source', 'Online'),
-            'timestamp': item.get('timestamp'),
-            'source': item.get('source'),
-            'type': item.get('type')
-        }
-        reviews.append(review)
-
-    return reviews
-
+# name -> (scraper, time budget in seconds, seconds between requests per host)
+SOURCES = {
+    'reddit': (scrape_reddit, 40, 1.0),
+    'twitter': (scrape_twitter, 30, 0.5),
+    'play_store': (scrape_play_store, 20, 0.0),
+    'news': (scrape_news, 30, 0.0),
+}
 
-# ==================================================
-# MAIN SCRAPER
-# ==================================================
 
-def scrape_all_reviews():
-    """Scrape reviews from all platforms."""
+def scrape_all_reviews(deadline=DEADLINE, scrapers=SOURCES):
+    """
+    Run all platforms (scrapers, as in SOURCES) concurrently through
+    review_sources and stream their posts into the review store through
+    review_ingest (deduplicated, stable ids). Whatever arrived by the
+    deadline is kept. Returns ingest stats plus per-source 'metrics'.
+    """
     print("=" * 60)
     print("Mumbai Local Train - Multi-Platform Review Scraper")
     print("=" * 60)
 
-    all_items = []
-
-    # Scrape from each platform
-    reddit_posts = scrape_reddit()
-    all_items.extend(reddit_posts)
-
-    twitter_posts = scrape_twitter()
-    all_items.extend(twitter_posts)
-
-    playstore_reviews = scrape_play_store()
-    all_items.extend(playstore_reviews)
-
-    news_articles = scrape_news()
-    all_items.extend(news_articles)
-
-    # Convert to review format
-    reviews = convert_to_reviews(all_items)
-
-    # Save
-    data = {
-        "reviews": reviews,
-        "raw_data": {
-            "reddit": reddit_posts,
-            "twitter": twitter_posts,
-            "play_store": playstore_reviews,
-            "news": news_articles
-        },
-        "last_updated": datetime.now().isoformat(),
-        "stats": {
-            "total": len(reviews),
-            "reddit": len(reddit_posts),
-            "twitter": len(twitter_posts),
-            "play_store": len(playstore_reviews),
-            "news": len(news_articles)
-        }
-    }
-
-    save_scraped_data(data)
+    sources = {}
+    stats = review_ingest.ingest(run_sources(scrapers, deadline, sources))
+    stats['metrics'] = {name: source.metrics for name, source in sources.items()}
 
     # Summary
     print("\n" + "=" * 60)
     print("SCRAPING COMPLETE!")
     print("=" * 60)
-    print(f"Reddit posts:     {len(reddit_posts)}")
-    print(f"Twitter posts:    {len(twitter_posts)}")
-    print(f"Play Store:       {len(playstore_reviews)}")
-    print(f"News articles:    {len(news_articles)}")
+    for source in sources.values():
+        print(source.summary())
+    print("-" * 40)
+    for source, count in sorted(stats['sources'].items()):
+        print(f"{source + ':':<18}{count}")
     print("-" * 40)
-    print(f"TOTAL REVIEWS:    {len(reviews)}")
+    print(f"Posts seen:       {stats['seen']}")
+    print(f"Duplicates:       {stats['duplicates']}")
+    print(f"NEW REVIEWS:      {stats['written']}")
+    print(f"HTTP cache:       {get_shared_cache()[0].report()}")
     print("=" * 60)
 
-    return data
+    return stats
 
 
 # ==================================================
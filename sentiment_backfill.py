@@ -0,0 +1,173 @@
+# ==================================================
+# Mumbai Local Train - Parallel Sentiment Backfill
+# ==================================================
+# Re-scores stored reviews across a process pool:
+# - reviews are streamed from the store in chunks
+# - each worker process builds one VADER analyzer
+# - results go back in one transaction per chunk
+# Run after changing nlp_sentiment.SENTIMENT_MODEL,
+# or with --missing to score only unscored rows.
+# ==================================================
+
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import nlp_sentiment
+import review_store
+
+CHUNK_SIZE = 2000            # reviews per task / write transaction
+IN_FLIGHT_PER_WORKER = 2     # chunks queued ahead per worker
+
+
+# ==================================================
+# WORKER
+# ==================================================
+
+def _init_worker():
+    """Build the analyzer once per process, not per chunk."""
+    nlp_sentiment._get_analyzer()
+
+
+def _score_chunk(chunk):
+    """[(origin, id, text)] -> [(origin, id, hash, label, score)]"""
+    results = []
+    for origin, review_id, text in chunk:
+        sentiment = nlp_sentiment.analyze_sentiment(text)
+        results.append((origin, review_id, nlp_sentiment.content_hash(text),
+                        sentiment["label"], sentiment["score"]))
+    return results
+
+
+# ==================================================
+# BACKFILL
+# ==================================================
+
+def iter_chunks(conn, chunk_size=CHUNK_SIZE, missing_only=False):
+    """Stream (origin, id, comment) chunks in rowid order (keyset paging)."""
+    where = "rowid > ?" + (" AND sentiment IS NULL" if missing_only else "")
+    last = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT rowid, origin, id, comment FROM reviews WHERE {where} ORDER BY rowid LIMIT ?",
+            (last, chunk_size)).fetchall()
+        if not rows:
+            return
+        last = rows[-1]["rowid"]
+        yield [(row["origin"], row["id"], row["comment"] or "") for row in rows]
+
+
+def backfill(workers=None, chunk_size=CHUNK_SIZE, missing_only=False, db_file=None, progress=True):
+    """
+    Score reviews in parallel and write them back. Returns stats:
+    {'reviews', 'seconds', 'per_second', 'workers'}
+    """
+    if not review_store.SENTIMENT_AVAILABLE:
+        raise RuntimeError("vaderSentiment is not installed")
+    workers = workers or os.cpu_count() or 1
+    conn = review_store.get_connection(db_file)
+    chunks = iter_chunks(conn, chunk_size, missing_only)
+
+    done = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            # Keep a bounded number of chunks queued so memory stays flat
+            while not exhausted and len(pending) < workers * IN_FLIGHT_PER_WORKER:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(_score_chunk, chunk))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                results = future.result()
+                review_store.write_sentiments(results, conn=conn)
+                done += len(results)
+            if progress:
+                rate = done / max(time.perf_counter() - start, 1e-9)
+                print(f"\r  scored {done:,} reviews ({rate:,.0f}/s)", end="", flush=True)
+
+    review_store.refresh_summaries(conn=conn)
+    elapsed = time.perf_counter() - start
+    if progress:
+        print()
+    return {
+        "reviews": done,
+        "seconds": round(elapsed, 2),
+        "per_second": round(done / elapsed) if elapsed else None,
+        "workers": workers,
+    }
+
+
+# ==================================================
+# SYNTHETIC CORPUS
+# ==================================================
+
+_OPENERS = ["The", "Today the", "Every morning the", "This evening the", "Honestly the"]
+_SUBJECTS = ["Dadar fast", "Andheri slow", "Thane local", "CSMT AC train", "Virar fast",
+             "Panvel harbour local", "Borivali slow", "Kalyan semi fast"]
+_VERDICTS = ["was super crowded and late", "was clean and on time", "was okay, nothing special",
+             "had a terrible delay", "was amazing, loved the AC", "smelled awful",
+             "was surprisingly empty", "had friendly staff", "broke down near Kurla"]
+
+
+def build_synthetic_corpus(db_file, count, seed=7):
+    """Fill db_file with count varied reviews (distinct texts, so no cache hits)."""
+    import random
+    rng = random.Random(seed)
+    reviews = []
+    for i in range(count):
+        text = (f"{rng.choice(_OPENERS)} {rng.choice(_SUBJECTS)} {rng.choice(_VERDICTS)}, "
+                f"trip #{i} at {rng.randint(5, 23)}:{rng.randint(0, 59):02d}")
+        reviews.append({"id": f"syn-{i}", "category": "station", "subject": "General",
+                        "rating": rng.randint(1, 5), "comment": text,
+                        "username": "Synthetic", "timestamp": f"2024-01-01T00:00:{i % 60:02d}",
+                        "source": "synthetic"})
+    # Ingest without scoring so the backfill has the whole corpus to do
+    conn = review_store.get_connection(db_file)
+    for i in range(0, count, 10_000):
+        review_store.add_reviews(reviews[i:i + 10_000], origin="scraped", synced=True,
+                                 conn=conn, score=False)
+
+
+def benchmark(count, worker_counts):
+    """Throughput of a full re-score at each worker count."""
+    import tempfile
+    db_file = os.path.join(tempfile.mkdtemp(), "synthetic.db")
+    print(f"Building {count:,}-review synthetic corpus...")
+    build_synthetic_corpus(db_file, count)
+
+    baseline = None
+    for workers in worker_counts:
+        stats = backfill(workers=workers, db_file=db_file, progress=False)
+        baseline = baseline or stats["per_second"]
+        print(f"  {workers:>2} worker(s): {stats['reviews']:,} reviews in {stats['seconds']}s "
+              f"= {stats['per_second']:,}/s (x{stats['per_second'] / baseline:.2f})")
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score review sentiment in parallel.")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--missing", action="store_true", help="only score reviews without sentiment")
+    parser.add_argument("--benchmark", type=int, metavar="N",
+                        help="time a synthetic N-review corpus at 1..cores workers instead")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        cores = os.cpu_count() or 1
+        benchmark(args.benchmark, sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1))))
+    else:
+        stats = backfill(args.workers, args.chunk_size, args.missing)
+        print(f"Scored {stats['reviews']:,} reviews with {stats['workers']} worker(s) "
+              f"in {stats['seconds']}s ({stats['per_second']:,}/s)")
@@ -0,0 +1,360 @@
+# ==================================================
+# Mumbai Local Train - Station Registry
+# ==================================================
+# Canonical station IDs, names, aliases, coordinates
+# and line topology (station order + distance in km)
+# ==================================================
+
+from keyword_automaton import KeywordAutomaton
+
+# ---------------- STATIONS ----------------
+# id -> display name and location (lat/lon, WGS84)
+
+STATIONS = {
+    # Western Line
+    "churchgate": {"name": "Churchgate", "lat": 18.9352, "lon": 72.8270},
+    "marine_lines": {"name": "Marine Lines", "lat": 18.9447, "lon": 72.8239},
+    "charni_road": {"name": "Charni Road", "lat": 18.9519, "lon": 72.8183},
+    "grant_road": {"name": "Grant Road", "lat": 18.9633, "lon": 72.8161},
+    "mumbai_central": {"name": "Mumbai Central", "lat": 18.9690, "lon": 72.8195},
+    "mahalakshmi": {"name": "Mahalakshmi", "lat": 18.9826, "lon": 72.8240},
+    "lower_parel": {"name": "Lower Parel", "lat": 18.9955, "lon": 72.8303},
+    "prabhadevi": {"name": "Prabhadevi", "lat": 19.0079, "lon": 72.8360},
+    "dadar": {"name": "Dadar", "lat": 19.0186, "lon": 72.8424},
+    "mahim_junction": {"name": "Mahim Junction", "lat": 19.0408, "lon": 72.8469},
+    "bandra": {"name": "Bandra", "lat": 19.0544, "lon": 72.8406},
+    "khar_road": {"name": "Khar Road", "lat": 19.0694, "lon": 72.8397},
+    "santacruz": {"name": "Santacruz", "lat": 19.0818, "lon": 72.8412},
+    "vile_parle": {"name": "Vile Parle", "lat": 19.0996, "lon": 72.8440},
+    "andheri": {"name": "Andheri", "lat": 19.1197, "lon": 72.8464},
+    "jogeshwari": {"name": "Jogeshwari", "lat": 19.1364, "lon": 72.8489},
+    "ram_mandir": {"name": "Ram Mandir", "lat": 19.1515, "lon": 72.8502},
+    "goregaon": {"name": "Goregaon", "lat": 19.1646, "lon": 72.8493},
+    "malad": {"name": "Malad", "lat": 19.1871, "lon": 72.8486},
+    "kandivali": {"name": "Kandivali", "lat": 19.2045, "lon": 72.8518},
+    "borivali": {"name": "Borivali", "lat": 19.2291, "lon": 72.8573},
+    "dahisar": {"name": "Dahisar", "lat": 19.2502, "lon": 72.8594},
+    "mira_road": {"name": "Mira Road", "lat": 19.2813, "lon": 72.8558},
+    "bhayandar": {"name": "Bhayandar", "lat": 19.3115, "lon": 72.8519},
+    "naigaon": {"name": "Naigaon", "lat": 19.3516, "lon": 72.8466},
+    "vasai_road": {"name": "Vasai Road", "lat": 19.3826, "lon": 72.8321},
+    "nalla_sopara": {"name": "Nalla Sopara", "lat": 19.4176, "lon": 72.8190},
+    "virar": {"name": "Virar", "lat": 19.4559, "lon": 72.8111},
+
+    # Central Line
+    "csmt": {"name": "CSMT", "lat": 18.9402, "lon": 72.8356},
+    "masjid": {"name": "Masjid", "lat": 18.9514, "lon": 72.8381},
+    "sandhurst_road": {"name": "Sandhurst Road", "lat": 18.9614, "lon": 72.8394},
+    "byculla": {"name": "Byculla", "lat": 18.9767, "lon": 72.8330},
+    "chinchpokli": {"name": "Chinchpokli", "lat": 18.9866, "lon": 72.8330},
+    "currey_road": {"name": "Currey Road", "lat": 18.9941, "lon": 72.8334},
+    "parel": {"name": "Parel", "lat": 19.0090, "lon": 72.8378},
+    "matunga": {"name": "Matunga", "lat": 19.0275, "lon": 72.8553},
+    "sion": {"name": "Sion", "lat": 19.0470, "lon": 72.8636},
+    "kurla": {"name": "Kurla", "lat": 19.0654, "lon": 72.8793},
+    "vidyavihar": {"name": "Vidyavihar", "lat": 19.0793, "lon": 72.8976},
+    "ghatkopar": {"name": "Ghatkopar", "lat": 19.0860, "lon": 72.9081},
+    "vikhroli": {"name": "Vikhroli", "lat": 19.1113, "lon": 72.9280},
+    "kanjurmarg": {"name": "Kanjurmarg", "lat": 19.1296, "lon": 72.9284},
+    "bhandup": {"name": "Bhandup", "lat": 19.1439, "lon": 72.9372},
+    "nahur": {"name": "Nahur", "lat": 19.1547, "lon": 72.9466},
+    "mulund": {"name": "Mulund", "lat": 19.1718, "lon": 72.9566},
+    "thane": {"name": "Thane", "lat": 19.1863, "lon": 72.9756},
+    "kalwa": {"name": "Kalwa", "lat": 19.1965, "lon": 72.9967},
+    "mumbra": {"name": "Mumbra", "lat": 19.1902, "lon": 73.0230},
+    "diva": {"name": "Diva", "lat": 19.1885, "lon": 73.0427},
+    "dombivli": {"name": "Dombivli", "lat": 19.2183, "lon": 73.0868},
+    "thakurli": {"name": "Thakurli", "lat": 19.2255, "lon": 73.0977},
+    "kalyan": {"name": "Kalyan", "lat": 19.2355, "lon": 73.1299},
+    "shahad": {"name": "Shahad", "lat": 19.2444, "lon": 73.1583},
+    "titwala": {"name": "Titwala", "lat": 19.2957, "lon": 73.2030},
+    "asangaon": {"name": "Asangaon", "lat": 19.4410, "lon": 73.3070},
+    "kasara": {"name": "Kasara", "lat": 19.6460, "lon": 73.4730},
+    "vithalwadi": {"name": "Vithalwadi", "lat": 19.2298, "lon": 73.1496},
+    "ulhasnagar": {"name": "Ulhasnagar", "lat": 19.2180, "lon": 73.1630},
+    "ambernath": {"name": "Ambernath", "lat": 19.2090, "lon": 73.1860},
+    "badlapur": {"name": "Badlapur", "lat": 19.1660, "lon": 73.2390},
+    "neral": {"name": "Neral", "lat": 19.0270, "lon": 73.3180},
+    "karjat": {"name": "Karjat", "lat": 18.9120, "lon": 73.3200},
+    "khopoli": {"name": "Khopoli", "lat": 18.7890, "lon": 73.3450},
+
+    # Harbour Line
+    "dockyard_road": {"name": "Dockyard Road", "lat": 18.9660, "lon": 72.8440},
+    "sewri": {"name": "Sewri", "lat": 18.9990, "lon": 72.8550},
+    "vadala_road": {"name": "Vadala Road", "lat": 19.0160, "lon": 72.8590},
+    "kings_circle": {"name": "Kings Circle", "lat": 19.0320, "lon": 72.8570},
+    "gtb_nagar": {"name": "GTB Nagar", "lat": 19.0370, "lon": 72.8640},
+    "chunabhatti": {"name": "Chunabhatti", "lat": 19.0520, "lon": 72.8690},
+    "tilak_nagar": {"name": "Tilak Nagar", "lat": 19.0660, "lon": 72.8900},
+    "chembur": {"name": "Chembur", "lat": 19.0622, "lon": 72.9010},
+    "govandi": {"name": "Govandi", "lat": 19.0550, "lon": 72.9150},
+    "mankhurd": {"name": "Mankhurd", "lat": 19.0480, "lon": 72.9320},
+    "vashi": {"name": "Vashi", "lat": 19.0630, "lon": 72.9990},
+    "sanpada": {"name": "Sanpada", "lat": 19.0620, "lon": 73.0110},
+    "juinagar": {"name": "Juinagar", "lat": 19.0550, "lon": 73.0180},
+    "nerul": {"name": "Nerul", "lat": 19.0330, "lon": 73.0180},
+    "seawoods": {"name": "Seawoods", "lat": 19.0220, "lon": 73.0190},
+    "belapur": {"name": "Belapur", "lat": 19.0190, "lon": 73.0390},
+    "kharghar": {"name": "Kharghar", "lat": 19.0260, "lon": 73.0590},
+    "mansarovar": {"name": "Mansarovar", "lat": 19.0170, "lon": 73.0800},
+    "khandeshwar": {"name": "Khandeshwar", "lat": 19.0070, "lon": 73.0950},
+    "panvel": {"name": "Panvel", "lat": 18.9910, "lon": 73.1210},
+
+    # Trans-Harbour Line
+    "airoli": {"name": "Airoli", "lat": 19.1580, "lon": 72.9990},
+    "ghansoli": {"name": "Ghansoli", "lat": 19.1170, "lon": 73.0030},
+    "kopar_khairane": {"name": "Kopar Khairane", "lat": 19.1030, "lon": 73.0110},
+    "turbhe": {"name": "Turbhe", "lat": 19.0760, "lon": 73.0170},
+
+    # Metro Line 1 (Versova - Andheri - Ghatkopar)
+    "m1_versova": {"name": "Versova (Metro)", "lat": 19.1310, "lon": 72.8190},
+    "m1_dn_nagar": {"name": "D N Nagar (Metro)", "lat": 19.1240, "lon": 72.8320},
+    "m1_azad_nagar": {"name": "Azad Nagar (Metro)", "lat": 19.1270, "lon": 72.8400},
+    "m1_andheri": {"name": "Andheri (Metro)", "lat": 19.1200, "lon": 72.8480},
+    "m1_weh": {"name": "Western Express Highway (Metro)", "lat": 19.1160, "lon": 72.8550},
+    "m1_chakala": {"name": "Chakala (Metro)", "lat": 19.1110, "lon": 72.8610},
+    "m1_airport_road": {"name": "Airport Road (Metro)", "lat": 19.1100, "lon": 72.8700},
+    "m1_marol_naka": {"name": "Marol Naka (Metro)", "lat": 19.1080, "lon": 72.8790},
+    "m1_saki_naka": {"name": "Saki Naka (Metro)", "lat": 19.1030, "lon": 72.8880},
+    "m1_asalpha": {"name": "Asalpha (Metro)", "lat": 19.0960, "lon": 72.8960},
+    "m1_jagruti_nagar": {"name": "Jagruti Nagar (Metro)", "lat": 19.0930, "lon": 72.9020},
+    "m1_ghatkopar": {"name": "Ghatkopar (Metro)", "lat": 19.0870, "lon": 72.9100},
+}
+
+# ---------------- LINE TOPOLOGY ----------------
+# Each line is a list of routes; a route is an ordered list of
+# (station_id, km from the route's first station).
+# Branches (Kasara/Karjat, Harbour to Goregaon) are separate routes.
+
+LINE_NAMES = {
+    "WR": "Western Line",
+    "CR": "Central Line",
+    "HR": "Harbour Line",
+    "THB": "Trans-Harbour Line",
+    "M1": "Metro Line 1",
+}
+
+LINE_ROUTES = {
+    "WR": [[
+        ("churchgate", 0), ("marine_lines", 1.5), ("charni_road", 2.5),
+        ("grant_road", 3.5), ("mumbai_central", 4.5), ("mahalakshmi", 6),
+        ("lower_parel", 7), ("prabhadevi", 8), ("dadar", 9),
+        ("mahim_junction", 10), ("bandra", 12), ("khar_road", 14),
+        ("santacruz", 15), ("vile_parle", 17), ("andheri", 19),
+        ("jogeshwari", 21), ("ram_mandir", 22.5), ("goregaon", 24),
+        ("malad", 27), ("kandivali", 30), ("borivali", 33),
+        ("dahisar", 37), ("mira_road", 41), ("bhayandar", 44),
+        ("naigaon", 48), ("vasai_road", 52), ("nalla_sopara", 56),
+        ("virar", 60),
+    ]],
+    "CR": [
+        [
+            ("csmt", 0), ("masjid", 1.5), ("sandhurst_road", 2),
+            ("byculla", 4), ("chinchpokli", 5), ("currey_road", 6),
+            ("parel", 7), ("dadar", 9), ("matunga", 11), ("sion", 13),
+            ("kurla", 15), ("vidyavihar", 17), ("ghatkopar", 18),
+            ("vikhroli", 21), ("kanjurmarg", 23), ("bhandup", 25),
+            ("nahur", 27), ("mulund", 29), ("thane", 34), ("kalwa", 37),
+            ("mumbra", 40), ("diva", 43), ("dombivli", 48),
+            ("thakurli", 50), ("kalyan", 54), ("shahad", 56),
+            ("titwala", 61), ("asangaon", 86), ("kasara", 121),
+        ],
+        [
+            ("kalyan", 54), ("vithalwadi", 56), ("ulhasnagar", 58),
+            ("ambernath", 62), ("badlapur", 68), ("neral", 87),
+            ("karjat", 101), ("khopoli", 115),
+        ],
+    ],
+    "HR": [
+        [
+            ("csmt", 0), ("masjid", 1.5), ("sandhurst_road", 2),
+            ("dockyard_road", 3), ("sewri", 5), ("vadala_road", 7),
+            ("gtb_nagar", 9), ("chunabhatti", 11), ("kurla", 12),
+            ("tilak_nagar", 13), ("chembur", 14), ("govandi", 16),
+            ("mankhurd", 19), ("vashi", 25), ("sanpada", 27),
+            ("juinagar", 29), ("nerul", 32), ("seawoods", 33),
+            ("belapur", 35), ("kharghar", 37), ("mansarovar", 39),
+            ("khandeshwar", 40), ("panvel", 42),
+        ],
+        [
+            ("vadala_road", 7), ("kings_circle", 9), ("mahim_junction", 11),
+            ("bandra", 13), ("khar_road", 15), ("santacruz", 16),
+            ("vile_parle", 18), ("andheri", 20), ("jogeshwari", 22),
+            ("ram_mandir", 23.5), ("goregaon", 25),
+        ],
+    ],
+    "THB": [[
+        ("thane", 0), ("airoli", 5), ("ghansoli", 10),
+        ("kopar_khairane", 12), ("turbhe", 16), ("sanpada", 19),
+        ("vashi", 21),
+    ]],
+    "M1": [[
+        ("m1_versova", 0), ("m1_dn_nagar", 1.2), ("m1_azad_nagar", 2),
+        ("m1_andheri", 3), ("m1_weh", 4), ("m1_chakala", 5),
+        ("m1_airport_road", 5.8), ("m1_marol_naka", 6.6),
+        ("m1_saki_naka", 7.6), ("m1_asalpha", 8.8),
+        ("m1_jagruti_nagar", 10), ("m1_ghatkopar", 11.4),
+    ]],
+}
+
+# Walking links between a metro station and its railway station
+METRO_LINKS = {
+    "m1_andheri": "andheri",
+    "m1_ghatkopar": "ghatkopar",
+}
+
+# ---------------- ALIASES ----------------
+# Lowercase spelling -> station id. Covers abbreviations,
+# common misspellings and the spellings used by scraped timetables.
+
+STATION_ALIASES = {
+    "cst": "csmt", "mumbai cst": "csmt", "mumbai csmt": "csmt",
+    "mumbai_cst": "csmt", "vt": "csmt", "victoria terminus": "csmt",
+    "chhatrapati shivaji": "csmt", "cstm": "csmt",
+    "anderi": "andheri", "andhery": "andheri", "andehri": "andheri",
+    "borivli": "borivali", "borivilli": "borivali", "kandivli": "kandivali",
+    "dombivali": "dombivli", "dombivili": "dombivli",
+    "ghatkopr": "ghatkopar",
+    "churchgte": "churchgate", "chruchgate": "churchgate",
+    "curla": "kurla",
+    "thana": "thane", "thanae": "thane",
+    "kalian": "kalyan", "kalyaan": "kalyan",
+    "panwel": "panvel",
+    "vasai": "vasai_road",
+    "nallasopara": "nalla_sopara", "nala sopara": "nalla_sopara",
+    "nalasopara": "nalla_sopara",
+    "khar": "khar_road",
+    "bombay central": "mumbai_central",
+    "marine line": "marine_lines",
+    "mahim": "mahim_junction",
+    "elphinstone road": "prabhadevi",
+    "belapur cbd": "belapur", "cbd belapur": "belapur", "cbd": "belapur",
+    "miraroad": "mira_road",
+    "bhayander": "bhayandar",
+    "dahiser": "dahisar",
+    "vileparle": "vile_parle", "parle": "vile_parle",
+    "vidhyavihar": "vidyavihar",
+    "vadala": "vadala_road", "wadala": "vadala_road",
+    "kanjur marg": "kanjurmarg",
+    "versova": "m1_versova", "marol naka": "m1_marol_naka",
+    "saki naka": "m1_saki_naka", "chakala": "m1_chakala",
+    "airport road": "m1_airport_road", "asalpha": "m1_asalpha",
+    "d n nagar": "m1_dn_nagar", "azad nagar": "m1_azad_nagar",
+    "jagruti nagar": "m1_jagruti_nagar",
+    "western express highway": "m1_weh",
+}
+
+
+# ---------------- LOOKUP TABLES ----------------
+
+def _build_lookups():
+    """Attach line membership to stations and build the name index."""
+    for station in STATIONS.values():
+        station["lines"] = []
+
+    for line, routes in LINE_ROUTES.items():
+        for route in routes:
+            for station_id, _ in route:
+                lines = STATIONS[station_id]["lines"]
+                if line not in lines:
+                    lines.append(line)
+
+    name_index = {}
+    for station_id, station in STATIONS.items():
+        name_index[station["name"].lower()] = station_id
+        name_index[station_id.replace("_", " ")] = station_id
+    # Rail station wins over the metro station of the same name
+    for station_id, station in STATIONS.items():
+        if not station_id.startswith("m1_"):
+            name_index[station["name"].lower()] = station_id
+    name_index.update(STATION_ALIASES)
+    return name_index
+
+
+_NAME_INDEX = _build_lookups()
+
+
+def station_id(name):
+    """Get canonical station id for a name or alias (None if unknown)."""
+    if not name:
+        return None
+    key = " ".join(name.lower().replace("_", " ").split())
+    if key in _NAME_INDEX:
+        return _NAME_INDEX[key]
+    return _NAME_INDEX.get(key.replace(" station", "").strip())
+
+
+def canonical_name(name):
+    """Get canonical display name for a station name or alias."""
+    sid = station_id(name)
+    return STATIONS[sid]["name"] if sid else None
+
+
+def get_station(sid):
+    """Get station record (name, lat, lon, lines) by id."""
+    return STATIONS.get(sid)
+
+
+def station_lines(sid):
+    """Get line codes serving a station."""
+    station = STATIONS.get(sid)
+    return station["lines"] if station else []
+
+
+def stations_on_line(line):
+    """Get all station ids on a line (in route order, no duplicates)."""
+    result = []
+    for route in LINE_ROUTES.get(line, []):
+        for sid, _ in route:
+            if sid not in result:
+                result.append(sid)
+    return result
+
+
+def all_names():
+    """All spellings the registry recognises (names + aliases)."""
+    return dict(_NAME_INDEX)
+
+
+# ---------------- FREE-TEXT MATCHING ----------------
+
+# Aliases too ambiguous to trust inside free text (reviews, posts)
+_TEXT_SKIP = {"vt", "cbd", "parle"}
+_text_matcher = None
+
+
+def find_stations(text):
+    """
+    Station ids mentioned in free text, in order of first mention.
+    One pass over the text, whole words only, longest spelling wins
+    ("lower parel" is not also "parel").
+    """
+    global _text_matcher
+    if _text_matcher is None:
+        matcher = KeywordAutomaton(word_boundaries=True)
+        for spelling, sid in _NAME_INDEX.items():
+            if spelling not in _TEXT_SKIP:
+                matcher.add(spelling, sid)
+        _text_matcher = matcher.build()
+
+    found = []
+    for _, _, sid in _text_matcher.find(text or ""):
+        if sid not in found:
+            found.append(sid)
+    return found
+
+
+def route_distance_km(from_sid, to_sid):
+    """
+    Distance along a single route if both stations share one.
+    Returns (line, km) for the shortest shared route, else None.
+    """
+    best = None
+    for line, routes in LINE_ROUTES.items():
+        for route in routes:
+            km = dict(route)
+            if from_sid in km and to_sid in km:
+                dist = abs(km[to_sid] - km[from_sid])
+                if best is None or dist < best[1]:
+                    best = (line, dist)
+    return best
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+import pytest
+
+import google_sheets_reviews as sheets
+import review_store
+from fake_sheets import FakeClient, FakeCredentials
+
+
+def _row(review_id, subject="Dadar", comment="Platform 1 was crowded"):
+    return [review_id, "2024-01-01T08:00:00", "station", subject, "3", comment, "Tester", "user"]
+
+
+@pytest.fixture
+def sheet(tmp_path, monkeypatch):
+    monkeypatch.setattr(review_store, "DB_FILE", str(tmp_path / "reviews.db"))
+    client = FakeClient()
+    sheets.set_client(client)
+    yield sheets.get_worksheet(sheets.REVIEWS_SHEET)
+    sheets.set_client(None)
+
+
+def _user_ids():
+    return {r['id'] for r in review_store.get_reviews(origin="user")}
+
+
+def test_full_sync_removes_rows_deleted_from_sheet(sheet):
+    sheet.append_rows([_row("a"), _row("b"), _row("c", "Thane", "Thane was fine")])
+    sync = sheets.ReviewSync(full_interval=0)
+    sync.sync()
+    assert _user_ids() == {"a", "b", "c"}
+
+    # Written locally, not yet flushed to the sheet: must survive
+    review_store.add_reviews([{"id": "pending", "subject": "Dadar", "rating": 4,
+                               "comment": "Dadar queued review", "timestamp": "2024-01-02"}])
+    del sheet.rows[2:4]            # rows "b" and "c"
+    sync.sync()
+
+    assert _user_ids() == {"a", "pending"}
+    assert sync.stats['deleted'] == 2
+    assert review_store.station_summary("thane") is None
+    assert review_store.station_summary("dadar")["review_count"] == 2
+
+
+def test_token_refreshed_on_cached_handles(tmp_path, monkeypatch):
+    monkeypatch.setattr(review_store, "DB_FILE", str(tmp_path / "reviews.db"))
+    creds = FakeCredentials(lifetime=3600)
+    sheets.set_client(FakeClient(), creds)
+    try:
+        assert sheets.get_worksheet(sheets.REVIEWS_SHEET) is not None
+        assert creds.refreshes == 1
+
+        # Cached handles, token still valid: no refresh
+        for _ in range(5):
+            assert sheets.get_worksheet(sheets.REVIEWS_SHEET) is not None
+        assert creds.refreshes == 1
+
+        # Token about to expire: the next cache hit refreshes it
+        creds.expiry -= timedelta(seconds=3600 - sheets.TOKEN_REFRESH_MARGIN + 1)
+        assert sheets.get_worksheet(sheets.REVIEWS_SHEET) is not None
+        assert creds.refreshes == 2
+        assert creds.token == "token-2"
+
+        # A failed refresh drops the cached handles instead of handing out a dead token
+        creds.expiry -= timedelta(seconds=3600)
+        creds.fail = True
+        assert sheets.get_worksheet(sheets.REVIEWS_SHEET) is None
+        assert sheets._handles['worksheets'] == {}
+    finally:
+        sheets.set_client(None)
@@ -0,0 +1,49 @@
+import functools
+import os
+
+import google_sheets_reviews
+import refresh_daemon
+import review_store
+import scrape_all_trains
+from fake_railway_site import FakeRailwaySite
+from http_cache import HttpCache
+from scrape_http import Fetcher
+from timetable_publish import current_generation
+
+POST = "Dadar bridge reopened today, the fast train platform is much less crowded"
+
+
+def _daemon_scraper(source):
+    yield {"source": "Reddit", "content": POST, "url": "https://example.com/dadar-bridge",
+           "rating": 4}
+
+
+def test_review_from_daemon_visible_to_bot(tmp_path, monkeypatch):
+    monkeypatch.setattr(review_store, "DB_FILE", str(tmp_path / "reviews.db"))
+
+    # The bot has read (and cached) Dadar's summary before the daemon runs
+    before = review_store.station_summary("dadar")
+    count = before["review_count"] if before else 0
+
+    scrapers = {"reddit": (_daemon_scraper, 5, 0.0)}
+    assert refresh_daemon.run_job("reviews", refresh_daemon.refresh_reviews, (scrapers,), timeout=60)
+
+    assert review_store.station_summary("dadar")["review_count"] == count + 1
+    summary = google_sheets_reviews.get_review_summary_sheets("Dadar")
+    assert "Dadar bridge reopened" in summary
+
+
+def test_offline_timetable_job_twice_publishes_once(tmp_path, monkeypatch):
+    # No politeness delay against the local site
+    monkeypatch.setattr(scrape_all_trains, "Fetcher", functools.partial(Fetcher, host_interval=0))
+    root = str(tmp_path / "generations")
+    with FakeRailwaySite() as site:
+        first = refresh_daemon.refresh_timetables(root, site.url, site.url,
+                                                  cache=HttpCache(str(tmp_path / "cache1")))
+        # A cold cache re-fetches and re-parses every page: same trains, no new generation
+        second = refresh_daemon.refresh_timetables(root, site.url, site.url,
+                                                   cache=HttpCache(str(tmp_path / "cache2")))
+    assert first == 1
+    assert second is None
+    assert current_generation(root) == 1
+    assert sorted(os.listdir(root)) == ["000001", "CURRENT"]
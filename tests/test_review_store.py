@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+import review_store
+import sentiment_backfill
+
+needs_sentiment = pytest.mark.skipif(not review_store.SENTIMENT_AVAILABLE,
+                                     reason="vaderSentiment is not installed")
+
+
+def _review(i, comment):
+    return {"id": f"r-{i}", "category": "station", "subject": "Dadar", "rating": 3,
+            "comment": comment, "username": "Test", "timestamp": f"2024-01-01T00:00:{i:02d}"}
+
+
+def _unscored(conn):
+    return conn.execute("SELECT COUNT(*) FROM reviews WHERE sentiment IS NULL").fetchone()[0]
+
+
+@needs_sentiment
+def test_opening_store_leaves_scoring_to_backfill(tmp_path):
+    db_file = str(tmp_path / "reviews.db")
+    conn = review_store.get_connection(db_file)
+    review_store.add_reviews([_review(i, f"Dadar was lovely on trip {i}") for i in range(5)],
+                             conn=conn, score=False)
+
+    # A fresh store open (new process / new database file) must not score inline
+    review_store._initialized.discard(db_file)
+    review_store._initialize(conn, db_file)
+    assert _unscored(conn) == 5
+
+    stats = sentiment_backfill.backfill(workers=1, missing_only=True, db_file=db_file, progress=False)
+    assert stats["reviews"] == 5
+    assert _unscored(conn) == 0
+
+
+def _add_from_other_thread(db_file, reviews):
+    """Write through a different connection, as another thread or process would."""
+    worker = threading.Thread(target=lambda: review_store.add_reviews(
+        reviews, conn=review_store.get_connection(db_file), score=False))
+    worker.start()
+    worker.join()
+
+
+def test_station_summary_follows_other_connections(tmp_path):
+    db_file = str(tmp_path / "reviews.db")
+    conn = review_store.get_connection(db_file)
+    assert review_store.station_summary("dadar", conn=conn) is None
+
+    _add_from_other_thread(db_file, [_review(1, "Dadar platform was crowded")])
+    assert review_store.station_summary("dadar", conn=conn)["review_count"] == 1
+
+    _add_from_other_thread(db_file, [_review(2, "Dadar bridge is being repaired")])
+    assert review_store.station_summary("dadar", conn=conn)["review_count"] == 2
+
+    review_store.add_reviews([_review(3, "Dadar was fine")], conn=conn, score=False)
+    assert review_store.station_summary("dadar", conn=conn)["review_count"] == 3
+
+
+def test_reviews_for_subject_matches_all_words_in_comment(tmp_path, monkeypatch):
+    monkeypatch.setattr(review_store, "DB_FILE", str(tmp_path / "reviews.db"))
+    review_store.add_reviews([
+        {"id": "1", "subject": "General", "rating": 3, "comment": "The mumbai local was late"},
+        # "local" only in the subject column: the column filter must cover every word
+        {"id": "2", "subject": "local", "rating": 3, "comment": "mumbai rains again"},
+        {"id": "3", "subject": "General", "rating": 3, "comment": "Andheri bridge closed"},
+    ], score=False)
+
+    assert [r['id'] for r in review_store.reviews_for_subject("Mumbai Local")] == ["1"]
+    assert review_store.reviews_for_subject("") == []
+    assert review_store.reviews_for_subject("   ") == []
+    assert review_store.reviews_for_subject('"') == []
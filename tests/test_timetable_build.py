@@ -0,0 +1,139 @@
+import pandas as pd
+import pytest
+
+from multimodal_router import MultimodalGraph
+from timetable_build import RAIL_LINES, SOURCE_FILES, validate
+from timetable_refresh import COLUMNS
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return {path: pd.read_csv(path, dtype=str) for path in SOURCE_FILES}
+
+
+@pytest.fixture(scope="module")
+def built(frames):
+    return validate(frames)
+
+
+def test_every_line_keeps_trains(frames, built):
+    trains, report = built
+    scraped = set(pd.concat(frames.values())['line']) & set(RAIL_LINES)
+    assert {'WR', 'CR', 'HR'} <= scraped
+    for line in scraped:
+        assert report['trains_by_line'].get(line, 0) > 0, line
+    assert report['rejected'].get("unknown dest station", 0) == 0
+
+
+def test_harbour_rows_kept_with_unknown_dest(built):
+    trains, report = built
+    panvel = trains[(trains['line'] == 'HR') & (trains['source_id'] == 'panvel')]
+    assert len(panvel) > 200
+    assert panvel['dest_id'].isna().all()
+    assert report['repaired']['origin time from dest column'] > 0
+
+
+def test_harbour_time_taken_from_origin_column():
+    row = {'id': 'HR_1', 'line': 'HR', 'time': '7:20 am', 'source': 'Panvel',
+           'dest': '7:05 am', 'type': 'slow'}
+    trains, report = validate({'test': pd.DataFrame([row], columns=COLUMNS)})
+    assert trains.loc[0, 'minute'] == 7 * 60 + 5
+    assert trains.loc[0, 'time'] == '7:05 am'
+    assert pd.isna(trains.loc[0, 'dest'])
+
+
+def test_unknown_dest_name_still_rejected():
+    row = {'id': 'WR_1', 'line': 'WR', 'time': '7:20 am', 'source': 'Churchgate',
+           'dest': 'Atlantis', 'type': 'SLOW'}
+    trains, report = validate({'test': pd.DataFrame([row], columns=COLUMNS)})
+    assert len(trains) == 0
+    assert report['rejected'] == {"unknown dest station": 1}
+
+
+def test_generated_extra_lines_pass_the_build():
+    from timetable_generator import build_network, generate
+
+    trains, _ = generate(scale=1, extra_lines=2)
+    frames = {'generated': trains.astype({'minute': str, 'is_ac': str})}
+    _, report = validate(frames)
+    assert report['rejected'] == {"unknown line": int(trains['line'].str.startswith('X').sum())}
+
+    clean, report = validate(frames, network=build_network(2))
+    assert report['rejected'] == {}
+    assert len(clean) + report['duplicates'] == len(trains)
+    assert {'X1', 'X2'} <= set(report['trains_by_line'])
+    assert clean.loc[clean['line'] == 'X1', 'source_id'].notna().all()
+
+
+def test_router_has_harbour_departures():
+    graph = MultimodalGraph()
+    assert graph.departures[('HR', 0, -1, 'panvel')]
+    assert graph.departures[('HR', 0, 1, 'csmt')]
+    times = graph.departures[('HR', 0, -1, 'panvel')]
+    assert graph.rail_wait('panvel', 'HR', 0, -1, times[0] - 2) == 2
+
+
+def test_chatbot_trains_from_panvel():
+    import train_chatbot_enhanced as chatbot
+
+    trains, _, total = chatbot.get_trains(source="Panvel", show_all=True, limit=1000)
+    assert total > 200
+    assert chatbot.dest_label(trains.iloc[0]['dest']) == "—"
+
+
+def test_clean_timetable_revalidates_off_the_request_thread(tmp_path, monkeypatch):
+    import threading
+    import time
+
+    import timetable_build
+    from timetable_build import CleanTimetable, build
+
+    rows = [{'id': f'WR_{i}', 'line': 'WR', 'time': f'{7 + i}:20 am', 'source': 'Churchgate',
+             'dest': 'Virar', 'type': 'SLOW'} for i in range(3)]
+    csv = tmp_path / "local_trains.csv"
+    pd.DataFrame(rows[:2], columns=COLUMNS).to_csv(csv, index=False)
+    artifact = str(tmp_path / "timetable.pkl")
+    build([str(csv)], artifact, str(tmp_path / "report.json"))
+
+    clean = CleanTimetable([str(csv)], artifact)
+    assert len(clean.get()) == 2
+    assert clean.stats["artifact_loads"] == 1
+
+    release, threads = threading.Event(), []
+    real_validate = timetable_build.validate
+
+    def slow_validate(frames, network=None):
+        threads.append(threading.current_thread())
+        release.wait(5)
+        return real_validate(frames, network)
+
+    monkeypatch.setattr(timetable_build, "validate", slow_validate)
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(csv, index=False)
+
+    assert len(clean.get()) == 2            # old trains while the new ones validate
+    release.set()
+    for _ in range(100):
+        if clean.stats["background_refreshes"]:
+            break
+        time.sleep(0.05)
+    assert len(clean.get()) == 3
+    assert threads and threading.current_thread() not in threads
+
+
+def test_serving_validation_uses_the_built_network(tmp_path):
+    from timetable_build import CleanTimetable, build
+    from timetable_generator import build_network, generate
+
+    trains, _ = generate(scale=1, extra_lines=1)
+    csv = tmp_path / "local_trains.csv"
+    trains[COLUMNS].to_csv(csv, index=False)
+    artifact = str(tmp_path / "timetable.pkl")
+    report = build([str(csv)], artifact, str(tmp_path / "report.json"), network=build_network(1))
+    assert report['extra_lines'] == ['X1']
+
+    # A scrape lands after the build: the CSV no longer matches the artifact
+    trains[COLUMNS].iloc[:-1].to_csv(csv, index=False)
+    clean = CleanTimetable([str(csv)], artifact)
+    served = clean.get()
+    assert clean.stats["validations"] == 1
+    assert (served['line'] == 'X1').sum() == (trains.iloc[:-1]['line'] == 'X1').sum()
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from fake_railway_site import FIXTURES_DIR, FakeRailwaySite
+from scrape_all_trains import _lifeline_name, _spaced, scrape_line
+from timetable_extract import clock_minutes, extract_timetable
+
+
+def _page(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _rows(name, line, clean_source, clean_dest):
+    return list(extract_timetable(_page(name), line, clean_source, clean_dest))
+
+
+def test_western_page():
+    rows = _rows("timetable_western_churchgate_virar.html", "WR", str.title, str.title)
+    assert len(rows) == 12
+    first = rows[0]
+    assert (first.time, first.minute, first.source, first.dest, first.type, first.is_ac) == \
+        ("4:15 am", 4 * 60 + 15, "Churchgate", "Virar", "SLOW", False)
+    assert (first.source_id, first.dest_id) == ("churchgate", "virar")
+    assert all(row.source_id == "churchgate" and row.dest_id for row in rows)
+
+
+def test_central_page():
+    rows = _rows("timetable_central_mumbai_cst_kalyan.html", "CR", _lifeline_name, _spaced)
+    assert len(rows) == 12
+    assert [(row.source, row.dest) for row in rows[:2]] == [("Mumbai CSMT", "Kasara"),
+                                                            ("Mumbai CSMT", "Khopoli")]
+    assert {row.source_id for row in rows} == {"csmt"}
+    assert all(row.dest_id for row in rows)
+
+
+def test_harbour_page_has_no_destination():
+    rows = _rows("timetable_harbour_panvel_belapur.html", "HR", _lifeline_name, _spaced)
+    assert len(rows) == 12
+    first = rows[0]
+    # Origin, departure from origin, departure at the searched station
+    assert (first.source_id, first.time, first.minute) == ("panvel", "4:23 am", 4 * 60 + 23)
+    assert (first.dest, first.dest_id) == ("", None)
+    assert all(row.dest_id is None and row.minute == clock_minutes(row.time) for row in rows)
+
+
+@pytest.mark.parametrize("name", sorted(n for n in os.listdir(FIXTURES_DIR) if n.startswith("timetable_")))
+def test_fixture_rows_are_typed(name):
+    line = {"western": "WR", "central": "CR", "harbour": "HR"}[name.split("_")[1]]
+    rows = _rows(name, line, _lifeline_name, _spaced)
+    assert rows
+    assert all(row.minute is not None and row.source_id for row in rows)
+
+
+def test_fake_site_replays_fixtures():
+    with FakeRailwaySite() as site:
+        trains = scrape_line("Harbour Line", "harbour", "HR", ["Panvel", "Belapur"],
+                             _lifeline_name, _spaced, base_url=site.url)
+    recorded = [t for t in trains if t['source'] == "Panvel"]
+    assert len(recorded) == 12
+    assert all(t['dest'] == "" for t in recorded)
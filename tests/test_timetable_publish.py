@@ -0,0 +1,16 @@
+import os
+
+from timetable_publish import current_generation, generation_dir, publish, staging_dir
+
+
+def test_publish_skips_folder_orphaned_by_crash(tmp_path):
+    root = str(tmp_path)
+    assert publish(staging_dir(root), root) == 1
+
+    # Crash after renaming staging to 000002 but before CURRENT was written
+    os.replace(staging_dir(root), generation_dir(2, root))
+    assert current_generation(root) == 1
+
+    assert publish(staging_dir(root), root) == 3
+    assert current_generation(root) == 3
+    assert os.path.isdir(generation_dir(3, root))
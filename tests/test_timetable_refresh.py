@@ -0,0 +1,35 @@
+import pandas as pd
+
+from timetable_refresh import TimetableView, has_changes, read_timetable, refresh_timetable
+
+SCRAPE = [
+    {'line': 'WR', 'time': '4:15 am', 'source': 'Churchgate', 'dest': 'Virar', 'type': 'SLOW'},
+    {'line': 'HR', 'time': '4:23 am', 'source': 'Panvel', 'dest': '', 'type': 'SLOW'},
+]
+
+
+def test_identical_rescrape_has_no_changes(tmp_path):
+    path, log = str(tmp_path / "trains.csv"), str(tmp_path / "changes.jsonl")
+    first = refresh_timetable(SCRAPE, path, log)
+    assert len(first['added']) == 2
+    ids = list(read_timetable(path)[0]['id'])
+
+    for _ in range(2):
+        again = refresh_timetable(SCRAPE, path, log)
+        assert has_changes(again) is False
+        assert again['version'] == again['base_version']
+    assert list(read_timetable(path)[0]['id']) == ids
+
+
+def test_view_reads_empty_dest_as_empty_string(tmp_path):
+    path, log = str(tmp_path / "trains.csv"), str(tmp_path / "changes.jsonl")
+    refresh_timetable(SCRAPE, path, log)
+    view = TimetableView(path, log)
+    df = view.get()
+    assert df.loc[df['line'] == 'HR', 'dest'].tolist() == [""]
+    assert view.version == read_timetable(path)[1]
+
+    refresh_timetable(SCRAPE + [dict(SCRAPE[0], time='5:15 am')], path, log)
+    assert view.get().equals(read_timetable(path)[0])
+    assert view.stats["changes_applied"] == 1
+    assert not pd.isna(view.get()['dest']).any()
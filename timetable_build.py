@@ -0,0 +1,312 @@
+# ==================================================
+# Mumbai Local Train - Timetable Build (validate + compact)
+# ==================================================
+# Cleans the timetable CSVs once, when they are built,
+# so query code can trust what it reads:
+# - station names canonicalized via station_registry
+#   ("Dombivili" -> "Dombivli"), ids attached
+# - times normalized to '4:15 am' plus minute of day
+# - rows that can't be repaired for certain are
+#   rejected, each with a reason; trains whose page had
+#   no destination are kept with dest unknown
+# - identical trains dropped, rows sorted by
+#   (line, source, minute)
+# Output: a compact typed artifact (pickled DataFrame,
+# categorical columns) and a JSON validation report.
+# scrape_all_trains.main() rebuilds both after a scrape.
+# ==================================================
+
+import argparse
+import json
+import os
+import pickle
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+from station_registry import LINE_NAMES, STATIONS, station_id
+from timetable_extract import clock_minutes
+from timetable_refresh import COLUMNS, TimetableView, read_timetable
+
+BASE_DIR = os.path.dirname(__file__)
+SOURCE_FILES = [
+    os.path.join(BASE_DIR, "mumbai_local_trains.csv"),
+    os.path.join(BASE_DIR, "mumbai_ac_trains.csv"),
+]
+ARTIFACT_FILE = os.path.join(BASE_DIR, "timetable.pkl")
+REPORT_FILE = os.path.join(BASE_DIR, "timetable_report.json")
+
+RAIL_LINES = [line for line in LINE_NAMES if line != "M1"]
+TRAIN_TYPES = {"SLOW", "FAST", "MEDIUM", "SEMI"}
+SAMPLES_PER_REASON = 3       # rejected rows quoted in the report
+
+_TYPE = re.compile(r"^(AC)?\s*([A-Z]+)$")
+
+
+def _normal_time(minute):
+    """Minute of day -> '4:15 am'."""
+    hour, minute = divmod(minute, 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'pm' if hour >= 12 else 'am'}"
+
+
+def _normal_type(text):
+    """'ac  slow' -> 'AC SLOW' (None if it isn't a known train type)."""
+    match = _TYPE.match(" ".join(text.upper().split()))
+    if not match or match.group(2) not in TRAIN_TYPES:
+        return None
+    return f"AC {match.group(2)}" if match.group(1) else match.group(2)
+
+
+# ==================================================
+# VALIDATE
+# ==================================================
+
+def _network_lookups(network):
+    """(lines, station name -> id, station id -> name) with a network's extra lines and stations."""
+    stations, line_routes = network or ({}, {})
+    lines = set(RAIL_LINES) | {line for line in line_routes if line != "M1"}
+    extra = {sid: info['name'] for sid, info in stations.items() if sid not in STATIONS}
+    by_name = {" ".join(name.lower().split()): sid for sid, name in extra.items()}
+
+    def lookup(name):
+        return station_id(name) or by_name.get(" ".join(name.lower().split()))
+
+    names = {sid: info['name'] for sid, info in STATIONS.items()}
+    names.update(extra)
+    return lines, lookup, names
+
+
+def validate(frames, network=None):
+    """
+    Clean timetable DataFrames ({file name: df with COLUMNS}).
+    Returns (trains, report); trains has COLUMNS plus minute,
+    source_id, dest_id and is_ac, sorted by (line, source, minute).
+    dest / dest_id are missing where the page gave no destination.
+    network is (stations, line_routes) like timetable_generator's
+    build_network(), for lines and stations beyond station_registry.
+    """
+    raw = pd.concat([df[COLUMNS].fillna("").astype(str).apply(lambda col: col.str.strip())
+                     .assign(file=name) for name, df in frames.items()], ignore_index=True)
+    rejected, samples, repaired, renamed = Counter(), {}, Counter(), Counter()
+    lines, lookup, station_names = _network_lookups(network)
+
+    # Lookups run once per distinct value, not once per row
+    names = pd.unique(pd.concat([raw['source'], raw['dest']]))
+    ids = {name: lookup(name) for name in names}
+    minutes = {t: clock_minutes(t) for t in pd.unique(raw['time'])}
+    types = {t: _normal_type(t) for t in pd.unique(raw['type'])}
+
+    df = raw.assign(minute=raw['time'].map(minutes), type_=raw['type'].map(types),
+                    source_id=raw['source'].map(ids), dest_id=raw['dest'].map(ids))
+
+    def reject(mask, reason):
+        nonlocal df
+        if mask.any():
+            rejected[reason] += int(mask.sum())
+            samples[reason] = df.loc[mask, COLUMNS].head(SAMPLES_PER_REASON).to_dict('records')
+            df = df[~mask]
+
+    reject(pd.concat([df[c].str.lower() == c for c in COLUMNS], axis=1).any(axis=1), "header row")
+    reject((df[['line', 'time', 'source', 'type']] == "").any(axis=1), "missing field")
+    reject(~df['line'].isin(lines), "unknown line")
+
+    # Harbour pages list origin, origin departure, departure at the searched
+    # station - no destination. Keep the train from its origin, dest unknown.
+    origin_times = df['dest'].map(clock_minutes)
+    shifted = df['dest_id'].isna() & origin_times.notna()
+    if shifted.any():
+        repaired['origin time from dest column'] = int(shifted.sum())
+        df.loc[shifted, 'minute'] = origin_times[shifted]
+        df.loc[shifted, 'dest'] = ""
+
+    reject(df['minute'].isna(), "unparseable time")
+    reject(df['source_id'].isna(), "unknown source station")
+    reject(df['dest_id'].isna() & (df['dest'] != ""), "unknown dest station")
+    reject(df['source_id'] == df['dest_id'], "same source and destination")
+    reject(df['type_'].isna(), "unknown train type")
+    reject(df['id'].duplicated() & (df['id'] != ""), "duplicate id")
+
+    # Repairs: spellings, time formats, type spelling
+    for column in ('source', 'dest'):
+        canonical = df[f'{column}_id'].map(station_names, na_action='ignore')
+        changed = canonical.notna() & (df[column] != canonical)
+        renamed.update(f"{old} -> {new}" for old, new in zip(df.loc[changed, column], canonical[changed]))
+        df[column] = canonical
+    df['minute'] = df['minute'].astype('int16')
+    times = df['minute'].map(_normal_time)
+    repaired['time format'] = int((df['time'] != times).sum())
+    repaired['train type'] = int((df['type'] != df['type_']).sum())
+    repaired['station name'] = sum(renamed.values())
+    df = df.assign(time=times, type=df['type_'], is_ac=df['type_'].str.startswith('AC '))
+
+    key = ['line', 'minute', 'source_id', 'dest_id', 'type']
+    duplicates = df.duplicated(key)
+    df = df[~duplicates].sort_values(['line', 'source', 'minute'], kind='stable')
+
+    trains = df[COLUMNS + ['minute', 'source_id', 'dest_id', 'is_ac']].reset_index(drop=True)
+    for column in ('line', 'source', 'dest', 'source_id', 'dest_id', 'type'):
+        trains[column] = trains[column].astype('category')
+
+    report = {
+        'built_at': datetime.now().isoformat(timespec="seconds"),
+        'rows_in': len(raw),
+        'rows_out': len(trains),
+        'rows_by_file': {name: len(df) for name, df in frames.items()},
+        'rejected': dict(rejected),
+        'duplicates': int(duplicates.sum()),
+        'repaired': {kind: n for kind, n in repaired.items() if n},
+        'renamed': dict(renamed.most_common()),
+        'rejected_samples': samples,
+        'trains_by_line': {line: int(n) for line, n in trains['line'].value_counts().items() if n},
+        'dest_unknown': int(trains['dest_id'].isna().sum()),
+    }
+    return trains, report
+
+
+def summary(report):
+    rejected = sum(report['rejected'].values())
+    lines = [f"{report['rows_in']} rows in, {report['rows_out']} clean "
+             f"({rejected} rejected, {report['duplicates']} duplicates)"]
+    lines += [f"  rejected: {reason} x{n}" for reason, n in report['rejected'].items()]
+    lines += [f"  repaired: {kind} x{n}" for kind, n in report['repaired'].items()]
+    return "\n".join(lines)
+
+
+# ==================================================
+# ARTIFACT
+# ==================================================
+
+def _write_atomic(path, mode, write):
+    tmp = f"{path}.tmp"
+    with open(tmp, mode) as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def build(paths=SOURCE_FILES, artifact_file=ARTIFACT_FILE, report_file=REPORT_FILE, network=None):
+    """
+    Validate the CSVs at paths, write the artifact and the report.
+    Returns the report. The artifact keeps the network, so trains
+    validated later at serving time (CleanTimetable) accept the same
+    lines and stations as this build.
+    """
+    read = {os.path.basename(p): read_timetable(p) for p in paths if os.path.exists(p)}
+    trains, report = validate({name: df for name, (df, _) in read.items()}, network)
+    report['versions'] = {name: version for name, (_, version) in read.items()}
+    report['extra_lines'] = sorted(_network_lookups(network)[0] - set(RAIL_LINES))
+    artifact = {'versions': report['versions'], 'network': network, 'trains': trains}
+    _write_atomic(artifact_file, "wb", lambda f: pickle.dump(artifact, f, pickle.HIGHEST_PROTOCOL))
+    _write_atomic(report_file, "w", lambda f: json.dump(report, f, indent=2))
+    return report
+
+
+def load_artifact(artifact_file=ARTIFACT_FILE):
+    """{'versions', 'network', 'trains'} from a built artifact (None if missing or unreadable)."""
+    try:
+        with open(artifact_file, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+class CleanTimetable:
+    """
+    Validated trains for serving. Follows the CSVs through their
+    TimetableViews (change-log replay); the built artifact is used
+    when it matches the CSV versions, otherwise the current rows are
+    validated in memory against the network the artifact was built
+    with (or `network`, if given). Only the first get() does that work on the
+    caller's thread: later changes are picked up by a background
+    thread and swapped in as one reference, the way
+    timetable_publish.PublishedTimetable swaps generations, while
+    get() keeps returning the previous trains.
+    """
+
+    def __init__(self, paths=SOURCE_FILES, artifact_file=ARTIFACT_FILE, network=None):
+        self.views = {os.path.basename(p): TimetableView(p) for p in paths}
+        self.artifact_file = artifact_file
+        self.network = network
+        self._current = (None, None)          # (versions, trains), swapped as one
+        self._stamps = None                   # file stamps the current trains were read at
+        self._lock = threading.Lock()         # held by whoever is refreshing
+        self.stats = {"artifact_loads": 0, "validations": 0, "background_refreshes": 0}
+
+    @property
+    def versions(self):
+        return self._current[0]
+
+    def _file_stamps(self):
+        return [view._file_stamp() for view in self.views.values()]
+
+    def _refresh(self):
+        stamps = self._file_stamps()
+        frames = {name: view.get() for name, view in self.views.items()}
+        frames = {name: df for name, df in frames.items() if df is not None}
+        versions = {name: self.views[name].version for name in frames}
+        trains = self._current[1]
+        if not frames:
+            trains = None
+        elif versions != self._current[0]:
+            artifact = load_artifact(self.artifact_file)
+            if artifact is not None and artifact['versions'] == versions:
+                trains = artifact['trains']
+                self.stats["artifact_loads"] += 1
+            else:
+                network = self.network
+                if network is None and artifact is not None:
+                    network = artifact.get('network')
+                trains = validate(frames, network)[0]
+                self.stats["validations"] += 1
+        self._current = (versions, trains)
+        self._stamps = stamps
+
+    def _refresh_in_background(self):
+        try:
+            self._refresh()
+            self.stats["background_refreshes"] += 1
+        except Exception as e:
+            print(f"Timetable revalidation failed: {e}")
+        finally:
+            self._lock.release()
+
+    def get(self):
+        """Clean trains (None if there are no timetables)."""
+        if self._file_stamps() != self._stamps:
+            if self._current[1] is None:
+                with self._lock:              # nothing to serve yet: wait for it
+                    if self._file_stamps() != self._stamps:
+                        self._refresh()
+            elif self._lock.acquire(blocking=False):
+                threading.Thread(target=self._refresh_in_background,
+                                 name="timetable-validate", daemon=True).start()
+        return self._current[1]
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the timetable CSVs and build the artifact.")
+    parser.add_argument("csv", nargs="*", default=SOURCE_FILES, help="timetable CSVs")
+    parser.add_argument("--artifact", default=ARTIFACT_FILE)
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("--extra-lines", type=int, default=0,
+                        help="accept timetable_generator's synthetic lines (same --extra-lines)")
+    args = parser.parse_args()
+
+    network = None
+    if args.extra_lines:
+        from timetable_generator import build_network
+        network = build_network(args.extra_lines)
+    report = build(args.csv, args.artifact, args.report, network)
+    print(summary(report))
+    for reason, rows in report['rejected_samples'].items():
+        print(f"  e.g. {reason}: {rows[0]}")
+    print(f"Artifact: {args.artifact} ({os.path.getsize(args.artifact) / 1024:.0f} KB), "
+          f"report: {args.report}")
@@ -0,0 +1,254 @@
+# ==================================================
+# Mumbai Local Train - Streaming Timetable Extraction
+# ==================================================
+# Pulls train rows out of the timetable pages with an
+# event-driven html.parser reader instead of building
+# a BeautifulSoup tree:
+# - table cells are collected as the tags stream past
+#   (no DOM, no find_all walks)
+# - HTML is fed in chunks, so tables are handed back
+#   as soon as their closing tag has been seen
+# - rows come out typed: minute of day, station ids,
+#   train type and AC flag
+# scrape_all_trains.py parses every page through here.
+# ==================================================
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+from html.parser import HTMLParser
+
+from station_registry import station_id
+
+CHUNK_SIZE = 64 * 1024       # characters fed to the parser at a time
+MIN_TIMETABLE_ROWS = 10      # smaller tables are navigation / layout
+AC_TABLES = (4, 5)           # go4mumbai ac-trains.php: UP, DOWN
+PARSER_VERSION = 2           # bump when extraction output changes; part of every parse cache key
+
+_CLOCK = re.compile(r"(\d{1,2})[:.](\d{2})(?:\s*([ap])\.?\s*m\b)?", re.IGNORECASE)
+
+TrainRow = namedtuple("TrainRow", "line time minute source dest source_id dest_id type is_ac")
+
+
+def clock_minutes(time_str):
+    """'4:15 am' / '04:29 PM' / '4.15am' / '16:05' -> minute of day (None if it won't parse)."""
+    match = _CLOCK.search(time_str)
+    if not match:
+        return None
+    hour, minute, period = int(match.group(1)), int(match.group(2)), match.group(3)
+    if minute > 59 or hour > (12 if period else 23):
+        return None
+    if period:
+        hour = hour % 12 + (12 if period.lower() == "p" else 0)
+    return hour * 60 + minute
+
+
+@lru_cache(maxsize=1024)
+def _station_id(name):
+    return station_id(name)
+
+
+def train_dict(row):
+    """The scrapers' plain-dict form of a TrainRow (JSON-safe, cacheable)."""
+    return {'line': row.line, 'time': row.time, 'source': row.source,
+            'dest': row.dest, 'type': row.type, 'is_ac': row.is_ac}
+
+
+# ==================================================
+# TABLE READER
+# ==================================================
+
+class TableReader(HTMLParser):
+    """
+    Collects table rows as tags stream in. Finished tables wait in
+    `.tables` as (index, rows) where index is document order and each
+    row is (td_texts, all_texts); all_texts also has <th> cells. Cell
+    text is stripped per string and joined, like get_text(strip=True).
+    Rows belong to the innermost open table.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []
+        self._open = []          # [(index, rows)] for nested tables
+        self._count = 0
+        self._row = None         # (td_texts, all_texts)
+        self._cell = None        # text parts of the open cell
+        self._cell_is_td = False
+
+    def _close_cell(self):
+        if self._cell is not None:
+            text = "".join(part.strip() for part in self._cell)
+            if self._cell_is_td:
+                self._row[0].append(text)
+            self._row[1].append(text)
+            self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row is not None:
+            if self._open:
+                self._open[-1][1].append(self._row)
+            self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "td" or tag == "th":
+            self._close_cell()
+            if self._row is None:
+                self._row = ([], [])
+            self._cell = []
+            self._cell_is_td = tag == "td"
+        elif tag == "tr":
+            self._close_row()
+            self._row = ([], [])
+        elif tag == "table":
+            self._close_row()
+            self._open.append((self._count, []))
+            self._count += 1
+
+    def handle_endtag(self, tag):
+        if tag == "td" or tag == "th":
+            self._close_cell()
+        elif tag == "tr":
+            self._close_row()
+        elif tag == "table" and self._open:
+            self._close_row()
+            self.tables.append(self._open.pop())
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def iter_tables(html, chunk_size=CHUNK_SIZE):
+    """
+    Yield (index, rows) per table, in closing order, feeding the
+    parser chunk by chunk. html may be a string or an iterable of
+    string chunks (e.g. response.iter_content(decode_unicode=True)).
+    """
+    reader = TableReader()
+    chunks = (html[i:i + chunk_size] for i in range(0, len(html), chunk_size)) \
+        if isinstance(html, str) else html
+    for chunk in chunks:
+        reader.feed(chunk)
+        if reader.tables:
+            yield from reader.tables
+            reader.tables.clear()
+    reader.close()
+    while reader._open:
+        reader.handle_endtag("table")
+    yield from reader.tables
+
+
+# ==================================================
+# TIMETABLE PAGES
+# ==================================================
+
+def extract_timetable(html, line, clean_source=str.strip, clean_dest=str.strip):
+    """TrainRows from a mumbailifeline.com timetable.php result page."""
+    for _, rows in iter_tables(html):
+        if len(rows) < MIN_TIMETABLE_ROWS:
+            continue
+        header = " ".join(rows[0][1]).lower()
+        if 'train' not in header and 'speed' not in header:
+            continue
+
+        for cells, _ in rows[1:]:
+            if len(cells) < 6:
+                continue
+            train_no, time_str = cells[0], cells[5]
+            # Skip header-like rows
+            if not time_str or 'train' in train_no.lower():
+                continue
+
+            is_ac = 'AC' in train_no.upper()
+            speed = cells[1].upper()
+            source, dest = clean_source(cells[3]), clean_dest(cells[4])
+            if clock_minutes(cells[4]) is not None and _station_id(dest) is None:
+                # Harbour layout: origin, departure from origin, departure
+                # at the searched station - the destination isn't listed
+                time_str, dest = cells[4], ""
+            yield TrainRow(line, time_str, clock_minutes(time_str), source, dest,
+                           _station_id(source), _station_id(dest),
+                           f"AC {speed}" if is_ac else speed, is_ac)
+
+
+def extract_ac_trains(html):
+    """Western AC TrainRows from go4mumbai.com/ac-trains.php."""
+    tables = dict(iter_tables(html))
+    for index in AC_TABLES:
+        for cells, _ in tables.get(index, []):
+            # Several trains per row, six cells each
+            for i in range(0, len(cells) - 5, 6):
+                if "AC" not in cells[i].upper():
+                    continue
+                time_str, source, dest = cells[i + 5], cells[i + 3], cells[i + 4]
+                yield TrainRow('WR', time_str, clock_minutes(time_str), source, dest,
+                               _station_id(source), _station_id(dest),
+                               f"AC {cells[i + 1].upper()}", True)
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    import time
+
+    from bs4 import BeautifulSoup
+
+    import fake_railway_site
+    from scrape_all_trains import CENTRAL_STATIONS, WESTERN_STATIONS, _lifeline_name
+
+    def soup_timetable(html, line, clean_source, clean_dest):
+        """The previous BeautifulSoup path, for comparison."""
+        trains = []
+        for table in BeautifulSoup(html, 'html.parser').find_all('table'):
+            rows = table.find_all('tr')
+            if len(rows) < 10:
+                continue
+            header_text = ' '.join(h.get_text(strip=True).lower() for h in rows[0].find_all(['td', 'th']))
+            if 'train' not in header_text and 'speed' not in header_text:
+                continue
+            for row in rows[1:]:
+                cols = row.find_all('td')
+                if len(cols) < 6:
+                    continue
+                train_no = cols[0].get_text(strip=True)
+                time_str = cols[5].get_text(strip=True)
+                if 'train' in train_no.lower() or not time_str:
+                    continue
+                is_ac = 'AC' in train_no.upper()
+                speed = cols[1].get_text(strip=True).upper()
+                trains.append({'line': line, 'time': time_str,
+                               'source': clean_source(cols[3].get_text(strip=True)),
+                               'dest': clean_dest(cols[4].get_text(strip=True)),
+                               'type': f"AC {speed}" if is_ac else speed, 'is_ac': is_ac})
+        return trains
+
+    # Generated pages (the recorded fixtures are checked by tests/test_timetable_extract.py)
+    pages = []
+    for route, line, stations, clean in (("western", "WR", WESTERN_STATIONS, str.title),
+                                         ("central", "CR", CENTRAL_STATIONS, _lifeline_name)):
+        pages += [(fake_railway_site.timetable_page(route, src, dst), line, clean)
+                  for src in stations for dst in stations if src != dst]
+    size = sum(len(html) for html, _, _ in pages) / 1024
+    print(f"{len(pages)} timetable pages ({size:.0f} KB)")
+
+    def run(parse):
+        start = time.perf_counter()
+        trains = [t for html, line, clean in pages for t in parse(html, line, clean, clean)]
+        return trains, time.perf_counter() - start
+
+    old, old_time = run(soup_timetable)
+    new, new_time = run(lambda *args: [train_dict(r) for r in extract_timetable(*args)])
+    print(f"BeautifulSoup: {len(old):>6} rows in {old_time:.2f}s = {len(old) / old_time:>9,.0f} rows/s")
+    print(f"Streaming:     {len(new):>6} rows in {new_time:.2f}s = {len(new) / new_time:>9,.0f} rows/s "
+          f"(x{old_time / new_time:.1f})")
+    print(f"Same rows: {old == new}")
+
+    html, line, clean = pages[0]
+    row = next(extract_timetable(html, line, clean, clean))
+    print(f"Typed row: {row}")
+    ac = list(extract_ac_trains(fake_railway_site.ac_trains_page()))
+    print(f"AC page: {len(ac)} trains, first {ac[0].time} ({ac[0].minute} min) "
+          f"{ac[0].source_id} -> {ac[0].dest_id}")
@@ -0,0 +1,319 @@
+# ==================================================
+# Mumbai Local Train - Synthetic Timetable Generator
+# ==================================================
+# Builds realistic timetables from the line topology in
+# station_registry for scale testing:
+# - service patterns (origin, terminus, type) run at
+#   peak / off-peak headways (PEAK_HOURS bands)
+# - stop-level times from route distances; FAST trains
+#   only call at FAST_STOPS
+# - scale=10 / 100 divides every headway, extra_lines
+#   grafts synthetic branch lines onto the network
+#   (validate with timetable_build.py --extra-lines N)
+# - seeded: the same arguments give the same files
+# Writes the two timetable CSVs the app loads plus
+# stop_times.npz (stop-level times, CSR arrays).
+#
+#   python timetable_generator.py --scale 10 --output-dir generated_timetables
+# ==================================================
+
+import argparse
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from station_info import CROWDED_STATIONS, PEAK_HOURS
+from station_registry import LINE_ROUTES, STATIONS, station_id
+from transfers import time_band
+
+BASE_DIR = os.path.dirname(__file__)
+OUTPUT_DIR = os.path.join(BASE_DIR, "generated_timetables")
+LOCAL_FILE = "mumbai_local_trains.csv"
+AC_FILE = "mumbai_ac_trains.csv"
+STOP_TIMES_FILE = "stop_times.npz"
+
+SERVICE_START = 4 * 60       # first departure (minutes after midnight)
+SERVICE_END = 25 * 60        # last departure, 1 AM next day
+JITTER = 0.2                 # departures move up to +/- this share of the headway
+SPEED_KMPH = {"SLOW": 32, "FAST": 45}   # average incl. halts
+
+# Fast trains call at hubs, interchanges and these
+FAST_STOPS = {"mumbai_central", "byculla", "parel", "mira_road", "bhayandar",
+              "vasai_road", "nalla_sopara", "mulund", "ulhasnagar", "ambernath"}
+
+# (line, origin, terminus, type, peak headway, off-peak headway), minutes,
+# each direction. Calibrated so scale=1 is about the size of the real CSVs.
+SERVICE_PATTERNS = [
+    ("WR", "churchgate", "borivali", "SLOW", 2, 4),
+    ("WR", "churchgate", "virar", "SLOW", 3, 6),
+    ("WR", "churchgate", "virar", "FAST", 3, 6),
+    ("WR", "churchgate", "borivali", "FAST", 4, 8),
+    ("WR", "churchgate", "andheri", "SLOW", 4, 8),
+    ("WR", "churchgate", "bhayandar", "SLOW", 8, 15),
+    ("WR", "churchgate", "vasai_road", "SLOW", 12, 25),
+    ("WR", "churchgate", "virar", "AC FAST", 20, 60),
+    ("WR", "churchgate", "borivali", "AC SLOW", 30, 60),
+    ("CR", "csmt", "kalyan", "SLOW", 3, 5),
+    ("CR", "csmt", "thane", "SLOW", 3, 5),
+    ("CR", "csmt", "kalyan", "FAST", 4, 8),
+    ("CR", "csmt", "dombivli", "SLOW", 8, 15),
+    ("CR", "csmt", "titwala", "SLOW", 8, 15),
+    ("CR", "csmt", "ambernath", "SLOW", 8, 15),
+    ("CR", "csmt", "badlapur", "FAST", 8, 15),
+    ("CR", "csmt", "karjat", "FAST", 15, 40),
+    ("CR", "csmt", "kasara", "FAST", 15, 40),
+    ("CR", "csmt", "khopoli", "SLOW", 60, 120),
+    ("CR", "csmt", "kalyan", "AC FAST", 30, 60),
+    ("CR", "csmt", "thane", "AC SLOW", 40, 90),
+    ("HR", "csmt", "panvel", "SLOW", 5, 10),
+    ("HR", "csmt", "vashi", "SLOW", 8, 15),
+    ("HR", "csmt", "belapur", "SLOW", 12, 25),
+    ("HR", "csmt", "goregaon", "SLOW", 10, 20),
+    ("HR", "panvel", "andheri", "SLOW", 20, 40),
+    ("HR", "csmt", "panvel", "AC SLOW", 60, 180),
+    ("THB", "thane", "vashi", "SLOW", 10, 20),
+]
+
+EXTRA_LINE_STATIONS = 20     # stations per synthetic line
+EXTRA_LINE_SPACING_KM = 2
+
+
+def _is_peak(minute):
+    band = time_band(minute)
+    return band in PEAK_HOURS and PEAK_HOURS[band]["crowd_level"] == "Very High"
+
+
+_PEAK_MINUTES = np.array([_is_peak(m) for m in range(24 * 60)])
+
+
+# ==================================================
+# NETWORK
+# ==================================================
+
+def build_network(extra_lines=0):
+    """
+    (stations, line_routes) for the real network plus extra_lines synthetic
+    lines; each synthetic line branches off a real station in turn.
+    Returns copies, station_registry is not modified.
+    """
+    stations = {sid: {"name": info["name"]} for sid, info in STATIONS.items()}
+    line_routes = {line: routes for line, routes in LINE_ROUTES.items() if line != "M1"}
+    junctions = [station_id(name) for name in CROWDED_STATIONS]
+    for n in range(1, extra_lines + 1):
+        line = f"X{n}"
+        route = [(junctions[(n - 1) % len(junctions)], 0)]
+        for i in range(1, EXTRA_LINE_STATIONS):
+            sid = f"x{n}_{i:02d}"
+            stations[sid] = {"name": f"X{n} Station {i:02d}"}
+            route.append((sid, i * EXTRA_LINE_SPACING_KM))
+        line_routes[line] = [route]
+    return stations, line_routes
+
+
+def extra_line_patterns(line_routes):
+    """Service patterns for the synthetic lines (X1, X2, ...)."""
+    patterns = []
+    for line, routes in line_routes.items():
+        if line.startswith("X"):
+            origin, terminus = routes[0][0][0], routes[0][-1][0]
+            patterns += [(line, origin, terminus, "SLOW", 6, 12),
+                         (line, origin, terminus, "FAST", 12, 25)]
+    return patterns
+
+
+def route_path(routes, origin, terminus):
+    """[(sid, km from origin)] along a line's routes (branches included)."""
+    neighbours = {}
+    for route in routes:
+        for (a, km_a), (b, km_b) in zip(route, route[1:]):
+            neighbours.setdefault(a, []).append((b, abs(km_b - km_a)))
+            neighbours.setdefault(b, []).append((a, abs(km_b - km_a)))
+
+    previous = {origin: None}
+    queue = deque([origin])
+    while queue:
+        sid = queue.popleft()
+        if sid == terminus:
+            break
+        for nxt, km in neighbours.get(sid, []):
+            if nxt not in previous:
+                previous[nxt] = (sid, km)
+                queue.append(nxt)
+    if terminus not in previous:
+        raise ValueError(f"No route from {origin} to {terminus}")
+
+    path = [(terminus, 0.0)]
+    while previous[path[-1][0]] is not None:
+        sid, km = previous[path[-1][0]]
+        path.append((sid, km))
+    path.reverse()
+    # Shift the per-edge distances into cumulative km from the origin
+    stops, total = [], 0.0
+    for i, (sid, _) in enumerate(path):
+        if i:
+            total += path[i - 1][1]
+        stops.append((sid, total))
+    return stops
+
+
+def _fast_stops():
+    interchanges = {}
+    for line, routes in LINE_ROUTES.items():
+        for route in routes:
+            for sid, _ in route:
+                interchanges.setdefault(sid, set()).add(line)
+    return ({sid for sid, lines in interchanges.items() if len(lines) > 1}
+            | {station_id(name) for name in CROWDED_STATIONS} | FAST_STOPS)
+
+
+# ==================================================
+# GENERATION
+# ==================================================
+
+def departures(peak_headway, offpeak_headway, scale, rng):
+    """Departure minutes across the service day (float, unsorted-safe)."""
+    times = []
+    t = SERVICE_START + rng.uniform(0, offpeak_headway / scale)
+    while t < SERVICE_END:
+        times.append(t)
+        headway = (peak_headway if _PEAK_MINUTES[int(t) % (24 * 60)] else offpeak_headway) / scale
+        t += headway * (1 + rng.uniform(-JITTER, JITTER))
+    return np.array(times)
+
+
+def generate(scale=1.0, extra_lines=0, seed=42):
+    """
+    Generate a timetable. Returns (trains, stop_times):
+      trains      DataFrame id/line/time/source/dest/type (+ minute, is_ac)
+      stop_times  dict of CSR arrays: indptr, station, minute, plus the
+                  station id list the station indices point into
+    """
+    stations, line_routes = build_network(extra_lines)
+    fast_stops = _fast_stops()
+    patterns = SERVICE_PATTERNS + extra_line_patterns(line_routes)
+
+    blocks = []
+    for p, (line, origin, terminus, train_type, peak, offpeak) in enumerate(patterns):
+        path = route_path(line_routes[line], origin, terminus)
+        fast = "FAST" in train_type
+        speed = SPEED_KMPH["FAST" if fast else "SLOW"]
+        for d, stops in enumerate((path, [(sid, path[-1][1] - km) for sid, km in reversed(path)])):
+            if fast:
+                stops = [stop for i, stop in enumerate(stops)
+                         if stop[0] in fast_stops or i in (0, len(stops) - 1)]
+            # Seeded per pattern and direction, so adding a pattern doesn't shift the others
+            rng = np.random.default_rng([seed, p, d])
+            start = departures(peak, offpeak, scale, rng)
+            offsets = np.array([km for _, km in stops]) / speed * 60
+            blocks.append((line, stops[0][0], stops[-1][0], train_type, start,
+                           [sid for sid, _ in stops], offsets))
+
+    # Trains, ordered by line then departure (ids follow that order)
+    station_index = {sid: i for i, sid in enumerate(stations)}
+    frames, stop_blocks = [], []
+    for line, src, dst, train_type, start, stop_ids, offsets in blocks:
+        minute = np.round(start).astype(np.int32)
+        frames.append(pd.DataFrame({"line": line, "minute": minute,
+                                    "source": stations[src]["name"], "dest": stations[dst]["name"],
+                                    "type": train_type}))
+        stop_blocks.append((np.round(start[:, None] + offsets[None, :]).astype(np.int32),
+                            np.array([station_index[sid] for sid in stop_ids], dtype=np.int32)))
+
+    trains = pd.concat(frames, ignore_index=True)
+    order = np.lexsort((trains["minute"].to_numpy(), trains["line"].to_numpy()))
+    trains = trains.iloc[order].reset_index(drop=True)
+    trains.insert(0, "id", trains["line"] + "_" + trains.groupby("line").cumcount().map("{:06d}".format))
+    trains["time"] = [_clock(m) for m in trains["minute"].to_numpy()]
+    trains["is_ac"] = trains["type"].str.startswith("AC")
+
+    # Stop times in the same order as the trains: CSR over (station, minute)
+    counts = np.concatenate([np.full(len(times), len(idx)) for times, idx in stop_blocks])[order]
+    block_rows = np.concatenate([np.arange(len(times)) for times, _ in stop_blocks])[order]
+    block_of = np.concatenate([np.full(len(times), b) for b, (times, _) in enumerate(stop_blocks)])[order]
+    indptr = np.zeros(len(trains) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    station = np.empty(indptr[-1], dtype=np.int32)
+    minute = np.empty(indptr[-1], dtype=np.int32)
+    for b, (times, idx) in enumerate(stop_blocks):
+        rows = np.flatnonzero(block_of == b)
+        if not len(rows):
+            continue
+        # Scatter this block's rows into their slots in train order
+        slots = indptr[rows][:, None] + np.arange(len(idx))[None, :]
+        station[slots] = idx
+        minute[slots] = times[block_rows[rows]]
+
+    stop_times = {"indptr": indptr, "station": station, "minute": minute,
+                  "station_ids": np.array(list(stations)), "train_ids": trains["id"].to_numpy(dtype=str)}
+    return trains[["id", "line", "time", "source", "dest", "type", "minute", "is_ac"]], stop_times
+
+
+def _clock(minute):
+    hour, minute = divmod(int(minute) % (24 * 60), 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'am' if hour < 12 else 'pm'}"
+
+
+# ==================================================
+# FILES
+# ==================================================
+
+def write_timetables(trains, stop_times, output_dir=OUTPUT_DIR):
+    """The two CSVs (same columns as the scraped ones) and stop_times.npz."""
+    os.makedirs(output_dir, exist_ok=True)
+    columns = ["id", "line", "time", "source", "dest", "type"]
+    paths = {
+        "local": os.path.join(output_dir, LOCAL_FILE),
+        "ac": os.path.join(output_dir, AC_FILE),
+        "stop_times": os.path.join(output_dir, STOP_TIMES_FILE),
+    }
+    trains.loc[~trains["is_ac"], columns].to_csv(paths["local"], index=False)
+    trains.loc[trains["is_ac"], columns].to_csv(paths["ac"], index=False)
+    if stop_times is not None:
+        np.savez_compressed(paths["stop_times"], **stop_times)
+    return paths
+
+
+def load_stop_times(path):
+    """stop_times.npz -> {train_id: [(station_id, minute), ...]} accessor."""
+    data = np.load(path)
+    indptr, station, minute = data["indptr"], data["station"], data["minute"]
+    station_ids, train_ids = data["station_ids"], data["train_ids"]
+    index = {train_id: i for i, train_id in enumerate(train_ids)}
+
+    def stops(train_id):
+        i = index[train_id]
+        return [(str(station_ids[s]), int(m))
+                for s, m in zip(station[indptr[i]:indptr[i + 1]], minute[indptr[i]:indptr[i + 1]])]
+    return stops
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic timetable at scale.")
+    parser.add_argument("--scale", type=float, default=1.0, help="train count multiplier (1, 10, 100)")
+    parser.add_argument("--extra-lines", type=int, default=0, help="synthetic branch lines to add")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--no-stops", action="store_true", help="skip stop_times.npz")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    trains, stop_times = generate(args.scale, args.extra_lines, args.seed)
+    generated = time.perf_counter() - start
+    paths = write_timetables(trains, None if args.no_stops else stop_times, args.output_dir)
+    written = time.perf_counter() - start - generated
+
+    print(f"{len(trains):,} trains ({trains['is_ac'].sum():,} AC) on "
+          f"{trains['line'].nunique()} lines, {len(stop_times['station']):,} stop times")
+    print(f"Generated in {generated:.2f}s, written in {written:.2f}s:")
+    for path in paths.values():
+        if os.path.exists(path):
+            print(f"  {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+    print(trains.groupby("line").size().to_string())
@@ -0,0 +1,201 @@
+# ==================================================
+# Mumbai Local Train - Timetable Generations
+# ==================================================
+# Versioned timetable builds, published for serving
+# processes without a restart:
+#   generations/
+#     CURRENT     <- number of the live generation
+#     000041/     <- CSVs, timetable.pkl, report, ...
+#     000042/
+#     next/       <- staging for the next build
+# - a build is finished in next/, renamed to its
+#   number, then CURRENT is replaced atomically
+# - readers poll CURRENT from a background thread, load
+#   the new artifact there and swap one reference, so
+#   requests never wait on disk or validation
+# refresh_daemon.py produces generations on a schedule.
+# ==================================================
+
+import os
+import shutil
+import threading
+import time
+
+from timetable_build import ARTIFACT_FILE, SOURCE_FILES, load_artifact
+
+BASE_DIR = os.path.dirname(__file__)
+GENERATIONS_DIR = os.path.join(BASE_DIR, "generations")
+CURRENT_FILE = "CURRENT"
+STAGING = "next"
+KEEP_GENERATIONS = 3         # older ones are deleted (readers may still be loading the last)
+POLL_INTERVAL = 30           # seconds between reader checks of CURRENT
+
+
+def generation_dir(number, root=GENERATIONS_DIR):
+    return os.path.join(root, f"{number:06d}")
+
+
+def current_generation(root=GENERATIONS_DIR):
+    """Number of the live generation (None if nothing is published)."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+# ==================================================
+# PUBLISH (builder side)
+# ==================================================
+
+def staging_dir(root=GENERATIONS_DIR):
+    """
+    The build folder for the next generation. A new one starts from
+    the live generation's CSVs (the repo's CSVs before the first), so
+    refresh diffs keep train ids; an existing one is left as it is
+    (an unfinished scrape resumes from its checkpoint).
+    """
+    staging = os.path.join(root, STAGING)
+    if os.path.isdir(staging):
+        return staging
+    os.makedirs(staging)
+    current = current_generation(root)
+    for path in SOURCE_FILES:
+        name = os.path.basename(path)
+        seed = os.path.join(generation_dir(current, root), name) if current is not None else path
+        if os.path.exists(seed):
+            shutil.copy2(seed, os.path.join(staging, name))
+    return staging
+
+
+def discard_staging(root=GENERATIONS_DIR):
+    shutil.rmtree(os.path.join(root, STAGING), ignore_errors=True)
+
+
+def _numbered(root):
+    return [int(name) for name in os.listdir(root) if name.isdigit()]
+
+
+def publish(staging, root=GENERATIONS_DIR, keep=KEEP_GENERATIONS):
+    """
+    Make a finished staging folder the live generation. Returns its number.
+    Numbers continue after the highest folder present, so one left by a
+    publish that died before updating CURRENT is never reused.
+    """
+    number = max(_numbered(root) + [current_generation(root) or 0]) + 1
+    target = generation_dir(number, root)
+    os.replace(staging, target)
+
+    tmp = os.path.join(root, f"{CURRENT_FILE}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(f"{number}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
+
+    for old in _numbered(root):
+        if old <= number - keep:
+            shutil.rmtree(generation_dir(old, root), ignore_errors=True)
+    return number
+
+
+# ==================================================
+# READ (serving side)
+# ==================================================
+
+class PublishedTimetable:
+    """
+    The live generation's clean trains. get() only reads a reference;
+    a daemon thread polls CURRENT and swaps in new generations. Until
+    something is published, get() defers to `fallback` (e.g. a
+    timetable_build.CleanTimetable over the repo's CSVs).
+    """
+
+    def __init__(self, fallback=None, root=GENERATIONS_DIR, poll_interval=POLL_INTERVAL):
+        self.fallback = fallback
+        self.root = root
+        self.poll_interval = poll_interval
+        self._current = (None, None)          # (generation, trains), swapped as one
+        self._watcher = None
+        self._lock = threading.Lock()
+        self.stats = {"swaps": 0, "failed_loads": 0}
+        self.refresh()
+
+    @property
+    def generation(self):
+        return self._current[0]
+
+    def refresh(self):
+        """Load the live generation if it is newer than ours. True on a swap."""
+        number = current_generation(self.root)
+        if number is None or number == self._current[0]:
+            return False
+        artifact = load_artifact(os.path.join(generation_dir(number, self.root),
+                                              os.path.basename(ARTIFACT_FILE)))
+        if artifact is None:
+            self.stats["failed_loads"] += 1
+            return False
+        self._current = (number, artifact['trains'])
+        self.stats["swaps"] += 1
+        return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Timetable generation check failed: {e}")
+
+    def get(self):
+        if self._watcher is None:
+            with self._lock:
+                if self._watcher is None:
+                    self._watcher = threading.Thread(target=self._watch, name="timetable-generations",
+                                                     daemon=True)
+                    self._watcher.start()
+        trains = self._current[1]
+        if trains is None and self.fallback is not None:
+            return self.fallback.get()
+        return trains
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    import tempfile
+
+    from timetable_build import build
+    from timetable_refresh import read_timetable
+
+    root = tempfile.mkdtemp()
+    reader = PublishedTimetable(root=root, poll_interval=0.05)
+    print(f"Before publishing: generation {reader.generation}, trains {reader.get()}")
+
+    def build_generation(edit=None):
+        staging = staging_dir(root)
+        if edit:
+            edit(staging)
+        build([os.path.join(staging, os.path.basename(p)) for p in SOURCE_FILES],
+              os.path.join(staging, os.path.basename(ARTIFACT_FILE)),
+              os.path.join(staging, "timetable_report.json"))
+        return publish(staging, root)
+
+    def drop_first_train(staging):
+        path = os.path.join(staging, "mumbai_ac_trains.csv")
+        read_timetable(path)[0].iloc[1:].to_csv(path, index=False)
+
+    for edit in (None, drop_first_train, drop_first_train, drop_first_train):
+        number = build_generation(edit)
+        # Serve requests while the watcher picks the new generation up
+        calls, slowest, start = 0, 0.0, time.perf_counter()
+        while reader.generation != number:
+            t = time.perf_counter()
+            reader.get()
+            slowest = max(slowest, time.perf_counter() - t)
+            calls += 1
+        print(f"Generation {number}: live after {(time.perf_counter() - start) * 1000:.0f} ms, "
+              f"{len(reader.get())} trains; {calls:,} get() calls meanwhile, "
+              f"slowest {slowest * 1e6:.0f} us")
+    print(f"Kept: {sorted(os.listdir(root))}, stats {reader.stats}")
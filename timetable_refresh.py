@@ -0,0 +1,311 @@
+# ==================================================
+# Mumbai Local Train - Incremental Timetable Refresh
+# ==================================================
+# Applies a fresh scrape to the timetable CSVs as a
+# row-level diff instead of a rewrite:
+# - train ids stay the same for unchanged trains
+#   (new trains get a content-derived id)
+# - trains that moved by a few minutes are "retimed"
+#   and keep their id
+# - CSVs are replaced atomically (temp file + rename)
+# - each change set is appended to a log that serving
+#   processes replay instead of reloading the CSV
+# ==================================================
+
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from crowd_model import departure_minutes
+
+BASE_DIR = os.path.dirname(__file__)
+CHANGES_FILE = os.path.join(BASE_DIR, "timetable_changes.jsonl")
+
+COLUMNS = ['id', 'line', 'time', 'source', 'dest', 'type']
+SERVICE = ['line', 'source', 'dest', 'type']   # what a train "is", apart from its time
+RETIME_WINDOW = 15           # minutes a departure may move and still be the same train
+
+
+# ==================================================
+# KEYS & VERSIONS
+# ==================================================
+
+def train_key(line, source, dest, train_type, time):
+    """Content-derived id, e.g. 'WR_3fa2c1d9'."""
+    minute = departure_minutes([time])[0]
+    slot = int(minute) if minute == minute else str(time).strip().lower()
+    digest = hashlib.sha1(f"{line}|{source}|{dest}|{train_type}|{slot}".encode("utf-8")).hexdigest()
+    return f"{line}_{digest[:8]}"
+
+
+def _version(data):
+    return hashlib.sha1(data).hexdigest()[:12]
+
+
+def file_version(path):
+    """Short content hash of a timetable file (None if missing)."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return _version(f.read())
+
+
+def read_timetable(path):
+    """
+    (df, version) from one read of the file, so the version always
+    matches the rows. All columns are strings; empty cells stay ""
+    (a Harbour train's unknown dest must not come back as NaN).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    return pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False), _version(data)
+
+
+def _slots(df):
+    """Minute of day per row; the raw string when the time won't parse."""
+    minutes = departure_minutes(df['time'])
+    raw = df['time'].astype(str).str.strip().str.lower()
+    return [int(m) if m == m else r for m, r in zip(minutes, raw)]
+
+
+# ==================================================
+# DIFF
+# ==================================================
+
+def diff_timetables(current, scraped, retime_window=RETIME_WINDOW):
+    """
+    Change set turning `current` (with ids) into `scraped` (no ids):
+    {'added': [row dicts with new ids], 'removed': [ids],
+     'retimed': [{'id', 'from', 'to'}], 'unchanged': count}
+    """
+    current = current[COLUMNS].fillna("").reset_index(drop=True)
+    scraped = scraped[[c for c in COLUMNS if c != 'id']].fillna("").reset_index(drop=True)
+
+    # Exact matches: same service, same departure (nth duplicate pairs with nth)
+    old = current.assign(slot=_slots(current))
+    new = scraped.assign(slot=_slots(scraped))
+    for df in (old, new):
+        df['nth'] = df.groupby(SERVICE + ['slot'], dropna=False).cumcount()
+    merged = old.merge(new, on=SERVICE + ['slot', 'nth'], how='outer',
+                       suffixes=('_old', '_new'), indicator=True)
+    unchanged = int((merged['_merge'] == 'both').sum())
+    gone = merged[merged['_merge'] == 'left_only']
+    fresh = merged[merged['_merge'] == 'right_only']
+
+    # Leftovers of the same service within the window: the train was retimed
+    retimed, removed, added = [], [], []
+    gone_by_service = {key: group for key, group in gone.groupby(SERVICE, dropna=False)}
+    used_ids = set(current['id'])
+    for key, group in fresh.groupby(SERVICE, dropna=False):
+        candidates = gone_by_service.pop(key, None)
+        candidates = [] if candidates is None else list(candidates.itertuples(index=False))
+        for row in sorted(group.itertuples(index=False), key=lambda r: str(r.slot)):
+            match = None
+            if isinstance(row.slot, int):
+                timed = [c for c in candidates if isinstance(c.slot, int)
+                         and abs(c.slot - row.slot) <= retime_window]
+                match = min(timed, key=lambda c: abs(c.slot - row.slot), default=None)
+            if match is not None:
+                candidates.remove(match)
+                retimed.append({'id': match.id, 'from': match.time_old, 'to': row.time_new})
+                continue
+            train_id = train_key(row.line, row.source, row.dest, row.type, row.time_new)
+            base, n = train_id, 2
+            while train_id in used_ids:
+                train_id, n = f"{base}-{n}", n + 1
+            used_ids.add(train_id)
+            added.append({'id': train_id, 'line': row.line, 'time': row.time_new,
+                          'source': row.source, 'dest': row.dest, 'type': row.type})
+        removed.extend(c.id for c in candidates)
+    for group in gone_by_service.values():
+        removed.extend(group['id'])
+
+    return {'added': added, 'removed': sorted(removed), 'retimed': retimed, 'unchanged': unchanged}
+
+
+def apply_changes(df, changes):
+    """Apply a change set to a timetable DataFrame (returns a new one)."""
+    removed = set(changes['removed'])
+    if removed:
+        df = df[~df['id'].isin(removed)]
+    if changes['retimed']:
+        new_times = {r['id']: r['to'] for r in changes['retimed']}
+        df = df.assign(time=df['id'].map(new_times).fillna(df['time']))
+    if changes['added']:
+        df = pd.concat([df, pd.DataFrame(changes['added'], columns=COLUMNS)], ignore_index=True)
+    return df.reset_index(drop=True)
+
+
+def has_changes(changes):
+    return bool(changes['added'] or changes['removed'] or changes['retimed'])
+
+
+def describe(changes):
+    return (f"{len(changes['added'])} added, {len(changes['removed'])} removed, "
+            f"{len(changes['retimed'])} retimed, {changes['unchanged']} unchanged")
+
+
+# ==================================================
+# WRITE
+# ==================================================
+
+def _write_temp(df, path):
+    """Write df next to path (fsync'd) and return the temp file name."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        df.to_csv(f, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp
+
+
+def write_csv_atomic(df, path):
+    """Write next to the target, fsync, then rename over it."""
+    os.replace(_write_temp(df, path), path)
+
+
+def refresh_timetable(scraped, path, changes_file=CHANGES_FILE):
+    """
+    Diff a fresh scrape against the CSV at path, write it atomically
+    if anything changed and log the change set. Returns the change set
+    (with 'file', 'base_version' and 'version').
+    """
+    scraped = pd.DataFrame(scraped)
+    if os.path.exists(path):
+        current, version = read_timetable(path)
+    else:
+        current, version = pd.DataFrame(columns=COLUMNS, dtype=str), None
+
+    changes = diff_timetables(current, scraped)
+    changes['file'] = os.path.basename(path)
+    changes['base_version'] = version
+    changes['version'] = changes['base_version']
+    if not has_changes(changes):
+        return changes
+
+    # Log before the rename: a reader that sees the new file always finds its entry
+    tmp = _write_temp(apply_changes(current, changes), path)
+    changes['version'] = file_version(tmp)
+    changes['created_at'] = datetime.now().isoformat(timespec="seconds")
+    with open(changes_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps({k: v for k, v in changes.items() if k != 'unchanged'}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return changes
+
+
+# ==================================================
+# REPLAY (serving side)
+# ==================================================
+
+class TimetableView:
+    """
+    In-memory copy of one timetable CSV, kept current by replaying
+    the change log; falls back to a full reload when it can't (log
+    trimmed, or the file was replaced some other way).
+    """
+
+    def __init__(self, path, changes_file=CHANGES_FILE):
+        self.path = path
+        self.changes_file = changes_file
+        self.df = None
+        self.version = None
+        self._log_offset = 0
+        self._stamp = None
+        self.stats = {"reloads": 0, "changes_applied": 0}
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _reload(self):
+        self.df, self.version = read_timetable(self.path)
+        self._log_offset = os.path.getsize(self.changes_file) if os.path.exists(self.changes_file) else 0
+        self.stats["reloads"] += 1
+
+    def _replay(self):
+        """Apply logged change sets for this file; False if the chain breaks."""
+        if not os.path.exists(self.changes_file):
+            return False
+        name = os.path.basename(self.path)
+        with open(self.changes_file, "r", encoding="utf-8") as f:
+            f.seek(self._log_offset)
+            lines = f.readlines()
+            self._log_offset = f.tell()
+        df, version = self.df, self.version
+        for line in lines:
+            try:
+                changes = json.loads(line)
+            except ValueError:
+                continue
+            if changes.get('file') != name:
+                continue
+            if changes['base_version'] != version:
+                return False
+            df, version = apply_changes(df, changes), changes['version']
+            self.stats["changes_applied"] += 1
+        if version != file_version(self.path):
+            return False
+        self.df, self.version = df, version
+        return True
+
+    def get(self):
+        """The current timetable (cheap stat() when nothing changed)."""
+        stamp = self._file_stamp()
+        if stamp is None:
+            return None
+        if stamp != self._stamp:
+            if self.df is None or not self._replay():
+                self._reload()
+            self._stamp = stamp
+        return self.df
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import time
+
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "mumbai_local_trains.csv")
+    log = os.path.join(folder, "changes.jsonl")
+    shutil.copy(os.path.join(BASE_DIR, "mumbai_local_trains.csv"), path)
+
+    view = TimetableView(path, log)
+    print(f"Loaded {len(view.get())} trains")
+
+    # A "new scrape": two trains retimed, one cancelled, one new
+    scrape = read_timetable(path)[0].drop(columns=['id'])
+    def later(time_str, minutes):
+        stamp = datetime.strptime(time_str.strip().upper(), "%I:%M %p") + pd.Timedelta(minutes=minutes)
+        return stamp.strftime("%I:%M %p").lstrip("0").lower()
+
+    scrape.loc[10, 'time'] = later(scrape.loc[10, 'time'], 3)
+    scrape.loc[20, 'time'] = later(scrape.loc[20, 'time'], 2)
+    scrape = scrape.drop(index=30)
+    scrape.loc[len(scrape) + 1] = ['WR', '11:58 pm', 'Churchgate', 'Borivali', 'SLOW']
+
+    start = time.perf_counter()
+    changes = refresh_timetable(scrape, path, log)
+    print(f"Refresh: {describe(changes)} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    print(f"Retimed: {changes['retimed']}")
+
+    start = time.perf_counter()
+    df = view.get()
+    print(f"Served copy updated in {(time.perf_counter() - start) * 1000:.1f} ms: "
+          f"{len(df)} trains, stats {view.stats}")
+    print(f"Matches file: {df.equals(read_timetable(path)[0])}")
+
+    again = refresh_timetable(scrape, path, log)
+    print(f"Same scrape again: {describe(again)}, file rewritten: {again['version'] != again['base_version']}")
@@ -8,6 +8,10 @@ from datetime import datetime, timedelta, timezone
 import os
 import re
 
+from station_registry import station_id
+from timetable_build import CleanTimetable
+from timetable_publish import PublishedTimetable
+
 # IST timezone (UTC+5:30)
 IST = timezone(timedelta(hours=5, minutes=30))
 
@@ -17,11 +21,36 @@ def get_ist_time():
 
 # Import first/last mile bus connections
 try:
-    from bus_connections import check_needs_bus_connection, format_bus_response, get_combined_route, FIRST_LAST_MILE
+    from bus_connections import (
+        format_bus_response, get_combined_route, split_route_areas, pick_access_pair,
+        FIRST_LAST_MILE
+    )
+    from station_registry import canonical_name
     BUS_CONNECTIONS_AVAILABLE = True
 except ImportError:
     BUS_CONNECTIONS_AVAILABLE = False
 
+# Import door-to-door router (bus + metro + train)
+try:
+    from multimodal_router import plan_journey, format_journey
+    MULTIMODAL_ROUTER_AVAILABLE = True
+except ImportError:
+    MULTIMODAL_ROUTER_AVAILABLE = False
+
+# Import interchange transfer times
+try:
+    from transfers import transfer_time
+    TRANSFERS_AVAILABLE = True
+except ImportError:
+    TRANSFERS_AVAILABLE = False
+
+# Import crowd model (least crowded ordering)
+try:
+    from crowd_model import score_trains, crowd_label
+    CROWD_MODEL_AVAILABLE = True
+except ImportError:
+    CROWD_MODEL_AVAILABLE = False
+
 # Import fare calculator
 try:
     from fare_calculator import calculate_fare, format_fare_response
@@ -72,34 +101,24 @@ AC_TRAIN_FILE = os.path.join(BASE_DIR, "mumbai_ac_trains.csv")
 LOCAL_TRAIN_FILE = os.path.join(BASE_DIR, "mumbai_local_trains.csv")
 
 
-def load_trains(ac_only=False):
-    """Load train schedule from CSV files."""
-    try:
-        if ac_only:
-            return pd.read_csv(AC_TRAIN_FILE)
-        else:
-            # Try to load non-AC trains, fall back to AC if not available
-            try:
-                return pd.read_csv(LOCAL_TRAIN_FILE)
-            except FileNotFoundError:
-                return pd.read_csv(AC_TRAIN_FILE)
-    except FileNotFoundError:
-        return None
+# Validated timetable (timetable_build): canonical station names and
+# ids, minute of day. The live generation published by refresh_daemon
+# is swapped in by a background thread (timetable_publish); until one
+# exists, the CSVs here are served, with scraper refreshes replayed
+# from the change log (timetable_refresh).
+_timetable = PublishedTimetable(fallback=CleanTimetable([LOCAL_TRAIN_FILE, AC_TRAIN_FILE]))
 
 
-def parse_time(t):
-    """Parse time string to time object."""
-    try:
-        # Handle different time formats
-        t = t.strip().lower()
-        for fmt in ["%I:%M %p", "%I:%M%p", "%H:%M"]:
-            try:
-                return datetime.strptime(t, fmt).time()
-            except:
-                continue
-        return None
-    except:
+def load_trains(ac_only=False):
+    """Load the train schedule (AC trains, or the non-AC ones)."""
+    df = _timetable.get()
+    if df is None:
         return None
+    if ac_only:
+        return df[df['is_ac']]
+    # Non-AC trains, falling back to AC if there are none
+    local = df[~df['is_ac']]
+    return local if len(local) else df
 
 
 def extract_time_from_query(query):
@@ -151,62 +170,64 @@ def extract_time_from_query(query):
     return None
 
 
-def get_trains(source=None, dest=None, line=None, ac_only=False, limit=8, after_time=None, show_all=False):
+LEAST_CROWDED_WINDOW = 30   # upcoming trains considered for "least crowded"
+LEAST_CROWDED_PHRASES = ["least crowded", "less crowded", "less crowd", "least crowd",
+                         "avoid crowd", "avoid the crowd", "not crowded", "emptier", "empty train"]
+
+
+def get_trains(source=None, dest=None, line=None, ac_only=False, limit=8, after_time=None,
+               show_all=False, order="time"):
     """Get trains based on filters.
 
     Args:
         after_time: Show trains after this specific time (datetime.time object)
         show_all: If True, show all trains regardless of time
+        order: "time" (default) or "least_crowded" - ranks the next
+            LEAST_CROWDED_WINDOW departures by estimated crowding and
+            adds a 'crowd' column
     """
     df = load_trains(ac_only=ac_only)
     if df is None or len(df) == 0:
         return None, False, 0
 
-    # Filter by criteria
+    # Filter by criteria (names in the timetable are canonical; match on ids)
     if line:
         df = df[df['line'] == line]
     if source:
-        # Flexible matching for source - handle variations like "CSMT", "Mumbai CSMT", "Cst"
-        src_lower = source.lower().replace('csmt', '').replace('cst', '').strip()
-        if src_lower:
-            df = df[df['source'].str.lower().str.contains(src_lower, na=False)]
-        else:
-            # Searching for CSMT/CST specifically
-            df = df[df['source'].str.lower().str.contains('csmt|cst|mumbai c', regex=True, na=False)]
+        df = df[df['source_id'] == station_id(source)]
     if dest:
-        # Flexible matching for destination
-        dst_lower = dest.lower().replace('csmt', '').replace('cst', '').strip()
-        if dst_lower:
-            df = df[df['dest'].str.lower().str.contains(dst_lower, na=False)]
-        else:
-            df = df[df['dest'].str.lower().str.contains('csmt|cst|mumbai c', regex=True, na=False)]
+        df = df[df['dest_id'] == station_id(dest)]
 
     if len(df) == 0:
         return None, False, 0
 
-    # Sort by time
-    df = df.copy()
-    df['parsed_time'] = df['time'].apply(parse_time)
-
     total_trains = len(df)
     has_more = False
+    df = df.sort_values('minute', kind='stable')
 
     if show_all:
         # Show all trains sorted by time
-        upcoming = df.sort_values('parsed_time')
+        upcoming = df
     else:
         # Filter by time (use IST for Mumbai trains)
         filter_time = after_time if after_time else get_ist_time()
-        upcoming = df[df['parsed_time'] >= filter_time]
+        upcoming = df[df['minute'] >= filter_time.hour * 60 + filter_time.minute]
 
         if len(upcoming) == 0:
             # If no trains left, show first trains of the day
-            upcoming = df.sort_values('parsed_time')
+            upcoming = df
         else:
-            upcoming = upcoming.sort_values('parsed_time')
             has_more = total_trains > len(upcoming)
 
-    result = upcoming.drop(columns=['parsed_time'], errors='ignore').head(limit)
+    if order == "least_crowded" and CROWD_MODEL_AVAILABLE:
+        candidates = upcoming if show_all else upcoming.head(max(limit, LEAST_CROWDED_WINDOW))
+        scores = score_trains(candidates)
+        ranked = candidates.assign(crowd_score=scores).sort_values(
+            'crowd_score', kind='stable', na_position='last').head(limit)
+        ranked['crowd'] = [crowd_label(score) for score in ranked['crowd_score']]
+        return ranked.drop(columns=['crowd_score']), has_more, total_trains
+
+    result = upcoming.head(limit)
     return result, has_more, total_trains
 
 
@@ -387,7 +408,7 @@ def handle_ac_query(q, original_query):
         result = f"**AC Trains on {line_name}**\n\n"
         result += "| Time | From | To | Type |\n|------|------|-----|------|\n"
         for _, row in trains.iterrows():
-            result += f"| {row['time']} | {row['source']} | {row['dest']} | {row['type']} |\n"
+            result += f"| {row['time']} | {row['source']} | {dest_label(row['dest'])} | {row['type']} |\n"
         result += f"\n_Showing {len(trains)} upcoming AC trains_"
         return result
 
@@ -401,7 +422,7 @@ def handle_ac_query(q, original_query):
         result = f"**AC Trains from {source}**{dest_text}\n\n"
         result += "| Time | To | Type |\n|------|-----|------|\n"
         for _, row in trains.iterrows():
-            result += f"| {row['time']} | {row['dest']} | {row['type']} |\n"
+            result += f"| {row['time']} | {dest_label(row['dest'])} | {row['type']} |\n"
         result += f"\n_Showing {len(trains)} upcoming AC trains_"
         return result
 
@@ -440,24 +461,44 @@ Try asking:
 
 # ---------------- TRAIN TIMETABLE HANDLER ----------------
 
-def handle_train_query(src, dst, line_code, after_time=None, show_all=False):
+def dest_label(dest):
+    """Destination for display (Harbour timetables don't list one)."""
+    return "—" if pd.isna(dest) else dest
+
+
+def format_train_table(trains):
+    """Markdown table of trains (adds a Crowd column when ranked by crowding)."""
+    if 'crowd' in trains.columns:
+        result = "| Time | Destination | Type | Crowd |\n|------|-------------|------|-------|\n"
+        for _, row in trains.iterrows():
+            result += f"| {row['time']} | {dest_label(row['dest'])} | {row['type']} | {row['crowd']} |\n"
+        return result
+
+    result = "| Time | Destination | Type |\n|------|-------------|------|\n"
+    for _, row in trains.iterrows():
+        result += f"| {row['time']} | {dest_label(row['dest'])} | {row['type']} |\n"
+    return result
+
+
+def handle_train_query(src, dst, line_code, after_time=None, show_all=False, order="time"):
     """Handle train timetable queries."""
 
     # Try to find trains
-    trains, has_more, total = get_trains(source=src, dest=dst, limit=10, after_time=after_time, show_all=show_all)
+    trains, has_more, total = get_trains(source=src, dest=dst, limit=10, after_time=after_time,
+                                         show_all=show_all, order=order)
 
     if trains is None or len(trains) == 0:
         # Try reverse direction or broader search
-        trains, has_more, total = get_trains(source=src, limit=10, after_time=after_time, show_all=show_all)
+        trains, has_more, total = get_trains(source=src, limit=10, after_time=after_time,
+                                             show_all=show_all, order=order)
 
     if trains is not None and len(trains) > 0:
         time_note = ""
         if after_time:
             time_note = f" (after {after_time.strftime('%I:%M %p')})"
-        result = f"**Trains from {src} to {dst}**{time_note}\n\n"
-        result += "| Time | Destination | Type |\n|------|-------------|------|\n"
-        for _, row in trains.iterrows():
-            result += f"| {row['time']} | {row['dest']} | {row['type']} |\n"
+        title = "Least crowded trains" if 'crowd' in trains.columns else "Trains"
+        result = f"**{title} from {src} to {dst}**{time_note}\n\n"
+        result += format_train_table(trains)
         result += f"\n_Showing {len(trains)} of {total} trains_"
         if has_more:
             result += f"\n_Say \"all trains {src} to {dst}\" for full schedule_"
@@ -468,7 +509,7 @@ def handle_train_query(src, dst, line_code, after_time=None, show_all=False):
 
 # ---------------- BUS + TRAIN COMBINED ROUTE ----------------
 
-def handle_bus_train_route(query, from_area, to_area):
+def handle_bus_train_route(query, from_area, to_area, after_time=None):
     """Handle queries that need bus + train combinations."""
     q_lower = query.lower()
 
@@ -480,10 +521,31 @@ def handle_bus_train_route(query, from_area, to_area):
     # Extract regular stations from query
     stations = extract_stations(query)
 
+    # Pick access stations by total journey time, not list order
+    known_start = stations[0] if stations and not from_area else None
+    known_end = None
+    if not to_area:
+        if len(stations) >= 2:
+            known_end = stations[1]
+        elif len(stations) == 1 and from_area:
+            known_end = stations[0]
+
+    # Door-to-door itineraries ranked by total time (bus + metro + train)
+    if MULTIMODAL_ROUTER_AVAILABLE:
+        from_place = from_area or known_start
+        to_place = to_area or known_end
+        if from_place and to_place:
+            depart = after_time.hour * 60 + after_time.minute if after_time else None
+            journey = format_journey(plan_journey(from_place, to_place, depart_minutes=depart))
+            if journey:
+                return journey
+
+    first_conn, last_conn = pick_access_pair(from_area, to_area, known_start, known_end)
+
     # First mile (from area to train station)
     if from_area:
-        conn = from_area["nearest_stations"][0]
-        start_station = conn["station"]
+        conn = first_conn
+        start_station = canonical_name(conn["station"]) or conn["station"]
         response += f"**Step {step_num}: Bus from {from_area['area_name']}**\n"
         response += f"Take Bus **{' or '.join(conn['buses'])}** to **{conn['station']}** Station\n"
         response += f"Time: {conn['travel_time']}\n"
@@ -497,8 +559,8 @@ def handle_bus_train_route(query, from_area, to_area):
 
     # Determine end station
     if to_area:
-        conn = to_area["nearest_stations"][0]
-        end_station = conn["station"]
+        conn = last_conn
+        end_station = canonical_name(conn["station"]) or conn["station"]
     elif len(stations) >= 2:
         end_station = stations[1]
     elif len(stations) == 1 and from_area:
@@ -520,7 +582,7 @@ def handle_bus_train_route(query, from_area, to_area):
 
     # Last mile (from train station to destination area)
     if to_area:
-        conn = to_area["nearest_stations"][0]
+        conn = last_conn
         response += f"**Step {step_num}: Bus to {to_area['area_name']}**\n"
         response += f"From **{conn['station']}** take Bus **{' or '.join(conn['buses'])}**\n"
         response += f"Time: {conn['travel_time']}\n"
@@ -587,7 +649,11 @@ def chatbot_response(query: str, context=None):
                     return platform_info
             return "Which station? Try: *Platform info Dadar* or *Dadar to Sion which platform*"
 
-    if intent == "peak_hours" or (intent == "unknown" and any(w in q for w in ["peak", "rush", "crowd", "busy"])):
+    # "least crowded train from X" is a timetable query, not peak-hour info
+    order = "least_crowded" if any(p in q for p in LEAST_CROWDED_PHRASES) else "time"
+    wants_least_crowded = order == "least_crowded" and CROWD_MODEL_AVAILABLE and len(stations) >= 1
+
+    if not wants_least_crowded and (intent == "peak_hours" or (intent == "unknown" and any(w in q for w in ["peak", "rush", "crowd", "busy"]))):
         if STATION_INFO_AVAILABLE:
             return get_peak_hour_info()
 
@@ -604,17 +670,10 @@ def chatbot_response(query: str, context=None):
 
     if intent == "bus_connection" or intent == "unknown":
         if BUS_CONNECTIONS_AVAILABLE:
-            from_area = None
-            to_area = None
-            if " to " in q:
-                parts = q.split(" to ", 1)
-                _, _, from_area = check_needs_bus_connection(parts[0].strip())
-                _, _, to_area = check_needs_bus_connection(parts[1].strip())
-            else:
-                _, _, from_area = check_needs_bus_connection(q)
+            from_area, to_area = split_route_areas(q)
             if from_area or to_area:
                 result = "**Combined Bus + Train Route**\n\n"
-                result += handle_bus_train_route(query, from_area, to_area)
+                result += handle_bus_train_route(query, from_area, to_area, after_time=query_time)
                 return result
 
     if intent == "ac_train" or (intent == "unknown" and ("ac" in q or "air condition" in q)):
@@ -625,19 +684,21 @@ def chatbot_response(query: str, context=None):
 
     if len(stations) < 2:
         if len(stations) == 1:
-            trains, has_more, total = get_trains(source=stations[0], limit=8, after_time=query_time, show_all=show_all)
+            trains, has_more, total = get_trains(source=stations[0], limit=8, after_time=query_time,
+                                                 show_all=show_all, order=order)
             if trains is not None and len(trains) > 0:
                 time_note = ""
                 if query_time:
                     time_note = f" (after {query_time.strftime('%I:%M %p')})"
-                result = f"**Trains from {stations[0]}**{time_note}\n\n"
-                result += "| Time | Destination | Type |\n|------|-------------|------|\n"
-                for _, row in trains.iterrows():
-                    result += f"| {row['time']} | {row['dest']} | {row['type']} |\n"
+                title = "Least crowded trains" if 'crowd' in trains.columns else "Trains"
+                result = f"**{title} from {stations[0]}**{time_note}\n\n"
+                result += format_train_table(trains)
                 result += f"\n_Showing {len(trains)} of {total} trains_"
                 if has_more and not show_all:
                     result += f"\n_Say \"all trains from {stations[0]}\" for full schedule_"
                 return result
+            if station_id(stations[0]):
+                return f"No trains found from **{stations[0]}**."
 
         return (
             "I couldn't identify the stations.\n\n"
@@ -653,7 +714,7 @@ def chatbot_response(query: str, context=None):
     dst_line, dst_code = determine_line(dst)
 
     # Try to get actual train timings
-    train_result = handle_train_query(src, dst, src_code, after_time=query_time, show_all=show_all)
+    train_result = handle_train_query(src, dst, src_code, after_time=query_time, show_all=show_all, order=order)
 
     if train_result:
         return train_result
@@ -662,6 +723,13 @@ def chatbot_response(query: str, context=None):
     interchange = find_interchange(src_line, dst_line)
 
     if interchange:
+        change_note = ""
+        if TRANSFERS_AVAILABLE and "→" not in interchange:
+            now = query_time or get_ist_time()
+            minutes = transfer_time(interchange, src_code, dst_code, now.hour * 60 + now.minute)
+            if minutes:
+                change_note = f"\n⏱️ Allow ~{minutes:.0f} min to change platforms\n"
+
         return f"""
 🔁 **Route Information**
 
@@ -669,7 +737,7 @@ From: **{src}** ({src_line})
 To: **{dst}** ({dst_line})
 
 🚉 Change at **{interchange}**
-
+{change_note}
 1. {src} → {interchange.split('→')[0].strip()} ({src_line})
 2. Switch to {dst_line}
 3. Continue to {dst}
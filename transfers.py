@@ -0,0 +1,239 @@
+# ==================================================
+# Mumbai Local Train - Interchange Transfer Times
+# ==================================================
+# Minimum connection time per station and line pair:
+# platform-to-platform walk (from PLATFORM_INFO) plus
+# peak-hour crowd penalties (PEAK_HOURS / CROWDED_STATIONS)
+# Compiled into a flat table for O(1) lookups
+# ==================================================
+
+import re
+
+from station_info import PLATFORM_INFO, PEAK_HOURS, CROWDED_STATIONS
+from station_registry import STATIONS, LINE_NAMES, station_id, station_lines
+
+# ---------------- WALKING MODEL ----------------
+
+FOB_BASE_MIN = 2.0           # climb the foot over-bridge and come down
+PER_PLATFORM_MIN = 0.75      # each platform crossed on the bridge
+SAME_LINE_MIN = 1.5          # slow <-> fast on the same line (usually cross-platform)
+UNKNOWN_WALK_MIN = 4.0       # no platform data for this station
+BOARDING_BUFFER_MIN = 1.0    # reach the right coach / let people off
+CROWDED_PEAK_EXTRA_MIN = 3.0 # pushing through a packed interchange
+
+# Walk time multiplier by PEAK_HOURS crowd level
+CROWD_FACTORS = {
+    "Very High": 1.6,
+    "High": 1.4,
+    "Low to Medium": 1.1,
+    "Low": 1.0,
+}
+DEFAULT_CROWD_LEVEL = "Low to Medium"
+
+LINES = list(LINE_NAMES.keys())
+_LINE_INDEX = {line: i for i, line in enumerate(LINES)}
+_LINE_BY_NAME = {name.lower(): code for code, name in LINE_NAMES.items()}
+
+_LINE_KEYWORDS = [
+    ("trans-harbour", "THB"),
+    ("western", "WR"),
+    ("central", "CR"),
+    ("harbour", "HR"),
+]
+
+
+# ==================================================
+# TIME BANDS
+# ==================================================
+
+def _parse_clock(text):
+    match = re.match(r"\s*(\d{1,2}):(\d{2})\s*([AP]M)", text.upper())
+    hour, minute, period = int(match.group(1)), int(match.group(2)), match.group(3)
+    if period == "PM" and hour != 12:
+        hour += 12
+    elif period == "AM" and hour == 12:
+        hour = 0
+    return hour * 60 + minute
+
+
+BANDS = list(PEAK_HOURS.keys()) + ["other"]
+_BAND_INDEX = {band: i for i, band in enumerate(BANDS)}
+
+
+def _build_band_lookup():
+    """Minute of day -> band index (1440 entries)."""
+    lookup = [_BAND_INDEX["other"]] * (24 * 60)
+    for band, info in PEAK_HOURS.items():
+        start_text, end_text = info["time"].split("-")
+        start, end = _parse_clock(start_text), _parse_clock(end_text)
+        for minute in range(start, end):
+            lookup[minute] = _BAND_INDEX[band]
+    return lookup
+
+
+_BAND_BY_MINUTE = _build_band_lookup()
+
+
+def time_band(minute_of_day):
+    """Get PEAK_HOURS band name for a minute of the day."""
+    return BANDS[_BAND_BY_MINUTE[int(minute_of_day) % (24 * 60)]]
+
+
+def _crowd_level(band):
+    if band in PEAK_HOURS:
+        return PEAK_HOURS[band]["crowd_level"]
+    return DEFAULT_CROWD_LEVEL
+
+
+# ==================================================
+# PLATFORMS
+# ==================================================
+
+def _parse_platforms(text):
+    """'Platform 1, 2' / 'Platform 1-7' -> {1, 2, ...}"""
+    platforms = set()
+    for start, end in re.findall(r"(\d+)(?:\s*-\s*(\d+))?", text):
+        start = int(start)
+        platforms.update(range(start, int(end) + 1) if end else [start])
+    return platforms
+
+
+def _explicit_line(direction):
+    """Line named outright in a direction key ("CSMT (Central)")."""
+    lower = direction.lower()
+    for keyword, line in _LINE_KEYWORDS:
+        if keyword in lower:
+            return line
+    return None
+
+
+def _inferred_lines(sid, direction):
+    """Lines implied by the places named in a direction key ("Thane/Kalyan")."""
+    here = set(station_lines(sid))
+    lines = set()
+    for place in re.split(r"[/,]", re.sub(r"\(.*?\)", "", direction)):
+        other = station_id(place.strip())
+        if other:
+            lines |= here & set(station_lines(other))
+    return lines
+
+
+def platforms_by_line(station):
+    """Get {line: set(platform numbers)} for a station from PLATFORM_INFO."""
+    sid = station_id(station)
+    info = PLATFORM_INFO.get(STATIONS[sid]["name"]) if sid else None
+    if not info:
+        return {}
+
+    result = {}
+    explicit = {}
+    for direction in info["directions"]:
+        line = _explicit_line(direction)
+        if line:
+            explicit[direction] = line
+
+    for direction, text in info["directions"].items():
+        if direction in explicit:
+            lines = {explicit[direction]}
+        else:
+            # "CSMT" at Kurla could be Central or Harbour - if Harbour
+            # has its own entry, this one is the other line
+            lines = _inferred_lines(sid, direction)
+            lines = (lines - set(explicit.values())) or lines
+        for line in lines:
+            result.setdefault(line, set()).update(_parse_platforms(text))
+
+    # Notes like "Harbour line trains on Platform 5"
+    match = re.search(r"(\w[\w-]*) line trains on (platforms? [\d,\s-]+)", info.get("notes", ""), re.I)
+    if match:
+        line = _LINE_BY_NAME.get(f"{match.group(1).lower()} line")
+        if line:
+            result.setdefault(line, set()).update(_parse_platforms(match.group(2)))
+    return result
+
+
+def walking_minutes(station, from_line, to_line):
+    """Platform-to-platform walk between two lines at a station."""
+    if from_line == to_line:
+        return SAME_LINE_MIN
+
+    platforms = platforms_by_line(station)
+    a, b = platforms.get(from_line), platforms.get(to_line)
+    if not a or not b:
+        return UNKNOWN_WALK_MIN
+
+    gap = min(abs(pa - pb) for pa in a for pb in b)
+    if gap == 0:
+        return SAME_LINE_MIN
+    return FOB_BASE_MIN + PER_PLATFORM_MIN * gap
+
+
+# ==================================================
+# COMPILED TABLE
+# ==================================================
+# Flat list indexed by (station, from line, to line, band).
+# Only lines that actually serve a station get real values;
+# other combinations hold None.
+
+_STATION_INDEX = {sid: i for i, sid in enumerate(STATIONS)}
+_CROWDED_IDS = {station_id(name) for name in CROWDED_STATIONS}
+
+
+def _compile_table():
+    n_lines, n_bands = len(LINES), len(BANDS)
+    table = [None] * (len(_STATION_INDEX) * n_lines * n_lines * n_bands)
+
+    for sid, s_idx in _STATION_INDEX.items():
+        lines = station_lines(sid)
+        for from_line in lines:
+            for to_line in lines:
+                walk = walking_minutes(sid, from_line, to_line)
+                for band, b_idx in _BAND_INDEX.items():
+                    level = _crowd_level(band)
+                    minutes = walk * CROWD_FACTORS.get(level, 1.0) + BOARDING_BUFFER_MIN
+                    if sid in _CROWDED_IDS and band in PEAK_HOURS and level == "Very High":
+                        minutes += CROWDED_PEAK_EXTRA_MIN
+                    index = ((s_idx * n_lines + _LINE_INDEX[from_line]) * n_lines
+                             + _LINE_INDEX[to_line]) * n_bands + b_idx
+                    table[index] = round(minutes, 1)
+    return table
+
+
+_TRANSFER_TABLE = _compile_table()
+
+
+def transfer_time(station, from_line, to_line, minute_of_day=None):
+    """
+    Minimum connection time (minutes) to change from one line to
+    another at a station. station may be an id or a name; lines are
+    codes ("WR", "CR", ...). Returns None if a line doesn't serve it.
+    """
+    s_idx = _STATION_INDEX.get(station)
+    if s_idx is None:
+        s_idx = _STATION_INDEX.get(station_id(station))
+    a, b = _LINE_INDEX.get(from_line), _LINE_INDEX.get(to_line)
+    if s_idx is None or a is None or b is None:
+        return None
+
+    band = _BAND_BY_MINUTE[int(minute_of_day) % (24 * 60)] if minute_of_day is not None else _BAND_INDEX["other"]
+    n_lines, n_bands = len(LINES), len(BANDS)
+    return _TRANSFER_TABLE[((s_idx * n_lines + a) * n_lines + b) * n_bands + band]
+
+
+def line_code(line_name):
+    """'Central Line' -> 'CR'."""
+    return _LINE_BY_NAME.get(line_name.lower())
+
+
+# ==================================================
+# TEST
+# ==================================================
+if __name__ == "__main__":
+    print("Interchange transfer times (minutes)")
+    print("=" * 50)
+    for station, a, b in [("Dadar", "WR", "CR"), ("Kurla", "CR", "HR"),
+                          ("CSMT", "CR", "HR"), ("Bandra", "WR", "HR"),
+                          ("Thane", "CR", "THB"), ("Andheri", "WR", "HR")]:
+        peak = transfer_time(station, a, b, 9 * 60)
+        off = transfer_time(station, a, b, 13 * 60)
+        print(f"{station:8s} {a}->{b}: peak {peak}, off-peak {off}")